@@ -0,0 +1,128 @@
+import contextlib
+import glob
+import io
+import multiprocessing
+import os
+import sorter
+from laser_circuit import LaserCircuit
+
+'''
+
+batch_runner - Runs many pulse sequence files against one circuit, spreading
+the files across a pool of worker processes. Every worker is given its own
+copy of the circuit once when it starts and reuses it for each file, so the
+layout (and its cached trajectories) is never rebuilt. The results of all
+files are gathered into one output file.
+
+'''
+
+
+# the circuit each worker process reuses, set by init_worker
+worker_circuit=None
+
+
+def find_pulse_files(pattern: str) -> list[str]:
+    '''
+    Finds the pulse sequence files to run. If pattern is a directory, every
+    .in file inside it is used, else pattern is treated as a glob.
+
+    Parameters
+    ----------
+    pattern - a directory or glob pattern of pulse sequence files
+
+    Returns
+    -------
+    The paths of the pulse sequence files found, sorted by name.
+    '''
+    if os.path.isdir(pattern):
+        pattern=os.path.join(pattern,'*.in')
+    return sorted(glob.glob(pattern))
+
+
+def init_worker(circuit: LaserCircuit) -> None:
+    '''
+    Stores circuit as the circuit this worker process runs every pulse
+    sequence file against.
+
+    Parameters
+    ----------
+    circuit - the circuit to reuse
+    '''
+    global worker_circuit
+    worker_circuit=circuit
+
+
+def run_pulse_file(path: str) -> tuple[str, str]:
+    '''
+    Resets the worker's circuit, sets its pulse sequence from the file at
+    path and solves it. The output of setting the pulse sequence is hidden.
+
+    Parameters
+    ----------
+    path - the path of the pulse sequence file to run
+
+    Returns
+    -------
+    A tuple of path and the results for it. The results have a line for each
+    activated receiver in order of activation time, in the format
+    <symbol>: <activation_time>ns, <total_energy>eV (<photons_absorbed>)
+    or an error message if the file could not be read.
+    '''
+    # imported here since run imports this module for its -BATCH flag
+    from run import set_pulse_sequence
+    circuit=worker_circuit
+    circuit.reset()
+    try:
+        with open(path,'r') as f:
+            with contextlib.redirect_stdout(io.StringIO()):
+                set_pulse_sequence(circuit,f)
+    except OSError:
+        return path,f'Error: {path} could not be read\n'
+    circuit.solve()
+    output=''
+    for receiver in sorter.sort_receivers_by_activation_time(circuit.get_receivers()):
+        if receiver.is_activated():
+            output+=f'{receiver.symbol}: {receiver.get_activation_time()}ns, {receiver.get_total_energy():.2f}eV ({receiver.photons_absorbed})\n'
+    return path,output
+
+
+def run_batch(circuit: LaserCircuit, paths: list[str], processes: int | None = None) -> list[tuple[str, str]]:
+    '''
+    Runs every pulse sequence file in paths against circuit using a pool of
+    worker processes.
+
+    Parameters
+    ----------
+    circuit   - the circuit to run each pulse sequence file against
+    paths     - the paths of the pulse sequence files
+    processes - the number of worker processes, defaults to the number of
+                cores
+
+    Returns
+    -------
+    A list of (path, results) tuples in the same order as paths, where
+    results are as described in run_pulse_file.
+    '''
+    if len(paths)==0:
+        return []
+    if processes is None:
+        processes=os.cpu_count() or 1
+    # a few chunks per worker keeps them all busy without much messaging
+    chunksize=max(1,len(paths)//(processes*4))
+    with multiprocessing.Pool(processes,initializer=init_worker,initargs=(circuit,)) as pool:
+        return pool.map(run_pulse_file,paths,chunksize)
+
+
+def write_batch_results(results: list[tuple[str, str]], output_path: str = '/home/output/batch_results.out') -> None:
+    '''
+    Writes the results of run_batch into one output file, with each file's
+    results under a line containing its path.
+
+    Parameters
+    ----------
+    results     - the results returned by run_batch
+    output_path - the path of the file to write
+    '''
+    with open(output_path,'w') as f:
+        for path,output in results:
+            f.write(f'{path}:\n{output}\n')
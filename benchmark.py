@@ -0,0 +1,321 @@
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import sorter
+import input_parser
+from circuit_generator import generate_netlist, generate_circuit
+from photon import Photon
+from emitter import Emitter
+from receiver import Receiver
+from laser_circuit import LaserCircuit
+
+'''
+
+benchmark - Measures the performance of the circuit simulation. Running this
+module prints the results of each benchmark. Running it with -SUITE [path]
+instead runs run_suite on generated circuits of each size in SUITE_CIRCUITS
+and writes the results as JSON to path (benchmark_results.json by default),
+so results can be compared between versions.
+
+'''
+
+
+# the circuits run_suite is run on, as arguments to generate_circuit
+SUITE_CIRCUITS={
+    'small':{'width':50,'height':30,'emitters':10,'receivers':10,'mirror_density':0.02},
+    'medium':{'width':200,'height':100,'emitters':100,'receivers':200,'mirror_density':0.02},
+    'large':{'width':1000,'height':500,'emitters':1000,'receivers':2000,'mirror_density':0.01},
+}
+
+
+class DictPhoton:
+    '''
+    A photon laid out the way Photon was before it used __slots__, with every
+    attribute (including its symbol) stored in a per-instance __dict__ and its
+    direction stored as a string. Only used to compare memory use against.
+    '''
+
+
+    def __init__(self, x: int, y: int, frequency: int, direction: str):
+        self.symbol='.'
+        self.x=x
+        self.y=y
+        self.frequency=frequency
+        self.direction=direction
+        self.absorbed=False
+        self.looping=False
+        self.mirror_states=None
+
+
+def measure_bytes_per_photon(photon_class: type, count: int) -> float:
+    '''
+    Creates count photons of photon_class and measures how much memory they
+    take up, not counting the list holding them.
+
+    Parameters
+    ----------
+    photon_class - the class of photon to create
+    count        - the number of photons to create
+
+    Returns
+    -------
+    The average number of bytes allocated per photon.
+    '''
+    photons=[None]*count
+    tracemalloc.start()
+    before=tracemalloc.get_traced_memory()[0]
+    i=0
+    while i<count:
+        photons[i]=photon_class(i%100,i%50,100+i%400,'NESW'[i%4])
+        i+=1
+    after=tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after-before)/count
+
+
+def benchmark_photon_memory(count: int = 100000) -> dict[str, float]:
+    '''
+    Compares the bytes per photon of Photon against DictPhoton.
+
+    Parameters
+    ----------
+    count - the number of photons to create of each class
+
+    Returns
+    -------
+    A dict with the bytes per photon of each class and the reduction.
+    '''
+    dict_bytes=measure_bytes_per_photon(DictPhoton,count)
+    slots_bytes=measure_bytes_per_photon(Photon,count)
+    return {'dict_bytes_per_photon':dict_bytes,
+            'slots_bytes_per_photon':slots_bytes,
+            'reduction':1-slots_bytes/dict_bytes}
+
+
+def build_benchmark_circuit(width: int = 200, height: int = 100) -> LaserCircuit:
+    '''
+    Builds a circuit with an emitter on each of the first 26 rows of the left
+    column, each firing east at a receiver at the other end of its row.
+
+    Parameters
+    ----------
+    width  - the width of the circuit board
+    height - the height of the circuit board, at least 26
+
+    Returns
+    -------
+    The circuit, with every emitter's pulse sequence set.
+    '''
+    circuit=LaserCircuit(width,height)
+    i=0
+    while i<26:
+        emitter=Emitter(chr(ord('A')+i),0,i)
+        circuit.add_emitter(emitter)
+        circuit.add_receiver(Receiver(f'R{i}',width-1,i))
+        emitter.set_pulse_sequence(100+i,'E')
+        i+=1
+    return circuit
+
+
+def benchmark_run_throughput(engine: str = 'tick', frame_interval: int | None = 5, repeats: int = 3) -> dict[str, float]:
+    '''
+    Times run_circuit on build_benchmark_circuit, with its output written to
+    os.devnull so the cost of formatting frames is included but not the
+    speed of a terminal.
+
+    Parameters
+    ----------
+    engine         - the engine passed to run_circuit
+    frame_interval - the frame interval passed to run_circuit, None for a
+                     headless run
+    repeats        - the number of runs to take the fastest of
+
+    Returns
+    -------
+    A dict with the fastest run time in seconds, and the simulated
+    nanoseconds and photon moves per second of wall time.
+    '''
+    best=None
+    clock=0
+    moves=0
+    i=0
+    while i<repeats:
+        circuit=build_benchmark_circuit()
+        with open(os.devnull,'w') as devnull:
+            with contextlib.redirect_stdout(devnull):
+                start=time.perf_counter()
+                circuit.run_circuit(engine,frame_interval)
+                elapsed=time.perf_counter()-start
+        if best is None or elapsed<best:
+            best=elapsed
+        clock=circuit.clock
+        moves=clock*len(circuit.get_photons())
+        i+=1
+    return {'seconds':best,
+            'ns_per_second':clock/best,
+            'photon_moves_per_second':moves/best}
+
+
+def best_time(function, repeats: int) -> float:
+    '''
+    Calls function repeats times and returns the fastest time it took in
+    seconds.
+    '''
+    best=None
+    i=0
+    while i<repeats:
+        start=time.perf_counter()
+        function()
+        elapsed=time.perf_counter()-start
+        if best is None or elapsed<best:
+            best=elapsed
+        i+=1
+    return best
+
+
+def benchmark_parsing(netlist: str, repeats: int) -> float:
+    '''
+    Returns the fastest time taken to check every component line of netlist
+    with input_parser.
+    '''
+    lines=netlist.splitlines()
+    parsers={'EMITTERS':input_parser.parse_emitter,
+             'RECEIVERS':input_parser.parse_receiver,
+             'MIRRORS':input_parser.parse_mirror,
+             'PULSES':input_parser.parse_pulse_sequence}
+    parsed_lines=[]
+    parser=None
+    for line in lines[1:]:
+        if line in parsers:
+            parser=parsers[line]
+        elif line[:4]=='END ':
+            parser=None
+        else:
+            parsed_lines.append((parser,line))
+    def parse() -> None:
+        for parser,line in parsed_lines:
+            parser(line)
+    return best_time(parse,repeats)
+
+
+def benchmark_tick(config: dict, seed: int, repeats: int) -> tuple[float, int]:
+    '''
+    Returns the fastest time taken to emit photons and tick a generated
+    circuit until it finishes, along with the number of ticks taken.
+    '''
+    best=None
+    ticks=0
+    i=0
+    while i<repeats:
+        circuit=generate_circuit(seed=seed,**config)
+        start=time.perf_counter()
+        circuit.emit_photons()
+        while not circuit.is_finished():
+            circuit.tick()
+        elapsed=time.perf_counter()-start
+        if best is None or elapsed<best:
+            best=elapsed
+        ticks=circuit.clock
+        i+=1
+    return best,ticks
+
+
+def benchmark_run_circuit(config: dict, seed: int, repeats: int) -> float:
+    '''
+    Returns the fastest time taken by run_circuit on a generated circuit,
+    with its output written to os.devnull.
+    '''
+    best=None
+    i=0
+    while i<repeats:
+        circuit=generate_circuit(seed=seed,**config)
+        with open(os.devnull,'w') as devnull:
+            with contextlib.redirect_stdout(devnull):
+                start=time.perf_counter()
+                circuit.run_circuit()
+                elapsed=time.perf_counter()-start
+        if best is None or elapsed<best:
+            best=elapsed
+        i+=1
+    return best
+
+
+def benchmark_sorting(config: dict, seed: int, repeats: int) -> float:
+    '''
+    Returns the fastest time taken by the three sorter functions on the
+    receivers of a generated circuit after it has been solved.
+    '''
+    circuit=generate_circuit(seed=seed,**config)
+    circuit.solve()
+    receivers=circuit.get_receivers()
+    def sort() -> None:
+        sorter.sort_receivers_by_symbol(receivers)
+        sorter.sort_receivers_by_activation_time(receivers)
+        sorter.sort_receivers_by_total_energy(receivers)
+    return best_time(sort,repeats)
+
+
+def run_suite(circuits: dict[str, dict] = SUITE_CIRCUITS, seed: int = 0, repeats: int = 3) -> dict:
+    '''
+    Times parsing, tick, run_circuit and sorting separately on a generated
+    circuit of each size in circuits. Every time is the fastest of repeats
+    runs, in seconds.
+
+    Parameters
+    ----------
+    circuits - the arguments to generate_circuit for each named circuit
+    seed     - the seed every circuit is generated with
+    repeats  - the number of times each benchmark is run
+
+    Returns
+    -------
+    A dict of the results, along with the Python version and platform they
+    were measured on.
+    '''
+    results={}
+    for name,config in circuits.items():
+        netlist=generate_netlist(seed=seed,**config)
+        tick_seconds,ticks=benchmark_tick(config,seed,repeats)
+        results[name]={'circuit':config,
+                       'parse_seconds':benchmark_parsing(netlist,repeats),
+                       'tick_seconds':tick_seconds,
+                       'ticks':ticks,
+                       'run_circuit_seconds':benchmark_run_circuit(config,seed,repeats),
+                       'sort_seconds':benchmark_sorting(config,seed,repeats)}
+    return {'python':platform.python_version(),
+            'platform':platform.platform(),
+            'seed':seed,
+            'repeats':repeats,
+            'time':time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results':results}
+
+
+def print_suite(suite: dict) -> None:
+    '''Prints the results of run_suite, in milliseconds.'''
+    for name,result in suite['results'].items():
+        print(f"{name}: parse {result['parse_seconds']*1000:.1f} ms, tick {result['tick_seconds']*1000:.1f} ms ({result['ticks']} ticks), run_circuit {result['run_circuit_seconds']*1000:.1f} ms, sort {result['sort_seconds']*1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    if '-SUITE' in sys.argv:
+        index=sys.argv.index('-SUITE')
+        path=sys.argv[index+1] if index+1<len(sys.argv) else 'benchmark_results.json'
+        suite=run_suite()
+        with open(path,'w') as f:
+            json.dump(suite,f,indent=2)
+        print_suite(suite)
+        print(f'Results written to {path}')
+    else:
+        results=benchmark_photon_memory()
+        print('Photon memory:')
+        print(f"  __dict__ photon: {results['dict_bytes_per_photon']:.1f} bytes")
+        print(f"  __slots__ photon: {results['slots_bytes_per_photon']:.1f} bytes")
+        print(f"  reduction: {results['reduction']*100:.1f}%")
+        print('Run throughput:')
+        for label,frame_interval in [('every 5ns',5),('final frame only',0),('headless',None)]:
+            results=benchmark_run_throughput('tick',frame_interval)
+            print(f"  {label}: {results['seconds']*1000:.1f} ms, {results['photon_moves_per_second']:.0f} photon moves/s")
@@ -1,3 +1,4 @@
+import sys
 from emitter import Emitter
 from receiver import Receiver
 from photon import Photon
@@ -8,6 +9,16 @@ BoardDisplayer - A helper class used to display the circuit board.
 Each time a component is added to the circuit, this board is updated to 
 store the component's symbol in its assigned position on the board.
 
+Every printed row is cached as a string. Writing to a cell marks its row as
+dirty, and print_board only rebuilds the dirty rows before writing the whole
+frame to stdout at once.
+
+Every cell is one character wide, so a component is drawn as the last
+character of its symbol. Components with longer symbols can look the same:
+receivers 'R2', 'R12' and 'R102' are all drawn as '2', and emitters 'B' and
+'AB' are both drawn as 'B'. Use the printed activation times and energies,
+which show whole symbols, to tell them apart.
+
 '''
 
 
@@ -20,12 +31,16 @@ class BoardDisplayer:
         which is the size of the circuit board. board should be 
         initialised to the return value of the create_board method.
 
-        width:  int             - the width of this board
-        height: int             - the height of this board
-        board:  list[list[str]] - a list of list of strings representing the 
-                                  circuit board, having the symbol of each 
-                                  component and photon in the circuit at its 
-                                  assigned position
+        width:      int             - the width of this board
+        height:     int             - the height of this board
+        board:      list[list[str]] - a list of list of strings representing
+                                      the circuit board, having the symbol of
+                                      each component and photon in the
+                                      circuit at its assigned position
+        rows:       list[str]       - each row of board as printed, including
+                                      its border
+        dirty_rows: set[int]        - indexes of rows changed since rows was
+                                      last rebuilt
 
         Parameters
         ----------
@@ -35,6 +50,8 @@ class BoardDisplayer:
         self.width=width
         self.height=height
         self.board=self.create_board()
+        self.rows=['|'+' '*width+'|']*height
+        self.dirty_rows=set()
 
 
     def create_board(self) -> list[list[str]]:
@@ -70,6 +87,44 @@ class BoardDisplayer:
                 j+=1
             i+=1
         return board
+
+
+    def get_cell(self, x: int, y: int) -> str:
+        '''Returns the symbol on the board at (x, y).'''
+        return self.board[y][x]
+
+
+    def set_cell(self, x: int, y: int, symbol: str) -> None:
+        '''
+        Sets the symbol on the board at (x, y), marking its row as dirty so it
+        is rebuilt the next time the board is printed.
+
+        Parameters
+        ----------
+        x      - the x position of the cell
+        y      - the y position of the cell
+        symbol - the single character to store in the cell
+        '''
+        self.board[y][x]=symbol
+        self.dirty_rows.add(y)
+
+
+    def get_photon_cells(self) -> list[tuple[int, int]]:
+        '''Returns the (x, y) position of every cell showing a photon's symbol.'''
+        cells=[]
+        y=0
+        while y<self.height:
+            row=self.board[y]
+            if Photon.symbol in row:
+                x=0
+                while x<self.width:
+                    if row[x]==Photon.symbol:
+                        cells.append((x,y))
+                    x+=1
+            y+=1
+        return cells
+
+
     def add_component_to_board(self, component: Emitter | Receiver | Mirror) -> None:
         '''
         Adds the symbol of the component on the board at its assigned 
@@ -79,6 +134,10 @@ class BoardDisplayer:
         ----------
         component: the component to add its symbol on the board
 
+        Each cell only holds one character, so if the component's symbol is
+        longer (e.g. emitter 'AB' or receiver 'R12') only its last character
+        is shown.
+
         Hint
         ----------
         You shouldn't need to care what type of component you are adding,
@@ -101,7 +160,7 @@ class BoardDisplayer:
          [' ', ' ', ' ']
         ]      
         '''
-        self.board[component.get_y()][component.get_x()]=component.get_symbol() 
+        self.set_cell(component.get_x(),component.get_y(),component.get_symbol()[-1])
         return self.board
 
 
@@ -117,7 +176,7 @@ class BoardDisplayer:
         photon: the photon to add its symbol on the board
         '''
         if self.board[photon.get_y()][photon.get_x()]==' ':
-            self.board[photon.get_y()][photon.get_x()]=photon.get_symbol()
+            self.set_cell(photon.get_x(),photon.get_y(),photon.get_symbol())
 
     def print_board(self) -> None:
         '''
@@ -168,18 +227,8 @@ class BoardDisplayer:
         |B......1|
         +--------+
         '''
-        print('+'+'-'*self.width+'+')
-        i=0
-        while i<len(self.board):
-            row='|'
-            j=0
-            while j<len(self.board[0]):
-                row=row+self.board[i][j]
-                j+=1
-            row=row+'|'
-            print(row)
-            i+=1
-        print('+'+'-'*self.width+'+')
-        return
-        
-           
+        for i in self.dirty_rows:
+            self.rows[i]='|'+''.join(self.board[i])+'|'
+        self.dirty_rows.clear()
+        border='+'+'-'*self.width+'+'
+        sys.stdout.write(border+'\n'+'\n'.join(self.rows)+('\n' if self.height>0 else '')+border+'\n')
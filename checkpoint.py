@@ -0,0 +1,464 @@
+import os
+import struct
+import threading
+import time
+from emitter import Emitter
+from receiver import Receiver
+from photon import Photon, DIRECTIONS, DIRECTION_CODES
+from mirror import Mirror
+from laser_circuit import LaserCircuit
+
+'''
+
+checkpoint - Saves the state of a LaserCircuit part way through a run to a
+compact binary file, and rebuilds the circuit from it so the run can be
+resumed with run_circuit(resume=True).
+
+A checkpoint is the layout of the circuit (its size, emitters with their
+pulse sequences, receivers and mirrors), followed by the state that changes
+while it runs: the clock, the pulses still to be fired, every receiver's
+energy, count and activation time, the looping photons and the photons still
+in flight (position, direction, frequency and, for photons in flight, the
+mirror states used to detect loops). Absorbed photons are not saved, and the
+photon paths drawn on the board are not saved either, since every pulse of
+an emitter follows the same path and they are redrawn from the components
+when the checkpoint is loaded.
+
+Every record is packed with struct in little endian order. Symbols are
+stored as a length followed by their UTF-8 bytes.
+
+A CheckpointWriter writes checkpoints periodically during a run. The layout
+cannot change while the circuit runs, so it is only packed for the first
+checkpoint. The state is packed on the tick thread, which is quick, and
+written to disk on a background thread, so a slow disk does not stall the
+run. Each checkpoint is written to a temporary file which then replaces the
+last one, so a crash while writing never leaves a broken checkpoint behind.
+
+'''
+
+
+MAGIC=b'LCKP'
+VERSION=2
+
+# the default number of seconds between checkpoints written by a
+# CheckpointWriter
+CHECKPOINT_INTERVAL=60.0
+
+# magic, version, width, height, sparse board
+HEADER=struct.Struct('<4sHIIB')
+# emitters, receivers, mirrors
+LAYOUT_COUNTS=struct.Struct('<III')
+# clock, pending pulses, photons, pooled photons in flight, active photons
+STATE=struct.Struct('<qqIII')
+SYMBOL_LENGTH=struct.Struct('<H')
+# x, y, frequency, direction code, pulse sequence set, period, count
+EMITTER=struct.Struct('<IIqBBqq')
+# total energy, photons absorbed, activated, activation time
+RECEIVER=struct.Struct('<dqBq')
+# x, y
+POSITION=struct.Struct('<II')
+# x, y, frequency, direction code, looping, pooled, mirror states
+PHOTON=struct.Struct('<IIqBBBI')
+# x, y, direction code
+MIRROR_STATE=struct.Struct('<IIB')
+INDEX=struct.Struct('<I')
+
+
+def pack_symbol(symbol: str) -> bytes:
+    '''Returns symbol packed as its length followed by its UTF-8 bytes.'''
+    data=symbol.encode('utf-8')
+    return SYMBOL_LENGTH.pack(len(data))+data
+
+
+def unpack_symbol(data: bytes, offset: int) -> tuple[str, int]:
+    '''
+    Unpacks a symbol packed by pack_symbol.
+
+    Parameters
+    ----------
+    data   - the checkpoint
+    offset - the position of the symbol in data
+
+    Returns
+    -------
+    A tuple of the symbol and the position just after it.
+    '''
+    length,=SYMBOL_LENGTH.unpack_from(data,offset)
+    offset+=SYMBOL_LENGTH.size
+    return data[offset:offset+length].decode('utf-8'),offset+length
+
+
+def pack_layout(circuit: LaserCircuit) -> bytes:
+    '''
+    Packs the header and the layout of circuit, which do not change while it
+    runs.
+
+    Parameters
+    ----------
+    circuit - the circuit to save
+
+    Returns
+    -------
+    The start of a checkpoint, to be followed by pack_state.
+    '''
+    parts=[HEADER.pack(MAGIC,VERSION,circuit.get_width(),circuit.get_height(),circuit.sparse_board),
+           LAYOUT_COUNTS.pack(len(circuit.get_emitters()),len(circuit.get_receivers()),len(circuit.get_mirrors()))]
+    for emitter in circuit.get_emitters():
+        parts.append(pack_symbol(emitter.get_symbol()))
+        parts.append(EMITTER.pack(emitter.get_x(),emitter.get_y(),emitter.get_frequency(),
+                                  DIRECTION_CODES[emitter.get_direction()],emitter.is_pulse_sequence_set(),
+                                  emitter.get_pulse_period(),emitter.get_pulse_count()))
+    for receiver in circuit.get_receivers():
+        parts.append(pack_symbol(receiver.symbol))
+        parts.append(POSITION.pack(receiver.get_x(),receiver.get_y()))
+    for mirror in circuit.get_mirrors():
+        parts.append(pack_symbol(mirror.get_symbol()))
+        parts.append(POSITION.pack(mirror.get_x(),mirror.get_y()))
+    return b''.join(parts)
+
+
+def pack_state(circuit: LaserCircuit) -> bytes:
+    '''
+    Packs the state of circuit that changes while it runs. Absorbed photons,
+    including pooled photons given back to the pool, are left out, and
+    looping photons are saved without their mirror states since they never
+    move again.
+
+    Parameters
+    ----------
+    circuit - the circuit to save, which must not be part way through a run
+              of run_events or a VectorizedEngine
+
+    Returns
+    -------
+    The rest of a checkpoint, following pack_layout.
+    '''
+    photons=[photon for photon in circuit.get_photons() if not photon.is_absorbed()]
+    # pulse train photons in flight are not in photons until they loop
+    in_flight=[photon for photon in circuit.active_photons if photon.pooled and not photon.is_absorbed()]
+    active=[photon for photon in circuit.active_photons if not photon.is_absorbed() and not photon.is_looping()]
+    indexes={}
+    i=0
+    for photon in photons+in_flight:
+        indexes[id(photon)]=i
+        i+=1
+    parts=[STATE.pack(circuit.clock,circuit.pending_pulses,len(photons),len(in_flight),len(active))]
+    for receiver in circuit.get_receivers():
+        parts.append(RECEIVER.pack(receiver.get_total_energy(),receiver.photons_absorbed,
+                                   receiver.is_activated(),receiver.get_activation_time()))
+    for photon in photons+in_flight:
+        if photon.is_looping() or photon.mirror_states is None:
+            states=()
+        else:
+            states=photon.mirror_states
+        parts.append(PHOTON.pack(photon.x,photon.y,photon.frequency,photon.direction_code,
+                                 photon.looping,photon.pooled,len(states)))
+        for x,y,direction_code in states:
+            parts.append(MIRROR_STATE.pack(x,y,direction_code))
+    for photon in active:
+        parts.append(INDEX.pack(indexes[id(photon)]))
+    return b''.join(parts)
+
+
+def dumps(circuit: LaserCircuit, layout: bytes | None = None) -> bytes:
+    '''
+    Packs the state of circuit into a checkpoint.
+
+    Parameters
+    ----------
+    circuit - the circuit to save, which must not be part way through a run
+              of run_events or a VectorizedEngine
+    layout  - the layout of circuit already packed by pack_layout, or None
+              to pack it now
+
+    Returns
+    -------
+    The checkpoint as bytes.
+    '''
+    if layout is None:
+        layout=pack_layout(circuit)
+    return layout+pack_state(circuit)
+
+
+def draw_paths(circuit: LaserCircuit) -> None:
+    '''
+    Draws the path of every photon emitted so far onto the board of
+    circuit, as tick would have. Every pulse of an emitter follows the same
+    path, and the first pulse is fired at 0ns, so it has travelled the
+    furthest and only its path needs to be drawn, for clock nanoseconds.
+
+    Parameters
+    ----------
+    circuit - the circuit being restored, with its clock set
+    '''
+    board_displayer=circuit.board_displayer
+    for emitter in circuit.get_emitters():
+        x=emitter.get_x()
+        y=emitter.get_y()
+        trajectory=circuit.get_trajectory(x,y,emitter.get_direction())
+        remaining=circuit.clock
+        for stop_x,stop_y in trajectory[5]:
+            while (x,y)!=(stop_x,stop_y) and remaining>0:
+                x+=(stop_x>x)-(stop_x<x)
+                y+=(stop_y>y)-(stop_y<y)
+                if board_displayer.get_cell(x,y)==' ':
+                    board_displayer.set_cell(x,y,Photon.symbol)
+                remaining-=1
+            if remaining==0:
+                break
+
+
+def loads(data: bytes) -> LaserCircuit:
+    '''
+    Rebuilds a circuit from a checkpoint packed by dumps.
+
+    Parameters
+    ----------
+    data - the checkpoint
+
+    Returns
+    -------
+    A new circuit in the same state as the one saved, ready to be resumed.
+
+    Raises
+    ------
+    ValueError if data is not a checkpoint, or is cut short.
+    '''
+    try:
+        magic,version,width,height,sparse_board=HEADER.unpack_from(data,0)
+        if magic!=MAGIC:
+            raise ValueError('not a checkpoint')
+        if version!=VERSION:
+            raise ValueError(f'unsupported checkpoint version {version}')
+        offset=HEADER.size
+        emitter_count,receiver_count,mirror_count=LAYOUT_COUNTS.unpack_from(data,offset)
+        offset+=LAYOUT_COUNTS.size
+        circuit=LaserCircuit(width,height,bool(sparse_board))
+        emitters=[]
+        i=0
+        while i<emitter_count:
+            symbol,offset=unpack_symbol(data,offset)
+            x,y,frequency,direction_code,pulse_set,period,count=EMITTER.unpack_from(data,offset)
+            offset+=EMITTER.size
+            emitter=Emitter(symbol,x,y)
+            if pulse_set:
+                emitter.set_pulse_sequence(frequency,DIRECTIONS[direction_code],period,count)
+            emitters.append(emitter)
+            i+=1
+        receivers=[]
+        i=0
+        while i<receiver_count:
+            symbol,offset=unpack_symbol(data,offset)
+            x,y=POSITION.unpack_from(data,offset)
+            offset+=POSITION.size
+            receivers.append(Receiver(symbol,x,y))
+            i+=1
+        mirrors=[]
+        i=0
+        while i<mirror_count:
+            symbol,offset=unpack_symbol(data,offset)
+            x,y=POSITION.unpack_from(data,offset)
+            offset+=POSITION.size
+            mirrors.append(Mirror(symbol,x,y))
+            i+=1
+        circuit.add_emitters(emitters)
+        circuit.add_receivers(receivers)
+        circuit.add_mirrors(mirrors)
+        # photons were emitted before the checkpoint, which sets pulse_trains
+        circuit.pulse_trains=[emitter for emitter in circuit.get_emitters() if emitter.get_pulse_count()>1]
+
+        clock,pending_pulses,photon_count,in_flight_count,active_count=STATE.unpack_from(data,offset)
+        offset+=STATE.size
+        # receiver totals are saved in the order of the circuit's receivers
+        for receiver in circuit.get_receivers():
+            total_energy,photons_absorbed,activated,activation_time=RECEIVER.unpack_from(data,offset)
+            offset+=RECEIVER.size
+            receiver.total_energy=total_energy
+            receiver.photons_absorbed=photons_absorbed
+            receiver.activated=bool(activated)
+            receiver.activation_time=activation_time
+            if receiver.is_activated():
+                circuit.activated_receivers+=1
+        photons=[]
+        i=0
+        while i<photon_count+in_flight_count:
+            x,y,frequency,direction_code,looping,pooled,state_count=PHOTON.unpack_from(data,offset)
+            offset+=PHOTON.size
+            if i<photon_count:
+                photon=Photon(x,y,frequency,DIRECTIONS[direction_code])
+                photon.pooled=bool(pooled)
+                circuit.photons.append(photon)
+            else:
+                photon=circuit.photon_pool.acquire(x,y,frequency,DIRECTIONS[direction_code])
+            photon.looping=bool(looping)
+            if state_count>0:
+                photon.mirror_states=set()
+                j=0
+                while j<state_count:
+                    photon.mirror_states.add(MIRROR_STATE.unpack_from(data,offset))
+                    offset+=MIRROR_STATE.size
+                    j+=1
+            photons.append(photon)
+            i+=1
+        i=0
+        while i<active_count:
+            index,=INDEX.unpack_from(data,offset)
+            offset+=INDEX.size
+            circuit.active_photons.append(photons[index])
+            circuit.live_photons+=1
+            i+=1
+    except (struct.error,IndexError,UnicodeDecodeError,KeyError):
+        raise ValueError('checkpoint is incomplete or corrupt')
+    circuit.clock=clock
+    circuit.pending_pulses=pending_pulses
+    draw_paths(circuit)
+    return circuit
+
+
+def save(circuit: LaserCircuit, path: str) -> None:
+    '''
+    Writes a checkpoint of circuit to path. See write_checkpoint.
+
+    Parameters
+    ----------
+    circuit - the circuit to save
+    path    - the path of the checkpoint file
+    '''
+    write_checkpoint(dumps(circuit),path)
+
+
+def write_checkpoint(data: bytes, path: str) -> None:
+    '''
+    Writes a packed checkpoint to a temporary file next to path, then
+    replaces path with it, so path always holds a whole checkpoint.
+
+    Parameters
+    ----------
+    data - the checkpoint returned by dumps
+    path - the path of the checkpoint file
+    '''
+    temporary=path+'.tmp'
+    with open(temporary,'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary,path)
+
+
+def load(path: str) -> LaserCircuit:
+    '''
+    Rebuilds the circuit saved in the checkpoint file at path.
+
+    Parameters
+    ----------
+    path - the path of the checkpoint file
+
+    Returns
+    -------
+    The circuit, see loads.
+
+    Raises
+    ------
+    OSError if path could not be read, or ValueError if it is not a valid
+    checkpoint.
+    '''
+    with open(path,'rb') as f:
+        return loads(f.read())
+
+
+class CheckpointWriter:
+
+
+    def __init__(self, path: str, interval: float = CHECKPOINT_INTERVAL):
+        '''
+        Initialises a CheckpointWriter, which run_circuit calls after every
+        tick to save the circuit to path once interval seconds have passed
+        since the last checkpoint.
+
+        path:     str                     - the path of the checkpoint file
+        interval: float                   - the number of seconds between
+                                            checkpoints
+        due:      float                   - the time.monotonic() time when
+                                            the next checkpoint is due
+        thread:   threading.Thread | None - the thread writing the last
+                                            checkpoint
+        written:  int                     - the number of checkpoints written
+        layout:   bytes | None            - the layout of the circuit being
+                                            run, packed by the first
+                                            checkpoint
+        error:    OSError | None          - the last error writing a
+                                            checkpoint
+
+        Parameters
+        ----------
+        path     - the path of the checkpoint file
+        interval - the number of seconds between checkpoints
+        '''
+        self.path=path
+        self.interval=interval
+        self.due=time.monotonic()+interval
+        self.thread=None
+        self.written=0
+        self.layout=None
+        self.error=None
+
+
+    def after_tick(self, circuit: LaserCircuit) -> None:
+        '''
+        Saves circuit if a checkpoint is due. If the last checkpoint is still
+        being written, this one is skipped rather than waiting for it, and
+        the next tick tries again.
+
+        Parameters
+        ----------
+        circuit - the circuit being run
+        '''
+        if time.monotonic()<self.due:
+            return
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.write(circuit)
+
+
+    def write(self, circuit: LaserCircuit) -> None:
+        '''
+        Packs circuit now and writes it on a background thread, after any
+        checkpoint still being written.
+
+        Parameters
+        ----------
+        circuit - the circuit to save
+        '''
+        if self.layout is None:
+            self.layout=pack_layout(circuit)
+        data=dumps(circuit,self.layout)
+        self.wait()
+        self.thread=threading.Thread(target=self.write_in_background,args=(data,),daemon=True)
+        self.thread.start()
+        self.due=time.monotonic()+self.interval
+
+
+    def write_in_background(self, data: bytes) -> None:
+        '''Writes data to path, keeping any error to be reported by close.'''
+        try:
+            write_checkpoint(data,self.path)
+            self.written+=1
+        except OSError as error:
+            self.error=error
+
+
+    def wait(self) -> None:
+        '''Waits for the checkpoint being written, if there is one.'''
+        if self.thread is not None:
+            self.thread.join()
+            self.thread=None
+
+
+    def close(self) -> None:
+        '''
+        Waits for the last checkpoint to be written, printing an error if any
+        checkpoint could not be written.
+        '''
+        self.wait()
+        if self.error is not None:
+            print(f'Error: checkpoint could not be written to {self.path}')
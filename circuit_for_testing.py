@@ -1,5 +1,6 @@
 from emitter import Emitter
 from receiver import Receiver
+from mirror import Mirror
 from laser_circuit import LaserCircuit
 
 '''
@@ -18,3 +19,32 @@ def get_my_lasercircuit() :
     circuit.add_receiver(Receiver("R1", 15, 2))
     circuit.add_receiver(Receiver("R2", 6, 1))
     return circuit
+
+
+def get_my_looping_lasercircuit() :
+    circuit = LaserCircuit(10, 8)
+    circuit.add_emitter(Emitter("A", 3, 1))
+    circuit.add_emitter(Emitter("B", 0, 7))
+    circuit.add_receiver(Receiver("R0", 9, 7))
+    circuit.add_mirror(Mirror("\\", 5, 1))
+    circuit.add_mirror(Mirror("/", 5, 5))
+    circuit.add_mirror(Mirror("\\", 2, 5))
+    circuit.add_mirror(Mirror("/", 2, 1))
+    return circuit
+
+
+def get_my_double_looping_lasercircuit() :
+    circuit = LaserCircuit(20, 10)
+    circuit.add_emitter(Emitter("A", 3, 1))
+    circuit.add_emitter(Emitter("B", 12, 1))
+    # a small loop around A and a larger one around B, so their photons
+    # start looping at different times
+    circuit.add_mirror(Mirror("\\", 5, 1))
+    circuit.add_mirror(Mirror("/", 5, 3))
+    circuit.add_mirror(Mirror("\\", 2, 3))
+    circuit.add_mirror(Mirror("/", 2, 1))
+    circuit.add_mirror(Mirror("\\", 18, 1))
+    circuit.add_mirror(Mirror("/", 18, 8))
+    circuit.add_mirror(Mirror("\\", 10, 8))
+    circuit.add_mirror(Mirror("/", 10, 1))
+    return circuit
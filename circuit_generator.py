@@ -0,0 +1,79 @@
+import contextlib
+import io
+import random
+from emitter import Emitter
+from mirror import REFLECTIONS
+from laser_circuit import LaserCircuit
+from netlist_loader import load_netlist
+
+'''
+
+circuit_generator - Generates random circuits for benchmarking. Circuits are
+generated as netlists (see netlist_loader), so the same circuit can be saved,
+parsed or built. The same arguments and seed always give the same circuit.
+
+'''
+
+
+def generate_netlist(width: int, height: int, emitters: int, receivers: int, mirror_density: float, seed: int = 0) -> str:
+    '''
+    Generates the netlist of a random circuit. Every component is placed on
+    its own cell, and every emitter is given a pulse sequence with a random
+    frequency and direction.
+
+    Parameters
+    ----------
+    width          - the width of the circuit board
+    height         - the height of the circuit board
+    emitters       - the number of emitters
+    receivers      - the number of receivers
+    mirror_density - the fraction of the board's cells holding a mirror
+    seed           - the seed of the random number generator
+
+    Returns
+    -------
+    The netlist as a string.
+    '''
+    rng=random.Random(seed)
+    mirrors=int(width*height*mirror_density)
+    count=emitters+receivers+mirrors
+    if count>width*height:
+        raise ValueError(f'{count} components do not fit on a {width}x{height} circuit board')
+    cells=rng.sample(range(width*height),count)
+    mirror_symbols=list(REFLECTIONS)
+    lines=[f'SIZE {width} {height}','EMITTERS']
+    i=0
+    while i<emitters:
+        lines.append(f'{Emitter.id_to_symbol(i)} {cells[i]%width} {cells[i]//width}')
+        i+=1
+    lines+=['END EMITTERS','RECEIVERS']
+    i=0
+    while i<receivers:
+        cell=cells[emitters+i]
+        lines.append(f'R{i} {cell%width} {cell//width}')
+        i+=1
+    lines+=['END RECEIVERS','MIRRORS']
+    for cell in cells[emitters+receivers:]:
+        lines.append(f'{rng.choice(mirror_symbols)} {cell%width} {cell//width}')
+    lines+=['END MIRRORS','PULSES']
+    i=0
+    while i<emitters:
+        lines.append(f'{Emitter.id_to_symbol(i)} {rng.randint(100,500)} {rng.choice("NESW")}')
+        i+=1
+    lines.append('END PULSES')
+    return '\n'.join(lines)+'\n'
+
+
+def generate_circuit(width: int, height: int, emitters: int, receivers: int, mirror_density: float, seed: int = 0) -> LaserCircuit:
+    '''
+    Builds the circuit of generate_netlist, with every emitter's pulse
+    sequence set. Parameters are the same as generate_netlist.
+
+    Returns
+    -------
+    The generated circuit.
+    '''
+    netlist=generate_netlist(width,height,emitters,receivers,mirror_density,seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        circuit,has_pulses=load_netlist(io.StringIO(netlist))
+    return circuit
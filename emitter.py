@@ -10,6 +10,9 @@ pulse  sequence.
 
 class Emitter:
 
+    __slots__=('symbol','id','x','y','frequency','direction','pulse_sequence_set','pulse_period','pulse_count')
+    component_type='emitter'
+
 
     def __init__(self, symbol: str, x: int, y: int):
         '''
@@ -17,8 +20,14 @@ class Emitter:
         component_type is 'emitter', frequency is 0 and direction is None by 
         default.
 
-        component_type:     str  - represents the type of component ('emitter')
-        symbol:             str  - the symbol of this emitter ('A' to 'J')
+        component_type:     str  - represents the type of component ('emitter'),
+                                   shared by every emitter
+        symbol:             str  - the symbol of this emitter, made of the
+                                   letters 'A' to 'Z' ('A', ..., 'Z', 'AA',
+                                   'AB', ...)
+        id:                 int  - the number this emitter's symbol stands for,
+                                   counting 'A' as 0, 'Z' as 25, 'AA' as 26 and
+                                   so on, used to order emitters
         x:                  int  - x position of this emitter
         y:                  int  - y position of this emitter
         frequency:          int  - the frequency (THz) of the photon this emitter 
@@ -27,6 +36,11 @@ class Emitter:
                                    emits will travel ('N', 'E', 'S' or 'W')
         pulse_sequence_set: bool - whether or not this emitter has been set by
                                    the pulse sequence
+        pulse_period:       int  - the number of nanoseconds between pulses
+                                   of a pulse train, 0 for a single pulse
+        pulse_count:        int  - the number of pulses this emitter fires,
+                                   the first at 0ns and then one every
+                                   pulse_period nanoseconds
 
         Parameters
         ----------
@@ -35,12 +49,68 @@ class Emitter:
         y      - the y position to set this emitter to
         '''
         self.symbol=symbol
+        self.id=Emitter.symbol_to_id(symbol)
         self.x=x
         self.y=y
-        self.component_type='emitter'
         self.frequency=0
         self.direction=None
         self.pulse_sequence_set= False
+        self.pulse_period=0
+        self.pulse_count=1
+
+
+    def symbol_to_id(symbol: str) -> int:
+        '''
+        Converts an emitter symbol into its id, reading the letters as a
+        number where 'A' to 'Z' are the digits, in the same way spreadsheet
+        columns are numbered.
+
+        >>> Emitter.symbol_to_id('A')
+        0
+        >>> Emitter.symbol_to_id('J')
+        9
+        >>> Emitter.symbol_to_id('AA')
+        26
+
+        Parameters
+        ----------
+        symbol - the emitter symbol to convert
+
+        Returns
+        -------
+        The id of the symbol.
+        '''
+        number=0
+        for letter in symbol:
+            number=number*26+ord(letter)-ord('A')+1
+        return number-1
+
+
+    def id_to_symbol(id: int) -> str:
+        '''
+        Converts an emitter id back into its symbol, the reverse of
+        symbol_to_id.
+
+        >>> Emitter.id_to_symbol(25)
+        'Z'
+        >>> Emitter.id_to_symbol(26)
+        'AA'
+
+        Parameters
+        ----------
+        id - the emitter id to convert
+
+        Returns
+        -------
+        The symbol with the given id.
+        '''
+        symbol=''
+        number=id+1
+        while number>0:
+            number-=1
+            symbol=chr(ord('A')+number%26)+symbol
+            number//=26
+        return symbol
 
 
     def emit_photon(self) -> Photon:
@@ -56,7 +126,7 @@ class Emitter:
         return Photon(self.x,self.y,self.frequency,self.direction)
 
 
-    def set_pulse_sequence(self, frequency: int, direction: str) -> None:
+    def set_pulse_sequence(self, frequency: int, direction: str, period: int = 0, count: int = 1) -> None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
         '''
         Sets the pulse sequence for this emitter, setting the frequency and
@@ -67,13 +137,22 @@ class Emitter:
         conditions are met, update frequency and direction, and update
         pulse_sequence_set, else no change occurs.
 
+        A pulse train is set by giving a period greater than zero and a count
+        greater than one, which makes this emitter fire count pulses, one
+        every period nanoseconds starting at 0ns. A train with an invalid
+        period or count is ignored.
+
         Parameters
         ----------
         frequency - the new frequency to set for this emitter 
         direction - the new direction to set for this emitter      
+        period    - the number of nanoseconds between pulses
+        count     - the number of pulses to fire
         '''
         if frequency<0:
             return
+        if count<1 or (count>1 and period<=0):
+            return
         check='NEWS'
         i=0
         while i< len(check):
@@ -81,6 +160,8 @@ class Emitter:
                 self.direction=direction
                 self.frequency=frequency
                 self.pulse_sequence_set=True
+                self.pulse_period=period if count>1 else 0
+                self.pulse_count=count
             i+=1
 
 
@@ -103,6 +184,16 @@ class Emitter:
         return self.direction
 
 
+    def get_pulse_period(self) -> int:
+        '''Returns pulse_period.'''
+        return self.pulse_period
+
+
+    def get_pulse_count(self) -> int:
+        '''Returns pulse_count.'''
+        return self.pulse_count
+
+
     def get_component_type(self) -> str:
         '''Returns component type.'''
         return self.component_type
@@ -112,6 +203,11 @@ class Emitter:
         '''Returns symbol.'''
         return self.symbol
 
+
+    def get_id(self) -> int:
+        '''Returns id.'''
+        return self.id
+
     
     def get_x(self) -> int:
         '''Returns x.'''
@@ -124,7 +220,7 @@ class Emitter:
 
     def __lt__(self, other) -> bool:
         if isinstance(other, Emitter):
-            return self.get_symbol() < other.get_symbol()
+            return self.get_id() < other.get_id()
         return False
         
     def __str__(self) -> str:
@@ -137,7 +233,8 @@ class Emitter:
         -------
         A string in the format <symbol>: <frequency>THz, <direction> 
         where <direction> is the full word of the direction e.g. if the 
-        direction attribute is 'S', <direction> is South.
+        direction attribute is 'S', <direction> is South. For a pulse train
+        this is followed by , <count> pulses every <period>ns.
 
         Example
         -------
@@ -160,4 +257,6 @@ class Emitter:
         if self.get_direction()=='E':
             full_direction='East'
         output=f'{self.get_symbol()}: {self.get_frequency()}THz, {full_direction}'
+        if self.pulse_count>1:
+            output+=f', {self.pulse_count} pulses every {self.pulse_period}ns'
         return output
@@ -0,0 +1,283 @@
+import struct
+import sys
+import sorter
+from photon import Photon
+
+'''
+
+event_trace - Records every photon move, reflection and absorption of a run
+to a binary event log, and replays the log to rebuild the board or receiver
+results at any time without simulating the circuit again.
+
+A trace starts with a header holding a checkpoint (see checkpoint) of the
+circuit when tracing started, followed by fixed width records in the order
+tick produced them:
+
+    time (ns), photon, x, y, frequency, kind, direction code
+
+where photon numbers each photon in the order it was first traced, and kind
+is one of the event kinds below. Records are packed into a buffer and
+written to disk a chunk at a time.
+
+A LaserCircuit traces to its tracer, which is a NullTracer by default whose
+enabled flag is False so tick records nothing. Only the 'tick' engine is
+traced. To replay a trace, use TraceReplay, or from the command line:
+
+    python event_trace.py <trace file> [time]
+
+'''
+
+
+MAGIC=b'LCTR'
+VERSION=1
+
+# kinds of events, a photon that leaves the board or is absorbed by a mirror
+# is recorded as LOST
+MOVE=0
+REFLECT=1
+ABSORB=2
+LOST=3
+LOOP=4
+EVENT_NAMES=('move','reflect','absorb','lost','loop')
+
+# magic, version, length of the checkpoint that follows
+HEADER=struct.Struct('<4sHI')
+# time, photon, x, y, frequency, kind, direction code
+RECORD=struct.Struct('<qIIIiBB')
+
+# the number of records buffered before they are written to disk
+CHUNK_RECORDS=65536
+
+
+class EventTrace:
+
+
+    enabled=True
+
+
+    def __init__(self, path: str):
+        '''
+        Initialises an EventTrace that writes to the file at path once it is
+        started by LaserCircuit.set_tracer.
+
+        path:       str                 - the path of the trace file
+        file_obj:   file | None         - the open trace file
+        buffer:     bytearray           - records waiting to be written
+        buffered:   int                 - the number of records in buffer
+        photon_ids: dict[int, int]      - the number of each photon being
+                                          traced, keyed by id(photon)
+        next_id:    int                 - the number of the next new photon
+        records:    int                 - the number of records traced
+
+        Parameters
+        ----------
+        path - the path of the trace file
+        '''
+        self.path=path
+        self.file_obj=None
+        self.buffer=bytearray(CHUNK_RECORDS*RECORD.size)
+        self.buffered=0
+        self.photon_ids={}
+        self.next_id=0
+        self.records=0
+
+
+    def start(self, circuit) -> None:
+        '''
+        Opens the trace file and writes its header, a checkpoint of circuit.
+
+        Parameters
+        ----------
+        circuit - the circuit being traced
+        '''
+        import checkpoint
+        data=checkpoint.dumps(circuit)
+        self.file_obj=open(self.path,'wb')
+        self.file_obj.write(HEADER.pack(MAGIC,VERSION,len(data)))
+        self.file_obj.write(data)
+
+
+    def record(self, kind: int, timestamp: int, photon) -> None:
+        '''
+        Records an event of photon at its current position and direction.
+        A photon that is absorbed or lost is forgotten, so a
+        pooled photon is given a new number when it is reused.
+
+        Parameters
+        ----------
+        kind      - the kind of event, e.g. MOVE
+        timestamp - the time in nanoseconds of the event
+        photon    - the photon the event happened to
+        '''
+        key=id(photon)
+        number=self.photon_ids.get(key)
+        if number is None:
+            number=self.next_id
+            self.next_id+=1
+            self.photon_ids[key]=number
+        if kind==ABSORB or kind==LOST:
+            del self.photon_ids[key]
+        RECORD.pack_into(self.buffer,self.buffered*RECORD.size,timestamp,number,photon.x,photon.y,
+                         photon.frequency,kind,photon.direction_code)
+        self.buffered+=1
+        self.records+=1
+        if self.buffered==CHUNK_RECORDS:
+            self.flush()
+
+
+    def flush(self) -> None:
+        '''Writes the buffered records to the trace file.'''
+        if self.file_obj is not None and self.buffered>0:
+            self.file_obj.write(memoryview(self.buffer)[:self.buffered*RECORD.size])
+        self.buffered=0
+
+
+    def close(self) -> None:
+        '''Writes any buffered records and closes the trace file.'''
+        self.flush()
+        if self.file_obj is not None:
+            self.file_obj.close()
+            self.file_obj=None
+
+
+class NullTracer:
+
+
+    enabled=False
+
+
+    def record(self, kind: int, timestamp: int, photon) -> None:
+        '''Does nothing.'''
+        pass
+
+
+    def close(self) -> None:
+        '''Does nothing.'''
+        pass
+
+
+class TraceReplay:
+
+
+    def __init__(self, path: str):
+        '''
+        Initialises a TraceReplay of the trace file at path.
+
+        path:   str - the path of the trace file
+        header: bytes - the checkpoint of the circuit when tracing started
+        start:  int   - the position of the first record in the file
+
+        Parameters
+        ----------
+        path - the path of the trace file
+
+        Raises
+        ------
+        OSError if path could not be read, or ValueError if it is not a
+        trace file.
+        '''
+        self.path=path
+        with open(path,'rb') as f:
+            data=f.read(HEADER.size)
+            if len(data)<HEADER.size:
+                raise ValueError('not a trace file')
+            magic,version,length=HEADER.unpack(data)
+            if magic!=MAGIC:
+                raise ValueError('not a trace file')
+            if version!=VERSION:
+                raise ValueError(f'unsupported trace version {version}')
+            self.header=f.read(length)
+            if len(self.header)<length:
+                raise ValueError('trace file is incomplete')
+        self.start=HEADER.size+length
+
+
+    def events(self):
+        '''
+        Yields each record of the trace in order as a tuple of time,
+        photon, x, y, frequency, kind and direction code. The file is read a
+        chunk at a time, and an incomplete record at its end is ignored.
+        '''
+        with open(self.path,'rb') as f:
+            f.seek(self.start)
+            while True:
+                chunk=f.read(CHUNK_RECORDS*RECORD.size)
+                whole=len(chunk)-len(chunk)%RECORD.size
+                if whole>0:
+                    yield from RECORD.iter_unpack(memoryview(chunk)[:whole])
+                if len(chunk)<CHUNK_RECORDS*RECORD.size:
+                    return
+
+
+    def replay(self, until: int | None = None):
+        '''
+        Rebuilds the circuit at time until by drawing every move on the board
+        and giving every absorption to its receiver, in the order they were
+        traced.
+
+        Parameters
+        ----------
+        until - the time in nanoseconds to replay up to and including, or
+                None for the whole trace
+
+        Returns
+        -------
+        The circuit restored from the header, with its board, receivers and
+        clock as they were at time until. Photons are not rebuilt.
+        '''
+        import checkpoint
+        circuit=checkpoint.loads(self.header)
+        board_displayer=circuit.board_displayer
+        receiver_positions=circuit.receiver_positions
+        for timestamp,photon,x,y,frequency,kind,direction_code in self.events():
+            if until is not None and timestamp>until:
+                break
+            circuit.clock=timestamp
+            if kind==MOVE:
+                if board_displayer.get_cell(x,y)==' ':
+                    board_displayer.set_cell(x,y,Photon.symbol)
+            elif kind==ABSORB:
+                receiver=receiver_positions[(x,y)]
+                if not receiver.is_activated():
+                    circuit.activated_receivers+=1
+                receiver.absorb_frequency(frequency,timestamp)
+        if until is not None:
+            circuit.clock=max(circuit.clock,until)
+        return circuit
+
+
+def print_replay(circuit) -> None:
+    '''
+    Prints a replayed circuit's board and the activation times and total
+    energy of its receivers, in the same format as run_circuit but without
+    writing any output files.
+
+    Parameters
+    ----------
+    circuit - the circuit returned by TraceReplay.replay
+    '''
+    print(f'{circuit.clock}ns: {circuit.activated_receivers}/{len(circuit.get_receivers())} receiver(s) activated.')
+    circuit.print_board()
+    print()
+    activated=[receiver for receiver in circuit.get_receivers() if receiver.is_activated()]
+    print('Activation times:')
+    for receiver in sorter.sort_receivers_by_activation_time(activated):
+        print(f'{receiver.symbol}: {receiver.get_activation_time()}ns')
+    print()
+    print('Total energy absorbed:')
+    for receiver in sorter.sort_receivers_by_total_energy(activated):
+        print(f'{receiver.symbol}: {receiver.get_total_energy():.2f}eV ({receiver.photons_absorbed})')
+    print()
+
+
+if __name__ == '__main__':
+    if len(sys.argv)<2 or (len(sys.argv)>2 and not sys.argv[2].isdigit()):
+        print('Error: usage is python event_trace.py <trace file> [time]')
+    else:
+        try:
+            replay=TraceReplay(sys.argv[1])
+            print_replay(replay.replay(int(sys.argv[2]) if len(sys.argv)>2 else None))
+        except OSError:
+            print(f'Error: {sys.argv[1]} could not be read')
+        except ValueError as error:
+            print(f'Error: {sys.argv[1]}: {error}')
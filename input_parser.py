@@ -1,6 +1,6 @@
 from emitter import Emitter
 from receiver import Receiver
-from mirror import Mirror
+from mirror import Mirror, REFLECTIONS
 
 '''
 input_parser - A module that parses the inputs of the program. 
@@ -12,6 +12,37 @@ should be using functions from this module to validate it.
 '''
 
 
+def is_emitter_symbol(symbol: str) -> bool:
+    '''
+    Returns whether or not symbol is a valid emitter symbol, which is one or
+    more of the letters 'A' to 'Z' e.g. 'A', 'J', 'Z', 'AA' or 'BCD'.
+
+    Parameters
+    ----------
+    symbol - the symbol to check
+    '''
+    if symbol=='':
+        return False
+    for letter in symbol:
+        if letter<'A' or letter>'Z':
+            return False
+    return True
+
+
+def is_receiver_symbol(symbol: str) -> bool:
+    '''
+    Returns whether or not symbol is a valid receiver symbol, which is 'R'
+    followed by a number with no leading zeros e.g. 'R0', 'R9' or 'R123'.
+    Receiver.is_valid_symbol decides this, so the parser and Receiver always
+    agree.
+
+    Parameters
+    ----------
+    symbol - the symbol to check
+    '''
+    return Receiver.is_valid_symbol(symbol)
+
+
 def parse_size(user_input: str) -> tuple[int, int] | None:
     # only requires implementation once you reach GET-MY-INPUTS
     '''
@@ -86,7 +117,7 @@ def parse_emitter(user_input: str) -> Emitter | None:
       1)  user_input contains exactly 3 tokens. If there are 3 tokens, we 
           interpret the first token  as symbol, the second token as x and the 
           third token as y for the remaining checks.
-      2)  symbol is a character between 'A' to 'J'. 
+      2)  symbol is made of the letters 'A' to 'Z' (see is_emitter_symbol). 
       3)  x is an integer.
       4)  y is an integer.
       5)  x is not negative.
@@ -114,15 +145,9 @@ def parse_emitter(user_input: str) -> Emitter | None:
         print('Error: <symbol> <x> <y>')
         return None
     symbol,x,y=user_input
-    check='ABCDEFGHIJ'
-    i=0
-    while i<len(check):
-        if symbol==check[i]:
-            break
-        i+=1
-        if i==len(check):
-            print("Error: symbol is not between 'A'-'J'")
-            return None
+    if not is_emitter_symbol(symbol):
+        print("Error: symbol must only contain letters between 'A'-'Z'")
+        return None
     try:
         int(x)
     except ValueError:
@@ -147,8 +172,8 @@ def parse_receiver(user_input: str) -> Receiver | None:
     # only requires implementation once you reach GET-MY-INPUTS
     '''
     Identical to parse_emitter, with the only differences being
-    that the symbol must be between 'R0' to 'R9', and that a new Receiver
-    instance is returned if all checks pass.
+    that the symbol must be 'R' followed by a number (see is_receiver_symbol),
+    and that a new Receiver instance is returned if all checks pass.
 
     Parameters
     ----------
@@ -172,15 +197,9 @@ def parse_receiver(user_input: str) -> Receiver | None:
         print('Error: <symbol> <x> <y>')
         return None
     symbol,x,y=user_input
-    check=['R0','R1','R2','R3','R4','R5','R6','R7','R8','R9']
-    i=0
-    while i<len(check):
-        if symbol==check[i]:
-            break
-        i+=1
-        if i==len(check):
-            print("Error: symbol is not between R0-R9")
-            return None
+    if not is_receiver_symbol(symbol):
+        print("Error: symbol must be 'R' followed by a number")
+        return None
     try:
         int(x)
     except ValueError:
@@ -200,19 +219,24 @@ def parse_receiver(user_input: str) -> Receiver | None:
     return Receiver(symbol,int(x),int(y))
 
 
-def parse_pulse_sequence(line: str) -> tuple[str, int, str] | None:
+def parse_pulse_sequence(line: str) -> tuple[str, int, str, int, int] | None:
     # only requires implementation once you reach RUN-MY-CIRCUIT
     '''
     Checks if line is valid for setting the pulse sequence of an emitter by
     performing the following checks in order for any errors:
-      1)  line contains exactly 3 tokens.
-          If there are 3 tokens, we interpret the first token as symbol, the
-          second token as frequency and the third token as direction for the
-          remaining checks.
-      2)  symbol is a character between 'A' to 'J'.
+      1)  line contains exactly 3 or 5 tokens.
+          We interpret the first token as symbol, the second token as
+          frequency and the third token as direction for the remaining
+          checks. If there are 5 tokens, the fourth is the period and the
+          fifth the count of a pulse train.
+      2)  symbol is made of the letters 'A' to 'Z' (see is_emitter_symbol).
       3)  frequency is an integer.
       4)  frequency is greater than zero.
       5)  direction is either 'N', 'E', 'S' or 'W'.
+      6)  period is an integer.
+      7)  period is greater than zero.
+      8)  count is an integer.
+      9)  count is greater than zero.
 
     Parameters
     ----------
@@ -221,8 +245,9 @@ def parse_pulse_sequence(line: str) -> tuple[str, int, str] | None:
     Returns
     -------
     If all checks pass, returns a tuple containing the specified symbol,
-    frequency and direction which can be used for setting the pulse sequence
-    of the emitter.
+    frequency, direction, period and count which can be used for setting the
+    pulse sequence of the emitter. A line with 3 tokens is a single pulse,
+    with a period of 0 and count of 1.
     Else, if at any point a check fails, prints an error message stating the cause
     of the error and returns None, skipping any further checks.    
     '''
@@ -233,19 +258,13 @@ def parse_pulse_sequence(line: str) -> tuple[str, int, str] | None:
             line.pop(i)
             continue
         i+=1
-    if len(line)!=3:
-        print('Error: <symbol> <frequency> <direction>')
+    if len(line)!=3 and len(line)!=5:
+        print('Error: <symbol> <frequency> <direction> [<period> <count>]')
+        return None
+    symbol,frequency,direction=line[:3]
+    if not is_emitter_symbol(symbol):
+        print("Error: symbol must only contain letters between 'A'-'Z'")
         return None
-    symbol,frequency,direction=line
-    check='ABCDEFGHIJ'
-    i=0
-    while i<len(check):
-        if symbol==check[i]:
-            break
-        i+=1
-        if i==len(check):
-            print("Error: symbol is not between 'A'-'J'")
-            return None
     try:
         int(frequency)
     except ValueError:
@@ -263,7 +282,26 @@ def parse_pulse_sequence(line: str) -> tuple[str, int, str] | None:
         if i==len(check):
             print("Error: direction must be 'N', 'E', 'S' or 'W'")
             return None
-    return symbol,int(frequency),direction
+    if len(line)==3:
+        return symbol,int(frequency),direction,0,1
+    period,count=line[3:]
+    try:
+        int(period)
+    except ValueError:
+        print('Error: period is not an integer')
+        return None
+    if int(period)<=0:
+        print('Error: period must be greater than zero')
+        return None
+    try:
+        int(count)
+    except ValueError:
+        print('Error: count is not an integer')
+        return None
+    if int(count)<=0:
+        print('Error: count must be greater than zero')
+        return None
+    return symbol,int(frequency),direction,int(period),int(count)
     
 
 
@@ -275,7 +313,8 @@ def parse_mirror(user_input: str) -> Mirror | None:
       1)  user_input contains exactly 3 tokens. If there are 3 tokens, we
           interpret the first token  as symbol, the second token as x and the
           third token as y for the remaining checks.
-      2)  symbol is either '/', '\', '>', '<', '^', or 'v'.
+      2)  symbol is either '/', '\', '>', '<', '^', or 'v' (any mirror type
+          in mirror.REFLECTIONS).
       3)  x is an integer.
       4)  y is an integer.
       5)  x is not negative.
@@ -303,15 +342,10 @@ def parse_mirror(user_input: str) -> Mirror | None:
         print('Error: <symbol> <x> <y>')
         return None
     symbol,x,y=user_input
-    check=['/','\\','>','<','^','v']
-    i=0
-    while i<len(check):
-        if symbol==check[i]:
-            break
-        i+=1
-        if i==len(check):
-            print("Error: symbol must be '/', '\\', '>', '<', '^' or 'v'")
-            return None
+    if symbol not in REFLECTIONS:
+        check=[f"'{mirror_symbol}'" for mirror_symbol in REFLECTIONS]
+        print(f"Error: symbol must be {', '.join(check[:-1])} or {check[-1]}")
+        return None
     try:
         int(x)
     except ValueError:
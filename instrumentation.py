@@ -0,0 +1,147 @@
+import sys
+
+'''
+
+instrumentation - Collects statistics about where a run of a LaserCircuit
+spends its time. A LaserCircuit reports to its collector after every tick and
+every board it prints. By default this is a NullCollector, whose enabled flag
+is False so the circuit skips timing and counting altogether, and whose
+methods do nothing. Giving the circuit a Collector instead records counters
+and histograms, which run_circuit dumps once the circuit has finished.
+
+'''
+
+
+# upper bounds in microseconds of each histogram bucket, the last bucket
+# holds everything above the second last bound
+BUCKET_BOUNDS=(1,2,5,10,20,50,100,200,500,1000,2000,5000,10000,float('inf'))
+
+
+class Collector:
+
+
+    enabled=True
+
+
+    def __init__(self):
+        '''
+        Initialises a Collector with every counter at zero and every
+        histogram empty.
+
+        counters:   dict[str, int]       - totals across the run, which are
+                                           ticks, photons_moved, absorptions,
+                                           frames and collisions_<type> for
+                                           each type of component
+        histograms: dict[str, list[int]] - the number of values recorded in
+                                           each bucket of BUCKET_BOUNDS, for
+                                           tick_us and render_us
+        totals:     dict[str, float]     - the sum of the values recorded in
+                                           each histogram
+        '''
+        self.counters={'ticks':0,'photons_moved':0,'absorptions':0,'frames':0,
+                       'collisions_emitter':0,'collisions_receiver':0,'collisions_mirror':0}
+        self.histograms={'tick_us':[0]*len(BUCKET_BOUNDS),'render_us':[0]*len(BUCKET_BOUNDS)}
+        self.totals={'tick_us':0.0,'render_us':0.0}
+
+
+    def record_value(self, name: str, value: float) -> None:
+        '''
+        Adds value to the histogram called name.
+
+        Parameters
+        ----------
+        name  - the name of the histogram
+        value - the value to add, in microseconds
+        '''
+        i=0
+        while value>BUCKET_BOUNDS[i]:
+            i+=1
+        self.histograms[name][i]+=1
+        self.totals[name]+=value
+
+
+    def record_tick(self, seconds: float, moved: int, collisions: dict[str, int], absorbed: int) -> None:
+        '''
+        Records a single tick of the circuit.
+
+        Parameters
+        ----------
+        seconds    - the wall time the tick took
+        moved      - the number of photons moved
+        collisions - the number of collisions with each type of component
+        absorbed   - the number of photons absorbed
+        '''
+        self.counters['ticks']+=1
+        self.counters['photons_moved']+=moved
+        self.counters['absorptions']+=absorbed
+        for component_type,count in collisions.items():
+            self.counters['collisions_'+component_type]+=count
+        self.record_value('tick_us',seconds*1000000)
+
+
+    def record_render(self, seconds: float) -> None:
+        '''
+        Records the board being printed.
+
+        Parameters
+        ----------
+        seconds - the wall time printing the board took
+        '''
+        self.counters['frames']+=1
+        self.record_value('render_us',seconds*1000000)
+
+
+    def to_dict(self) -> dict:
+        '''Returns the counters, histograms and totals as a dict.'''
+        return {'counters':dict(self.counters),
+                'histograms':{name:list(buckets) for name,buckets in self.histograms.items()},
+                'totals':dict(self.totals),
+                'bucket_bounds_us':[str(bound) for bound in BUCKET_BOUNDS]}
+
+
+    def dump(self, file_obj=None) -> None:
+        '''
+        Writes the counters and a line for each non-empty histogram bucket.
+
+        Parameters
+        ----------
+        file_obj - a file like object to write to, defaults to stdout
+        '''
+        if file_obj is None:
+            file_obj=sys.stdout
+        output='Instrumentation:\n'
+        for name,count in self.counters.items():
+            output+=f'{name}: {count}\n'
+        for name,buckets in self.histograms.items():
+            recorded=sum(buckets)
+            mean=self.totals[name]/recorded if recorded>0 else 0
+            output+=f'{name}: {recorded} recorded, {self.totals[name]:.0f}us total, {mean:.1f}us mean\n'
+            lower=0
+            i=0
+            while i<len(buckets):
+                if buckets[i]>0:
+                    output+=f'  {lower}-{BUCKET_BOUNDS[i]}us: {buckets[i]}\n'
+                lower=BUCKET_BOUNDS[i]
+                i+=1
+        file_obj.write(output+'\n')
+
+
+class NullCollector:
+
+
+    enabled=False
+
+
+    def record_tick(self, seconds: float, moved: int, collisions: dict[str, int], absorbed: int) -> None:
+        '''Does nothing.'''
+        pass
+
+
+    def record_render(self, seconds: float) -> None:
+        '''Does nothing.'''
+        pass
+
+
+    def dump(self, file_obj=None) -> None:
+        '''Does nothing.'''
+        pass
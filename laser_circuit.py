@@ -1,9 +1,16 @@
+import bisect
+import time
+from collections.abc import Callable
 import sorter
 from emitter import Emitter
 from receiver import Receiver
 from photon import Photon
 from mirror import Mirror
 from board_displayer import BoardDisplayer
+from sparse_board_displayer import SparseBoardDisplayer
+from instrumentation import NullCollector
+from event_trace import NullTracer, MOVE, REFLECT, ABSORB, LOST, LOOP
+from photon_pool import PhotonPool
 
 '''
 
@@ -16,15 +23,19 @@ responsible for handling any task related to the circuit.
 '''
 
 
+# boards with more cells than this are stored sparsely unless told otherwise
+SPARSE_BOARD_CELLS=1000000
+
+
 class LaserCircuit:
 
 
-    def __init__(self, width: int, height: int):
+    def __init__(self, width: int, height: int, sparse_board: bool | None = None):
         '''        
         Initialise a LaserCircuit instance given a width and height. All 
         lists of components and photons are empty by default.
-        board_displayer is initialised to a BoardDisplayer instance. clock is
-        0 by default.
+        board_displayer is initialised to a BoardDisplayer instance, or a
+        SparseBoardDisplayer if sparse_board is set. clock is 0 by default.
 
         emitters:        list[Emitter]  - all emitters in this circuit
         receivers:       list[Receiver] - all receivers in this circuit
@@ -32,15 +43,56 @@ class LaserCircuit:
         mirrors:         list[Mirror]   - all mirrors in this circuit
         width:           int            - the width of this circuit board
         height:          int            - the height of this circuit board
+        sparse_board:    bool           - whether the board is stored
+                                          sparsely
         board_displayer: BoardDisplayer - helper class for storing and 
-                                          displaying the circuit board
+                                          displaying the circuit board, a
+                                          SparseBoardDisplayer if
+                                          sparse_board is set
         clock:           int            - a clock keeping track of how many 
                                           nanoseconds this circuit has run for
+        emitter_positions:  dict[tuple[int, int], Emitter]  - emitters keyed by
+                                                              their (x, y)
+        receiver_positions: dict[tuple[int, int], Receiver] - receivers keyed by
+                                                              their (x, y)
+        mirror_positions:   dict[tuple[int, int], Mirror]   - mirrors keyed by
+                                                              their (x, y)
+        emitter_symbols:    dict[str, Emitter]              - emitters keyed by
+                                                              their symbol
+        receiver_symbols:   dict[str, Receiver]             - receivers keyed by
+                                                              their symbol
+        row_index:    dict[int, list[int]] - sorted x positions of the receivers
+                                             and mirrors in each row
+        column_index: dict[int, list[int]] - sorted y positions of the receivers
+                                             and mirrors in each column
+        trajectories: dict[tuple[int, int, str], tuple] - cached trajectories
+                                             keyed by (x, y, direction), see
+                                             get_trajectory
+        live_photons:        int - the number of photons that are neither
+                                   absorbed nor looping
+        active_photons: list[Photon] - the photons tick still has to move, in
+                                       the order they were added
+        activated_receivers: int - the number of activated receivers
+        draw_photons:        bool - whether tick draws photons on the board,
+                                    turned off by headless runs
+        collector: Collector | NullCollector - receives statistics about each
+                                    tick and printed board, see
+                                    instrumentation
+        tracer: EventTrace | NullTracer - records the events of each tick,
+                                    see event_trace
+        pulse_trains: list[Emitter] - the emitters firing more than one pulse,
+                                      in order, set by emit_photons
+        pending_pulses:      int - the number of pulses still to be fired
+        photon_pool:  PhotonPool    - hands out the photons of every pulse
+                                      after the first and takes them back
+                                      once absorbed
 
         Parameters
         ----------
-        width  - the width to set this circuit board to
-        height - the width to set this circuit board to
+        width        - the width to set this circuit board to
+        height       - the width to set this circuit board to
+        sparse_board - whether to store the board sparsely, by default only
+                       if it has more than SPARSE_BOARD_CELLS cells
         '''
         self.width=width
         self.height=height
@@ -48,9 +100,63 @@ class LaserCircuit:
         self.receivers=[]
         self.photons=[]
         self.mirrors=[]
-        self.board_displayer=BoardDisplayer(width,height)
+        if sparse_board is None:
+            sparse_board=width*height>SPARSE_BOARD_CELLS
+        self.sparse_board=sparse_board
+        self.board_displayer=self.create_board_displayer()
         self.clock=0
-        
+        self.emitter_positions={}
+        self.receiver_positions={}
+        self.mirror_positions={}
+        self.emitter_symbols={}
+        self.receiver_symbols={}
+        self.row_index={}
+        self.column_index={}
+        self.trajectories={}
+        self.live_photons=0
+        self.activated_receivers=0
+        self.active_photons=[]
+        self.draw_photons=True
+        self.collector=NullCollector()
+        self.tracer=NullTracer()
+        self.pulse_trains=[]
+        self.pending_pulses=0
+        self.photon_pool=PhotonPool()
+
+
+
+    def set_collector(self, collector) -> None:
+        '''
+        Sets the collector this circuit reports statistics to, e.g. an
+        instrumentation.Collector to record them or a NullCollector to stop.
+
+        Parameters
+        ----------
+        collector - the collector to report to
+        '''
+        self.collector=collector
+
+
+    def set_tracer(self, tracer) -> None:
+        '''
+        Sets the tracer that tick records every event to, starting it from
+        the current state of this circuit, e.g. an event_trace.EventTrace to
+        record them or a NullTracer to stop.
+
+        Parameters
+        ----------
+        tracer - the tracer to record to
+        '''
+        self.tracer=tracer
+        if tracer.enabled:
+            tracer.start(self)
+
+
+    def create_board_displayer(self) -> BoardDisplayer | SparseBoardDisplayer:
+        '''Returns an empty board displayer of the kind set by sparse_board.'''
+        if self.sparse_board:
+            return SparseBoardDisplayer(self.width,self.height)
+        return BoardDisplayer(self.width,self.height)
 
 
     def emit_photons(self) -> None:
@@ -58,11 +164,47 @@ class LaserCircuit:
         '''
         Gets each emitter in this circuit's list of emitters to emit a photon.
         The photons emitted should be added to this circuit's photons list.
+
+        Emitters firing a pulse train are kept in pulse_trains, and their
+        remaining pulses are fired by tick (see emit_pulses).
         '''
         i=0
         while i<len(self.emitters):
             self.add_photon(self.emitters[i].emit_photon())
             i+=1
+        self.pulse_trains=[emitter for emitter in self.emitters if emitter.get_pulse_count()>1]
+        self.pending_pulses=0
+        for emitter in self.pulse_trains:
+            self.pending_pulses+=emitter.get_pulse_count()-1
+
+
+    def get_pulsing_emitters(self) -> list[Emitter]:
+        '''
+        Returns the emitters in pulse_trains due to fire a pulse at the
+        current clock time, in order. The first pulse at 0ns is fired by
+        emit_photons, so it is not included.
+        '''
+        due=[]
+        for emitter in self.pulse_trains:
+            period=emitter.get_pulse_period()
+            if self.clock%period==0 and 0<self.clock//period<emitter.get_pulse_count():
+                due.append(emitter)
+        return due
+
+
+    def emit_pulses(self) -> None:
+        '''
+        Fires a pulse from every emitter due to at the current clock time. The
+        photons are taken from photon_pool and added to active_photons, but not
+        photons, so they can be given back to the pool once absorbed. A
+        photon emitted at time t first moves on the tick to t+1, like the
+        photons emitted at 0ns.
+        '''
+        for emitter in self.get_pulsing_emitters():
+            photon=self.photon_pool.acquire(emitter.get_x(),emitter.get_y(),emitter.get_frequency(),emitter.get_direction())
+            self.active_photons.append(photon)
+            self.live_photons+=1
+            self.pending_pulses-=1
 
 
     def is_finished(self) -> bool:
@@ -70,21 +212,13 @@ class LaserCircuit:
         '''
         Returns whether or not this circuit has finished running. The
         circuit is finished running if every photon in the circuit has been
-        absorbed.
+        absorbed or is looping forever, and every pulse has been fired.
 
         Returns
         -------
         True if the circuit has finished running or not, else False.
         '''
-        i=0
-        count=0
-        while i< len(self.photons):
-            if self.photons[i].is_absorbed():
-                count+=1
-            i+=1
-        if count==len(self.photons):
-            return True
-        return False
+        return self.live_photons==0 and self.pending_pulses==0
 
 
 
@@ -109,7 +243,7 @@ class LaserCircuit:
             f.write(output)
                 
 
-    def print_activation_times(self) -> None:
+    def print_activation_times(self, limit: int | None = None) -> None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
         '''
         Prints the output for the activation times for each receiver, sorted
@@ -120,14 +254,21 @@ class LaserCircuit:
         /home/output/activation_times.out output file.
 
         You can assume the /home/output/ path exists.
+
+        Parameters
+        ----------
+        limit - if given, only the first limit receivers are included
         '''
-        newlist=sorter.sort_receivers_by_activation_time(self.get_receivers())
+        activated=[receiver for receiver in self.get_receivers() if receiver.is_activated()]
+        if limit is None:
+            newlist=sorter.sort_receivers_by_activation_time(activated)
+        else:
+            newlist=sorter.top_receivers_by_activation_time(activated,limit)
         output=''
         with open('/home/output/activation_times.out','w')as f:
             i=0
             while i< len(newlist):
-                if newlist[i].is_activated():
-                    output+=f'{newlist[i].symbol}: {newlist[i].get_activation_time()}ns\n'
+                output+=f'{newlist[i].symbol}: {newlist[i].get_activation_time()}ns\n'
                 i+=1
             print('Activation times:')
             print(output)
@@ -135,7 +276,7 @@ class LaserCircuit:
     
 
 
-    def print_total_energy(self) -> None:
+    def print_total_energy(self, limit: int | None = None) -> None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
         '''
         Prints the output for the total energy absorbed for each receiver,
@@ -146,14 +287,21 @@ class LaserCircuit:
         /home/output/total_energy_absorbed.out output file.
 
         You can assume the /home/output/ path exists.
+
+        Parameters
+        ----------
+        limit - if given, only the first limit receivers are included
         '''
-        newlist=sorter.sort_receivers_by_total_energy(self.get_receivers())
+        activated=[receiver for receiver in self.get_receivers() if receiver.is_activated()]
+        if limit is None:
+            newlist=sorter.sort_receivers_by_total_energy(activated)
+        else:
+            newlist=sorter.top_receivers_by_total_energy(activated,limit)
         output=''
         with open('/home/output/total_energy.out','w')as f:
             i=0
             while i<len(newlist):
-                if newlist[i].is_activated():
-                    output+=f'{newlist[i].symbol}: {newlist[i].get_total_energy():.2f}eV ({newlist[i].photons_absorbed})\n'
+                output+=f'{newlist[i].symbol}: {newlist[i].get_total_energy():.2f}eV ({newlist[i].photons_absorbed})\n'
                 i+=1
             print('Total energy absorbed:')
             print(output)
@@ -161,9 +309,36 @@ class LaserCircuit:
     
 
     
+    def print_looping_photons(self) -> None:
+        '''
+        Prints the position and direction of each photon that is looping
+        forever, in the order they were emitted. Nothing is printed if no
+        photons are looping.
+
+        It will also write the output into a
+        /home/output/looping_photons.out output file.
+        '''
+        output=''
+        with open('/home/output/looping_photons.out','w')as f:
+            i=0
+            while i<len(self.photons):
+                if self.photons[i].is_looping():
+                    output+=f'({self.photons[i].get_x()}, {self.photons[i].get_y()}) {self.photons[i].get_direction()}\n'
+                i+=1
+            if output!='':
+                print('Looping photons:')
+                print(output)
+            f.write(output)
+
+
     def print_board(self) -> None:
         '''Calls the print_board method in board_displayer.'''
-        self.board_displayer.print_board()
+        if self.collector.enabled:
+            start=time.perf_counter()
+            self.board_displayer.print_board()
+            self.collector.record_render(time.perf_counter()-start)
+        else:
+            self.board_displayer.print_board()
 
 
     def get_collided_emitter(self, entity: Emitter | Receiver | Photon | Mirror) -> Emitter | None:
@@ -185,11 +360,7 @@ class LaserCircuit:
         An emitter if it has the same position as entity, else None.
         '''
         if isinstance(entity,(Emitter,Receiver,Photon,Mirror)):
-            i=0
-            while i< len(self.get_emitters()):
-                if entity.get_x()==self.get_emitters()[i].get_x() and entity.get_y()==self.get_emitters()[i].get_y():
-                    return self.get_emitters()[i]
-                i+=1
+            return self.emitter_positions.get((entity.get_x(),entity.get_y()))
         return None
 
 
@@ -212,11 +383,7 @@ class LaserCircuit:
         A receiver if it has the same position as entity, else None.
         '''
         if isinstance(entity,(Emitter,Receiver,Photon,Mirror)):
-            i=0
-            while i< len(self.get_receivers()):
-                if entity.get_x()==self.get_receivers()[i].get_x() and entity.get_y()==self.get_receivers()[i].get_y():
-                    return self.get_receivers()[i]
-                i+=1
+            return self.receiver_positions.get((entity.get_x(),entity.get_y()))
         return None
 
 
@@ -240,11 +407,7 @@ class LaserCircuit:
         A mirror if it has the same position as entity, else None.
         '''
         if isinstance(entity,(Emitter,Receiver,Photon,Mirror)):
-            i=0
-            while i< len(self.get_mirrors()):
-                if entity.get_x()==self.get_mirrors()[i].get_x() and entity.get_y()==self.get_mirrors()[i].get_y():
-                    return self.get_mirrors()[i]
-                i+=1
+            return self.mirror_positions.get((entity.get_x(),entity.get_y()))
         return None
 
 
@@ -291,50 +454,443 @@ class LaserCircuit:
         responsible for moving it, updating the board to show its new position
         and checking if it collided with a component (and handling it if did
         occur). At the end, we then increment clock.
+
+        Photons that will never be absorbed are marked as looping and are not
+        moved again. This is either a photon with no direction, or a photon
+        that leaves a mirror with the same position and direction twice.
+
+        Only the photons in active_photons are visited. Photons that are
+        absorbed or start looping are dropped from it as it is walked, keeping
+        the rest in order, so each tick costs time proportional to the photons
+        still in flight. photons still holds every photon for reporting.
+
+        Pooled photons (from pulse trains) are given back to photon_pool once
+        absorbed, or added to photons if they start looping so they are still
+        reported. Any pulses due are then fired with emit_pulses.
+
+        If the collector is enabled, the time taken, photons moved,
+        collisions and absorptions of the tick are reported to it. If the
+        tracer is enabled, every move, reflection, absorption and loop is
+        recorded to it.
         '''
         self.clock+=1
         if self.is_finished():
             return
+        collisions=None
+        if self.collector.enabled:
+            start=time.perf_counter()
+            collisions={'emitter':0,'receiver':0,'mirror':0}
+            moved=len(self.active_photons)
+            absorbed=0
+        tracing=self.tracer.enabled
+        active=self.active_photons
+        kept=0
         i=0
-        while i< len(self.photons):
-            if self.photons[i].is_absorbed() == False:
-                self.photons[i].move(self.get_width(),self.get_height())
-                self.board_displayer.add_photon_to_board(self.photons[i])
-                check= self.get_collided_component(self.photons[i])
-                if check is not None:
-                    self.photons[i].interact_with_component(check,self.clock)
+        while i< len(active):
+            photon=active[i]
             i+=1
+            if photon.is_absorbed() or photon.is_looping():
+                continue
+            if photon.get_direction() is None:
+                photon.set_looping()
+                self.live_photons-=1
+                if tracing:
+                    self.tracer.record(LOOP,self.clock,photon)
+                continue
+            photon.move(self.get_width(),self.get_height())
+            if self.draw_photons:
+                self.board_displayer.add_photon_to_board(photon)
+            if tracing:
+                self.tracer.record(MOVE,self.clock,photon)
+                if photon.is_absorbed():
+                    self.tracer.record(LOST,self.clock,photon)
+            check= self.get_collided_component(photon)
+            if check is not None:
+                # photons leaving the board stay on the edge cell but are
+                # already absorbed, so they do not collide with anything
+                exited=photon.is_absorbed()
+                if collisions is not None and not exited:
+                    collisions[check.get_component_type()]+=1
+                inactive=check.get_component_type()=='receiver' and not check.is_activated()
+                photon.interact_with_component(check,self.clock)
+                if inactive and check.is_activated():
+                    self.activated_receivers+=1
+                if tracing and not exited:
+                    if photon.is_absorbed():
+                        self.tracer.record(ABSORB if check.get_component_type()=='receiver' else LOST,self.clock,photon)
+                    elif check.get_component_type()=='mirror':
+                        self.tracer.record(REFLECT,self.clock,photon)
+                if check.get_component_type()=='mirror' and not photon.is_absorbed():
+                    if photon.visit_state():
+                        photon.set_looping()
+                        if tracing:
+                            self.tracer.record(LOOP,self.clock,photon)
+            if photon.is_absorbed() or photon.is_looping():
+                self.live_photons-=1
+                if collisions is not None and photon.is_absorbed():
+                    absorbed+=1
+                if photon.pooled:
+                    if photon.is_absorbed():
+                        self.photon_pool.release(photon)
+                    else:
+                        self.photons.append(photon)
+            else:
+                active[kept]=photon
+                kept+=1
+        del active[kept:]
+        if self.pending_pulses>0:
+            self.emit_pulses()
+        if collisions is not None:
+            self.collector.record_tick(time.perf_counter()-start,moved,collisions,absorbed)
         return 
 
-    def run_circuit(self) -> None:
+    def get_next_stop(self, x: int, y: int, direction: str) -> tuple[int, int, int, bool] | None:
+        '''
+        Finds where a photon at (x, y) travelling in direction next stops,
+        which is either the closest receiver or mirror ahead of it, or the
+        edge of the board if there is nothing in the way. Emitters are not
+        stops since photons pass straight through them.
+
+        Parameters
+        ----------
+        x         - the x position the photon starts from
+        y         - the y position the photon starts from
+        direction - the direction the photon is travelling ('N', 'E', 'S' or 'W')
+
+        Returns
+        -------
+        A tuple (x, y, distance, hit) where x and y are the position of the
+        stop, distance is the number of cells travelled to reach it and hit is
+        True if there is a receiver or mirror at the stop. If hit is False the
+        stop is the last cell before the edge of the board.
+        Returns None if direction is not 'N', 'E', 'S' or 'W'.
+        '''
+        if direction=='E' or direction=='W':
+            row=self.row_index.get(y,[])
+            if direction=='E':
+                i=bisect.bisect_right(row,x)
+                if i<len(row):
+                    return row[i],y,row[i]-x,True
+                return self.width-1,y,self.width-1-x,False
+            i=bisect.bisect_left(row,x)
+            if i>0:
+                return row[i-1],y,x-row[i-1],True
+            return 0,y,x,False
+        if direction=='N' or direction=='S':
+            column=self.column_index.get(x,[])
+            if direction=='S':
+                i=bisect.bisect_right(column,y)
+                if i<len(column):
+                    return x,column[i],column[i]-y,True
+                return x,self.height-1,self.height-1-y,False
+            i=bisect.bisect_left(column,y)
+            if i>0:
+                return x,column[i-1],y-column[i-1],True
+            return x,0,y,False
+        return None
+
+
+    def trace_trajectory(self, x: int, y: int, direction: str) -> tuple:
+        '''
+        Follows a photon starting at (x, y) travelling in direction through
+        the circuit, jumping from stop to stop with get_next_stop, until it is
+        absorbed by a receiver, absorbed by a mirror or leaves the board.
+
+        Parameters
+        ----------
+        x         - the x position the photon starts from
+        y         - the y position the photon starts from
+        direction - the direction the photon starts travelling in
+
+        Returns
+        -------
+        A tuple (receiver, time, x, y, direction, path, looping) where
+        receiver is the receiver that absorbs the photon (None if the photon
+        is lost), time is how many nanoseconds after starting it is absorbed,
+        x, y and direction are the photon's final position and direction,
+        and path is the list of positions it stopped at on the way. path,
+        together with the start position, gives every cell the photon visits.
+
+        looping is True if the photon is never absorbed, in which case time,
+        x, y and direction are when and where tick would mark it as looping:
+        one nanosecond in if direction is None, else the
+        first time it leaves a mirror with the same position and direction
+        twice.
+        '''
+        if direction is None:
+            return None,1,x,y,direction,[],True
+        # a scratch photon lets the components decide how they interact
+        photon=Photon(x,y,0,direction)
+        time=0
+        path=[]
+        while True:
+            x,y,distance,hit=self.get_next_stop(x,y,direction)
+            time+=distance
+            path.append((x,y))
+            if not hit:
+                # leaving the board takes one more nanosecond after the edge cell
+                return None,time+1,x,y,direction,path,False
+            photon.x=x
+            photon.y=y
+            check=self.get_collided_component(photon)
+            if check.get_component_type()=='receiver':
+                return check,time,x,y,direction,path,False
+            if check.get_component_type()=='mirror':
+                check.reflect_photon(photon)
+                if photon.is_absorbed():
+                    return None,time,x,y,direction,path,False
+                direction=photon.get_direction()
+                if photon.visit_state():
+                    return None,time,x,y,direction,path,True
+
+
+    def get_trajectory(self, x: int, y: int, direction: str) -> tuple:
+        '''
+        Returns the trajectory of a photon starting at (x, y) travelling in
+        direction, as described in trace_trajectory. Trajectories only depend
+        on the layout of the board, so they are cached in trajectories and
+        only traced the first time they are asked for. The cache is cleared
+        whenever a component is added.
+
+        Parameters
+        ----------
+        x         - the x position the photon starts from
+        y         - the y position the photon starts from
+        direction - the direction the photon starts travelling in
+        '''
+        key=(x,y,direction)
+        if key not in self.trajectories:
+            self.trajectories[key]=self.trace_trajectory(x,y,direction)
+        return self.trajectories[key]
+
+
+    def run_events(self) -> None:
+        '''
+        Runs the circuit until it is finished without stepping through every
+        nanosecond. Each photon's trajectory is looked up with get_trajectory
+        and only the time it is absorbed is kept, so the cost is proportional
+        to the number of interactions rather than the distance travelled, and
+        nothing at all for trajectories already cached. Absorptions are handled
+        in order of time, then by position in the list of photons, which is the
+        same order tick handles them in, so the activation times and energies
+        match running tick until finished. Photons with looping trajectories
+        are marked as looping. The board is not updated with the path of each
+        photon.
+
+        Pulses still to be fired by pulse trains are handled the same way,
+        after every photon already in flight, in order of the time they are
+        fired and then by emitter. Only the pulses that loop are turned into
+        photons, which are added to photons.
+        '''
+        # (time, time emitted, index, trajectory), where index is into
+        # active_photons for photons in flight (listed as emitted at 0, since
+        # they were all emitted before any pulse still to be fired) and into
+        # pulse_trains for pulses
+        arrivals=[]
+        i=0
+        while i<len(self.active_photons):
+            photon=self.active_photons[i]
+            if not photon.is_absorbed() and not photon.is_looping():
+                trajectory=self.get_trajectory(photon.get_x(),photon.get_y(),photon.get_direction())
+                arrivals.append((self.clock+trajectory[1],0,i,trajectory))
+            i+=1
+        i=0
+        while i<len(self.pulse_trains):
+            emitter=self.pulse_trains[i]
+            trajectory=self.get_trajectory(emitter.get_x(),emitter.get_y(),emitter.get_direction())
+            period=emitter.get_pulse_period()
+            pulse=self.clock//period+1
+            while pulse<emitter.get_pulse_count():
+                arrivals.append((pulse*period+trajectory[1],pulse*period,i,trajectory))
+                pulse+=1
+            i+=1
+        arrivals.sort()
+        for time,emitted,index,trajectory in arrivals:
+            receiver,_,x,y,direction,_,looping=trajectory
+            if emitted==0:
+                photon=self.active_photons[index]
+                photon.x=x
+                photon.y=y
+                photon.direction=direction
+                self.live_photons-=1
+            else:
+                emitter=self.pulse_trains[index]
+                photon=None
+                if looping:
+                    photon=self.photon_pool.acquire(x,y,emitter.get_frequency(),direction)
+                self.pending_pulses-=1
+            if looping:
+                photon.set_looping()
+                if photon.pooled:
+                    self.photons.append(photon)
+            elif receiver is None:
+                if photon is not None:
+                    photon.got_absorbed()
+            else:
+                if not receiver.is_activated():
+                    self.activated_receivers+=1
+                if photon is None:
+                    receiver.absorb_frequency(emitter.get_frequency(),time)
+                else:
+                    receiver.absorb_photon(photon,time)
+            if photon is not None and photon.pooled and photon.is_absorbed():
+                self.photon_pool.release(photon)
+            if time>self.clock:
+                self.clock=time
+        self.active_photons=[]
+
+
+    def solve(self) -> None:
+        '''
+        Works out the activation time, total energy and photons absorbed of
+        every receiver straight from the layout of the board, without emitting
+        any photons or running tick. Each emitter's photon is followed with
+        get_trajectory and its energy is given to the receiver it ends at, in
+        the same order running the circuit would absorb them, so the results
+        match run_circuit. clock is set to when the circuit would finish.
+        Every pulse of a pulse train follows the same trajectory, starting
+        from the time it is fired.
+        '''
+        for receiver in self.receivers:
+            receiver.reset()
+        self.activated_receivers=0
+        arrivals=[]
+        i=0
+        while i<len(self.emitters):
+            emitter=self.emitters[i]
+            trajectory=self.get_trajectory(emitter.get_x(),emitter.get_y(),emitter.get_direction())
+            period=emitter.get_pulse_period()
+            pulse=0
+            while pulse<emitter.get_pulse_count():
+                arrivals.append((pulse*period+trajectory[1],pulse*period,i,trajectory[0]))
+                pulse+=1
+            i+=1
+        arrivals.sort()
+        self.clock=0
+        for time,_,index,receiver in arrivals:
+            if receiver is not None:
+                if not receiver.is_activated():
+                    self.activated_receivers+=1
+                receiver.absorb_frequency(self.emitters[index].get_frequency(),time)
+            if time>self.clock:
+                self.clock=time
+
+
+    def reset(self) -> None:
+        '''
+        Clears everything from the last run of this circuit so the same layout
+        can be run again with a new pulse sequence. The photons, clock, results
+        of every receiver, pulse sequence of every emitter and photon paths on
+        the board are all cleared. Cached trajectories are kept, since the
+        layout has not changed.
+        '''
+        self.photons=[]
+        self.clock=0
+        self.live_photons=0
+        self.active_photons=[]
+        self.activated_receivers=0
+        self.pulse_trains=[]
+        self.pending_pulses=0
+        for emitter in self.emitters:
+            emitter.frequency=0
+            emitter.direction=None
+            emitter.pulse_sequence_set=False
+            emitter.pulse_period=0
+            emitter.pulse_count=1
+        for receiver in self.receivers:
+            receiver.reset()
+        self.board_displayer=self.create_board_displayer()
+        for component in self.mirrors+self.receivers+self.emitters:
+            self.board_displayer.add_component_to_board(component)
+
+
+    def run_circuit(self, engine: str = 'tick', frame_interval: int | None = 5, checkpointer=None, resume: bool = False) -> None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
         '''
         Runs the entire circuit from start to finish. This involves getting
         each emitter to emit a photon, and continuously running tick until the
         circuit is finished running. All output in regards of running the 
         circuit should be contained in this method.
+
+        If engine is 'event', run_events is used instead of tick. The board
+        is then only summarised once the circuit has finished, since photon
+        paths are not drawn. If engine is 'vectorized', a VectorizedEngine
+        (which needs NumPy) ticks every photon at once in place of tick.
+
+        A frame (the number of activated receivers and the board) is printed
+        every frame_interval nanoseconds and once the circuit has finished. If
+        frame_interval is 0, only the final frame is printed. If it is None
+        the run is headless: no boards are printed or drawn, only a final
+        summary line like the 'event' engine.
+
+        If checkpointer is given (see checkpoint.CheckpointWriter), it is
+        called after every tick to save the circuit periodically. Only the
+        'tick' engine keeps the circuit up to date while running, so the
+        other engines do not write checkpoints. If resume is set, the circuit
+        was restored from a checkpoint and carries on from its clock instead
+        of emitting photons. The tracer (see set_tracer) is closed once the
+        circuit has finished, and like checkpoints only records the 'tick'
+        engine.
+
+        Parameters
+        ----------
+        engine         - the simulation engine to use ('tick', 'event' or
+                         'vectorized')
+        frame_interval - the number of nanoseconds between frames, 0 for only
+                         the final frame or None for no frames
+        checkpointer   - saves the circuit periodically, or None
+        resume         - whether to carry on from a restored checkpoint
         '''
         print('========================\n   RUNNING CIRCUIT...\n========================\n')
-        self.print_emit_photons()
-        self.emit_photons()
-        if len(self.photons)==0:
-            print(f'{self.clock}ns: 0/{len(self.receivers)} receiver(s) activated.')
-            self.print_board()
+        if resume:
+            print(f'Resuming from {self.clock}ns...')
             print()
-        while not self.is_finished():
-            self.tick()
-            count=0
-            i=0
-            while i< len(self.receivers):
-                if self.receivers[i].is_activated():
-                    count+=1
-                i+=1
-            if self.clock % 5==0 or self.is_finished():
-                print(f'{self.clock}ns: {count}/{len(self.receivers)} receiver(s) activated.')
+        else:
+            self.print_emit_photons()
+            self.emit_photons()
+        if engine=='event':
+            self.run_events()
+            print(f'{self.clock}ns: {self.activated_receivers}/{len(self.receivers)} receiver(s) activated.')
+            print()
+        else:
+            vectorized=None
+            stepper=self
+            if engine=='vectorized':
+                from vectorized_engine import VectorizedEngine
+                vectorized=VectorizedEngine(self)
+                stepper=vectorized
+                checkpointer=None
+            headless=frame_interval is None
+            self.draw_photons=not headless
+            if not resume and len(self.photons)==0 and not headless:
+                print(f'{self.clock}ns: 0/{len(self.receivers)} receiver(s) activated.')
                 self.print_board()
                 print()
+            while not stepper.is_finished():
+                stepper.tick()
+                if checkpointer is not None:
+                    checkpointer.after_tick(self)
+                if headless:
+                    continue
+                if stepper.is_finished() or (frame_interval>0 and self.clock % frame_interval==0):
+                    print(f'{self.clock}ns: {self.activated_receivers}/{len(self.receivers)} receiver(s) activated.')
+                    if vectorized is not None:
+                        vectorized.paint_board()
+                    self.print_board()
+                    print()
+            self.draw_photons=True
+            if headless:
+                print(f'{self.clock}ns: {self.activated_receivers}/{len(self.receivers)} receiver(s) activated.')
+                print()
+            if vectorized is not None:
+                vectorized.write_back()
+            if checkpointer is not None:
+                checkpointer.close()
+        self.tracer.close()
         self.print_activation_times()
         self.print_total_energy()
+        self.print_looping_photons()
+        self.collector.dump()
         print('========================\n   CIRCUIT FINISHED!\n========================')
         
 
@@ -376,9 +932,29 @@ class LaserCircuit:
         You will need to find your own way to check for symbol collisions
         with other emitters.
         '''
+        if not self.check_emitter(emitter):
+            return False
+        self.register_emitter(emitter)
+        self.trajectories.clear()
+        bisect.insort(self.emitters,emitter)
+        return True
+
+
+    def check_emitter(self, emitter: Emitter) -> bool:
+        '''
+        Performs the checks of add_emitter on emitter, printing an error
+        message for the first check that fails.
+
+        Parameters
+        ----------
+        emitter - the emitter to check
+
+        Returns
+        -------
+        Whether or not every check passed.
+        '''
         if not isinstance(emitter, Emitter):
             return False
-        i=0
         
         if emitter.get_x()>= self.board_displayer.width or emitter.get_y()>= self.board_displayer.height:
                 print(f'Error: position ({emitter.get_x()}, {emitter.get_y()}) is out-of-bounds of {self.get_width()}x{self.get_height()} circuit board')
@@ -387,23 +963,76 @@ class LaserCircuit:
         if check is not None:
             print(f"Error: position ({emitter.get_x()}, {emitter.get_y()}) is already taken by emitter '{check.get_symbol()}'")
             return False
-        while i< len(self.emitters):   
-            if emitter.get_symbol()==self.emitters[i].get_symbol():
-                print(f"Error: symbol '{emitter.get_symbol()}' is already taken")
-                return False
-            i+=1
+        if emitter.get_symbol() in self.emitter_symbols:
+            print(f"Error: symbol '{emitter.get_symbol()}' is already taken")
+            return False
+        return True
+
+
+    def register_emitter(self, emitter: Emitter) -> None:
+        '''
+        Adds emitter's symbol into board_displayer and records its position
+        and symbol, without adding it to emitters.
+
+        Parameters
+        ----------
+        emitter - the emitter being added
+        '''
         self.board_displayer.add_component_to_board(emitter)
-        self.emitters.append(emitter)
+        self.emitter_positions[(emitter.get_x(),emitter.get_y())]=emitter
+        self.emitter_symbols[emitter.get_symbol()]=emitter
+
+
+    def add_emitters(self, emitters: list[Emitter], on_skip: Callable[[int], None] | None=None) -> list[bool]:
+        '''
+        Adds every emitter in emitters into this circuit, performing the same
+        checks and printing the same errors as add_emitter for each one in
+        order. The list of emitters is only sorted once, after they have all
+        been added.
+
+        Parameters
+        ----------
+        emitters - the emitters to add into this circuit's list of emitters
+        on_skip  - called with the index of each emitter that is not added,
+                   straight after its error is printed
+
+        Returns
+        -------
+        A list with whether or not each emitter was added, in the same order
+        as emitters.
+        '''
+        added=[]
+        for emitter in emitters:
+            if self.check_emitter(emitter):
+                self.register_emitter(emitter)
+                self.emitters.append(emitter)
+                added.append(True)
+            else:
+                if on_skip is not None:
+                    on_skip(len(added))
+                added.append(False)
+        self.trajectories.clear()
         self.emitters.sort()
-        return True
-            
+        return added
+
 
-    
     def get_emitters(self) -> list[Emitter]:
         '''Returns emitters.'''
         return self.emitters
 
 
+    def get_emitter(self, symbol: str) -> Emitter | None:
+        '''
+        Returns the emitter in this circuit with the given symbol, or None if
+        there is no such emitter.
+
+        Parameters
+        ----------
+        symbol - the symbol of the emitter to find
+        '''
+        return self.emitter_symbols.get(symbol)
+
+
     
     def add_receiver(self, receiver: Receiver) -> bool:
         '''
@@ -444,6 +1073,28 @@ class LaserCircuit:
         You will need to find your own way to check for symbol collisions
         with other receivers.
         '''
+        if not self.check_receiver(receiver):
+            return False
+        self.register_receiver(receiver)
+        self.trajectories.clear()
+        self.add_stop(receiver)
+        bisect.insort(self.receivers,receiver)
+        return True
+
+
+    def check_receiver(self, receiver: Receiver) -> bool:
+        '''
+        Performs the checks of add_receiver on receiver, printing an error
+        message for the first check that fails.
+
+        Parameters
+        ----------
+        receiver - the receiver to check
+
+        Returns
+        -------
+        Whether or not every check passed.
+        '''
         if not isinstance(receiver, Receiver):
             return False
             
@@ -458,17 +1109,63 @@ class LaserCircuit:
         if check2 is not None:
             print(f"Error: position ({receiver.get_x()}, {receiver.get_y()}) is already taken by receiver '{check2.symbol}'")
             return False
-        i=0
-        while i< len(self.receivers):   
-            if receiver.get_symbol()==self.receivers[i].get_symbol():
-                print(f"Error: symbol '{receiver.symbol}' is already taken")
-                return False
-            i+=1
-        
+        if receiver.symbol in self.receiver_symbols:
+            print(f"Error: symbol '{receiver.symbol}' is already taken")
+            return False
+        return True
+
+
+    def register_receiver(self, receiver: Receiver) -> None:
+        '''
+        Adds receiver's symbol into board_displayer and records its position,
+        symbol and activation, without adding it to receivers or the stop
+        indexes.
+
+        Parameters
+        ----------
+        receiver - the receiver being added
+        '''
         self.board_displayer.add_component_to_board(receiver)
-        self.receivers.append(receiver)
+        self.receiver_positions[(receiver.get_x(),receiver.get_y())]=receiver
+        self.receiver_symbols[receiver.symbol]=receiver
+        if receiver.is_activated():
+            self.activated_receivers+=1
+
+
+    def add_receivers(self, receivers: list[Receiver], on_skip: Callable[[int], None] | None=None) -> list[bool]:
+        '''
+        Adds every receiver in receivers into this circuit, performing the
+        same checks and printing the same errors as add_receiver for each one
+        in order. The list of receivers and the stop indexes are only sorted
+        once, after they have all been added.
+
+        Parameters
+        ----------
+        receivers - the receivers to add into this circuit's list of receivers
+        on_skip   - called with the index of each receiver that is not added,
+                    straight after its error is printed
+
+        Returns
+        -------
+        A list with whether or not each receiver was added, in the same order
+        as receivers.
+        '''
+        added=[]
+        new_receivers=[]
+        for receiver in receivers:
+            if self.check_receiver(receiver):
+                self.register_receiver(receiver)
+                self.receivers.append(receiver)
+                new_receivers.append(receiver)
+                added.append(True)
+            else:
+                if on_skip is not None:
+                    on_skip(len(added))
+                added.append(False)
+        self.trajectories.clear()
+        self.add_stops(new_receivers)
         self.receivers.sort()
-        return True
+        return added
 
 
     def get_receivers(self) -> list[Receiver]:
@@ -494,6 +1191,9 @@ class LaserCircuit:
         if not isinstance(photon,Photon):
             return False
         self.photons.append(photon)
+        if not photon.is_absorbed() and not photon.is_looping():
+            self.live_photons+=1
+            self.active_photons.append(photon)
         return True
 
 
@@ -531,6 +1231,28 @@ class LaserCircuit:
         stating the cause of the error and returns False, skipping any
         remaining checks.
         '''
+        if not self.check_mirror(mirror):
+            return False
+        self.register_mirror(mirror)
+        self.trajectories.clear()
+        self.add_stop(mirror)
+        self.mirrors.append(mirror)
+        return True
+
+
+    def check_mirror(self, mirror: Mirror) -> bool:
+        '''
+        Performs the checks of add_mirror on mirror, printing an error message
+        for the first check that fails.
+
+        Parameters
+        ----------
+        mirror - the mirror to check
+
+        Returns
+        -------
+        Whether or not every check passed.
+        '''
         if not isinstance(mirror, Mirror):
             return False
             
@@ -549,11 +1271,92 @@ class LaserCircuit:
         if check3 is not None:
             print(f"Error: position ({mirror.get_x()}, {mirror.get_y()}) is already taken by mirror '{check3.get_symbol()}'")
             return False
-        
-        self.board_displayer.add_component_to_board(mirror)
-        self.mirrors.append(mirror)
         return True
 
+
+    def register_mirror(self, mirror: Mirror) -> None:
+        '''
+        Adds mirror's symbol into board_displayer and records its position,
+        without adding it to mirrors or the stop indexes.
+
+        Parameters
+        ----------
+        mirror - the mirror being added
+        '''
+        self.board_displayer.add_component_to_board(mirror)
+        self.mirror_positions[(mirror.get_x(),mirror.get_y())]=mirror
+
+
+    def add_mirrors(self, mirrors: list[Mirror], on_skip: Callable[[int], None] | None=None) -> list[bool]:
+        '''
+        Adds every mirror in mirrors into this circuit, performing the same
+        checks and printing the same errors as add_mirror for each one in
+        order. The stop indexes are only sorted once, after they have all been
+        added.
+
+        Parameters
+        ----------
+        mirrors - the mirrors to add into this circuit's list of mirrors
+        on_skip - called with the index of each mirror that is not added,
+                  straight after its error is printed
+
+        Returns
+        -------
+        A list with whether or not each mirror was added, in the same order
+        as mirrors.
+        '''
+        added=[]
+        new_mirrors=[]
+        for mirror in mirrors:
+            if self.check_mirror(mirror):
+                self.register_mirror(mirror)
+                new_mirrors.append(mirror)
+                added.append(True)
+            else:
+                if on_skip is not None:
+                    on_skip(len(added))
+                added.append(False)
+        self.trajectories.clear()
+        self.add_stops(new_mirrors)
+        self.mirrors.extend(new_mirrors)
+        return added
+
+
+    def add_stop(self, component: Receiver | Mirror) -> None:
+        '''
+        Adds the position of component into row_index and column_index so
+        photons travelling along its row or column will stop at it.
+
+        Parameters
+        ----------
+        component - the receiver or mirror to add into the indexes
+        '''
+        bisect.insort(self.row_index.setdefault(component.get_y(),[]),component.get_x())
+        bisect.insort(self.column_index.setdefault(component.get_x(),[]),component.get_y())
+
+
+    def add_stops(self, components: list[Receiver | Mirror]) -> None:
+        '''
+        Adds the positions of every component in components into row_index
+        and column_index, sorting each changed row and column once.
+
+        Parameters
+        ----------
+        components - the receivers and mirrors to add into the indexes
+        '''
+        rows=set()
+        columns=set()
+        for component in components:
+            self.row_index.setdefault(component.get_y(),[]).append(component.get_x())
+            self.column_index.setdefault(component.get_x(),[]).append(component.get_y())
+            rows.add(component.get_y())
+            columns.add(component.get_x())
+        for y in rows:
+            self.row_index[y].sort()
+        for x in columns:
+            self.column_index[x].sort()
+
+
     def get_mirrors(self) -> list[Mirror]:
         # only requires implementation once you reach ADD-MY-MIRRORS
         '''Returns mirrors.'''
@@ -1,4 +1,4 @@
-from photon import Photon
+from photon import Photon, NO_DIRECTION
 
 '''
 Mirror - A surface that reflect photons, changing the direction in which they 
@@ -8,15 +8,35 @@ photon's initial direction when it reaches the mirror.
 '''
 
 
+# REFLECTIONS[symbol][direction code] is the direction code a photon leaves a
+# mirror of that type in, or ABSORBED if the mirror absorbs it. Direction
+# codes are indexes into photon.DIRECTIONS ('N', 'E', 'S', 'W', None), and a
+# photon with no direction is left as it is. A new type of mirror only needs
+# a new entry here.
+ABSORBED=-1
+REFLECTIONS={
+    '/':  (1,0,3,2,NO_DIRECTION),
+    '\\': (3,2,1,0,NO_DIRECTION),
+    '>':  (1,ABSORBED,1,ABSORBED,NO_DIRECTION),
+    '<':  (3,ABSORBED,3,ABSORBED,NO_DIRECTION),
+    '^':  (ABSORBED,0,ABSORBED,0,NO_DIRECTION),
+    'v':  (ABSORBED,2,ABSORBED,2,NO_DIRECTION),
+}
+
+
 class Mirror:
-    
+
+    __slots__=('symbol','x','y')
+    component_type='mirror'
+
 
     def __init__(self, symbol: str, x: int, y: int):
         # only requires implementation once you reach ADD-MY-MIRRORS
         '''
         Initialises a Mirror instance given a symbol, x and y value. 
 
-        component_type: str - represents the type of component ('mirror')
+        component_type: str - represents the type of component ('mirror'),
+                              shared by every mirror
         symbol:         str - the symbol of this mirror
                               ('/', '\', '>', '<', '^' or 'v')
         x:              int - x position of this mirror
@@ -31,7 +51,6 @@ class Mirror:
         self.symbol=symbol
         self.x=x
         self.y=y
-        self.component_type='mirror'
 
 
 
@@ -44,7 +63,8 @@ class Mirror:
         Otherwise, the photon will travel in a new direction depending on the 
         type of mirror and its current direction. If the reflection causes the
         photon to be absorbed, the direction is not changed but the photon
-        should be updated to get absorbed.
+        should be updated to get absorbed. The new direction is looked up in
+        REFLECTIONS.
 
         Parameter
         ---------
@@ -52,48 +72,11 @@ class Mirror:
         '''
         if photon.is_absorbed():
             return
-        if self.get_symbol()=='\\':
-            if photon.get_direction()=='E':
-                photon.direction='S'
-            elif photon.get_direction()=='S':
-                photon.direction='E'
-            elif photon.get_direction()=='W':
-                photon.direction='N'
-            elif photon.get_direction()=='N':
-                photon.direction='W'
-        elif self.get_symbol()=='/':
-            if photon.get_direction()=='E':
-                photon.direction='N'
-            elif photon.get_direction()=='N':
-                photon.direction='E'
-            elif photon.get_direction()=='W':
-                photon.direction='S'
-            elif photon.get_direction()=='S':
-                photon.direction='W'
-        elif self.get_symbol()=='>' or self.get_symbol()=='<':
-            if photon.get_direction()=='S' or photon.get_direction()=='N':
-                if self.get_symbol()=='>':
-                    photon.direction='E'
-                if self.get_symbol()=='<':
-                    photon.direction='W'
-            elif photon.get_direction()=='E':
-                photon.got_absorbed()
-            elif photon.get_direction()=='W':
-                photon.got_absorbed()
-        elif self.get_symbol()=='^' or self.get_symbol()=='v':
-            if photon.get_direction()=='E' or photon.get_direction()=='W':
-                if self.get_symbol()=='^':
-                    photon.direction='N'
-                if self.get_symbol()=='v':
-                    photon.direction='S'
-            elif photon.get_direction()=='N':
-                photon.got_absorbed()
-            elif photon.get_direction()=='S':
-                photon.got_absorbed()
-        
-        
-        
-        
+        outgoing=REFLECTIONS[self.get_symbol()][photon.direction_code]
+        if outgoing==ABSORBED:
+            photon.got_absorbed()
+        else:
+            photon.direction_code=outgoing
 
 
     def get_component_type(self) -> str:
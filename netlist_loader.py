@@ -0,0 +1,157 @@
+import input_parser
+from laser_circuit import LaserCircuit
+
+'''
+
+netlist_loader - Loads a whole circuit from a netlist file in one read, as a
+faster alternative to typing each component into run.py. A netlist starts
+with the size of the board, followed by any of the sections below in any
+order, each ending with a matching END line:
+
+    SIZE 18 6
+    EMITTERS
+    A 2 2
+    END EMITTERS
+    RECEIVERS
+    R0 15 2
+    END RECEIVERS
+    MIRRORS
+    / 8 3
+    END MIRRORS
+    PULSES
+    A 100 S
+    END PULSES
+
+Each line in a section is checked with the same input_parser function used
+for typed input, so invalid lines print the usual error and are skipped. The
+components of a section are added together when it ends, using the batch
+LaserCircuit methods (add_emitters, add_receivers and add_mirrors). Pulse
+sequences are only set once the whole netlist has been read, so a PULSES
+section may come before the EMITTERS it refers to. Blank lines and lines
+starting with '#' are ignored.
+
+'''
+
+
+# the input_parser function used to check the lines of each section
+SECTIONS={'EMITTERS':input_parser.parse_emitter,
+          'RECEIVERS':input_parser.parse_receiver,
+          'MIRRORS':input_parser.parse_mirror,
+          'PULSES':input_parser.parse_pulse_sequence}
+
+
+# the LaserCircuit method used to add the components of each section
+ADD_METHODS={'EMITTERS':'add_emitters',
+             'RECEIVERS':'add_receivers',
+             'MIRRORS':'add_mirrors'}
+
+
+def set_pulse(circuit: LaserCircuit, pulse: tuple[str, int, str, int, int]) -> bool:
+    '''
+    Sets the pulse sequence of an emitter in circuit, printing the same
+    errors as run.set_pulse_sequence.
+
+    Parameters
+    ----------
+    circuit - the circuit being loaded
+    pulse   - the symbol, frequency, direction, period and count returned by
+              input_parser.parse_pulse_sequence
+
+    Returns
+    -------
+    Whether or not the pulse sequence was set.
+    '''
+    symbol,frequency,direction,period,count=pulse
+    emitter=circuit.get_emitter(symbol)
+    if emitter is None:
+        print(f"Error: emitter '{symbol}' does not exist")
+        return False
+    if emitter.is_pulse_sequence_set():
+        print(f"Error: emitter '{symbol}' already has its pulse sequence set")
+        return False
+    emitter.set_pulse_sequence(frequency,direction,period,count)
+    return True
+
+
+def load_netlist(file_obj) -> tuple[LaserCircuit, bool] | None:
+    '''
+    Reads a netlist from file_obj and builds the circuit it describes.
+
+    Parameters
+    ----------
+    file_obj - a file like object returned by open()
+
+    Returns
+    -------
+    A tuple of the circuit and whether the netlist had a PULSES section, or
+    None if the netlist is malformed (it does not start with a valid SIZE
+    line, has an unknown section or a section that is never ended). The
+    number of each kind of line added is printed once loading is done.
+    '''
+    lines=file_obj.read().splitlines()
+    circuit=None
+    section=None
+    # the parsed components of the current section and their line numbers
+    components=[]
+    numbers=[]
+    # the parsed pulse sequences and their line numbers, set once every
+    # emitter has been added
+    pulses=[]
+
+    def skip(i: int) -> None:
+        # called by the batch add methods straight after the error of the
+        # i-th component of the section is printed
+        print(f'Error: line {numbers[i]}: skipped {lines[numbers[i]-1].strip()}')
+
+    counts={'EMITTERS':0,'RECEIVERS':0,'MIRRORS':0,'PULSES':0}
+    has_pulses=False
+    number=0
+    for line in lines:
+        number+=1
+        line=line.strip()
+        if line=='' or line[0]=='#':
+            continue
+        if circuit is None:
+            if line[:5]!='SIZE ':
+                print(f'Error: line {number}: netlist must start with SIZE <width> <height>')
+                return None
+            size=input_parser.parse_size(line[5:])
+            if size is None:
+                return None
+            circuit=LaserCircuit(size[0],size[1])
+        elif section is None:
+            if line not in SECTIONS:
+                print(f"Error: line {number}: unknown section '{line}'")
+                return None
+            section=line
+            if section=='PULSES':
+                has_pulses=True
+        elif line=='END '+section:
+            if section in ADD_METHODS:
+                added=getattr(circuit,ADD_METHODS[section])(components,skip)
+                counts[section]+=added.count(True)
+                components=[]
+                numbers=[]
+            section=None
+        else:
+            parsed=SECTIONS[section](line)
+            if parsed is None:
+                print(f'Error: line {number}: skipped {line}')
+            elif section in ADD_METHODS:
+                components.append(parsed)
+                numbers.append(number)
+            else:
+                pulses.append((parsed,number))
+    if circuit is None:
+        print('Error: netlist must start with SIZE <width> <height>')
+        return None
+    if section is not None:
+        print(f"Error: section '{section}' is missing END {section}")
+        return None
+    for pulse,number in pulses:
+        if set_pulse(circuit,pulse):
+            counts['PULSES']+=1
+        else:
+            print(f'Error: line {number}: skipped {lines[number-1].strip()}')
+    print(f"{circuit.get_width()}x{circuit.get_height()} board loaded with {counts['EMITTERS']} emitter(s), {counts['RECEIVERS']} receiver(s), {counts['MIRRORS']} mirror(s) and {counts['PULSES']} pulse sequence(s).")
+    return circuit,has_pulses
@@ -0,0 +1,169 @@
+import heapq
+import multiprocessing
+import os
+from laser_circuit import LaserCircuit
+
+'''
+
+parallel_runner - Runs a circuit with its photons spread across a pool of
+worker processes. Photons never interact with each other, only with the
+components on the board, so each worker is given a read-only copy of the
+circuit once when it starts and follows its share of the photons (every
+pulse of every emitter) through the board with get_trajectory, the same way
+LaserCircuit.solve does.
+
+Each worker returns, for every receiver its photons reach, the time, time
+emitted and emitter of each absorption, sorted. The results of all workers
+are merged per receiver in that order, which is the order run_circuit
+absorbs them in, so the total energy, photons absorbed and activation time
+(the earliest absorption) of every receiver are exactly the same as solve.
+
+'''
+
+
+# the circuit each worker process follows photons through, set by init_worker
+worker_circuit=None
+# the position of each receiver of worker_circuit in its list of receivers,
+# keyed by id(receiver)
+worker_receiver_indexes=None
+
+# the number of shards given to each worker process, a few per worker keeps
+# them all busy when some shards take longer than others
+SHARDS_PER_PROCESS=4
+
+
+def init_worker(circuit: LaserCircuit) -> None:
+    '''
+    Stores circuit as the circuit this worker process follows photons
+    through.
+
+    Parameters
+    ----------
+    circuit - the circuit to run
+    '''
+    global worker_circuit,worker_receiver_indexes
+    worker_circuit=circuit
+    worker_receiver_indexes={}
+    i=0
+    for receiver in circuit.get_receivers():
+        worker_receiver_indexes[id(receiver)]=i
+        i+=1
+
+
+def get_shards(circuit: LaserCircuit, count: int) -> list[list[tuple[int, int, int]]]:
+    '''
+    Splits the photons of circuit into at most count shards of about the same
+    size. The photons are every pulse of every emitter, in order of emitter
+    then pulse.
+
+    Parameters
+    ----------
+    circuit - the circuit to split the photons of
+    count   - the number of shards to split them into
+
+    Returns
+    -------
+    A list of shards, each a list of (emitter index, first pulse, end pulse)
+    ranges, where end pulse is not included.
+    '''
+    emitters=circuit.get_emitters()
+    total=0
+    for emitter in emitters:
+        total+=emitter.get_pulse_count()
+    count=max(1,min(count,total))
+    shards=[]
+    shard=[]
+    # the number of photons still to go in the current shard
+    remaining=0
+    taken=0
+    i=0
+    while i<len(emitters):
+        pulse=0
+        while pulse<emitters[i].get_pulse_count():
+            if remaining==0:
+                shard=[]
+                shards.append(shard)
+                remaining=total*len(shards)//count-taken
+            end=min(emitters[i].get_pulse_count(),pulse+remaining)
+            shard.append((i,pulse,end))
+            remaining-=end-pulse
+            taken+=end-pulse
+            pulse=end
+        i+=1
+    return shards
+
+
+def run_shard(shard: list[tuple[int, int, int]]) -> tuple[dict[int, list[tuple[int, int, int]]], int]:
+    '''
+    Follows the photons of shard through the worker's circuit.
+
+    Parameters
+    ----------
+    shard - the photons to follow, as returned by get_shards
+
+    Returns
+    -------
+    A tuple of the absorptions and the time the last photon is absorbed,
+    lost or starts looping. The absorptions are a list of (time, time
+    emitted, emitter index) tuples in order for each receiver, keyed by the
+    receiver's position in the circuit's list of receivers.
+    '''
+    circuit=worker_circuit
+    emitters=circuit.get_emitters()
+    absorptions={}
+    finish=0
+    for index,first,end in shard:
+        emitter=emitters[index]
+        trajectory=circuit.get_trajectory(emitter.get_x(),emitter.get_y(),emitter.get_direction())
+        receiver=trajectory[0]
+        period=emitter.get_pulse_period()
+        finish=max(finish,(end-1)*period+trajectory[1])
+        if receiver is None:
+            continue
+        times=absorptions.setdefault(worker_receiver_indexes[id(receiver)],[])
+        pulse=first
+        while pulse<end:
+            times.append((pulse*period+trajectory[1],pulse*period,index))
+            pulse+=1
+    for times in absorptions.values():
+        times.sort()
+    return absorptions,finish
+
+
+def run_parallel(circuit: LaserCircuit, processes: int | None = None) -> None:
+    '''
+    Works out the activation time, total energy and photons absorbed of
+    every receiver in circuit, with the photons followed by a pool of worker
+    processes. The results and clock of circuit are set as if solve had
+    been called.
+
+    Parameters
+    ----------
+    circuit   - the circuit to run
+    processes - the number of worker processes, defaults to the number of
+                cores
+    '''
+    if processes is None:
+        processes=os.cpu_count() or 1
+    for receiver in circuit.get_receivers():
+        receiver.reset()
+    circuit.activated_receivers=0
+    circuit.clock=0
+    shards=get_shards(circuit,processes*SHARDS_PER_PROCESS)
+    if len(shards)==0:
+        return
+    with multiprocessing.Pool(min(processes,len(shards)),initializer=init_worker,initargs=(circuit,)) as pool:
+        results=pool.map(run_shard,shards,1)
+    # the absorptions of each receiver from every shard
+    merged={}
+    for absorptions,finish in results:
+        circuit.clock=max(circuit.clock,finish)
+        for index,times in absorptions.items():
+            merged.setdefault(index,[]).append(times)
+    emitters=circuit.get_emitters()
+    receivers=circuit.get_receivers()
+    for index,shard_times in merged.items():
+        receiver=receivers[index]
+        circuit.activated_receivers+=1
+        for time,emitted,emitter_index in heapq.merge(*shard_times):
+            receiver.absorb_frequency(emitters[emitter_index].get_frequency(),time)
@@ -5,11 +5,25 @@ circuit board. Photons have a frequency (THz) and direction. They can interact
 with components in the circuit in which it may be absorbed. When a photon is
 absorbed, they no longer move.
 
+Photons are created in very large numbers, so they use __slots__ instead of a
+per-instance __dict__, share their symbol as a class attribute and store their
+direction as a small int code (see DIRECTIONS).
+
 '''
 
 
+# direction codes are indexes into DIRECTIONS, NO_DIRECTION is the code of a
+# photon whose emitter never had its pulse sequence set
+DIRECTIONS=('N','E','S','W',None)
+DIRECTION_CODES={'N':0,'E':1,'S':2,'W':3,None:4}
+NO_DIRECTION=4
+
+
 class Photon:
 
+    __slots__=('x','y','frequency','direction_code','absorbed','looping','mirror_states','pooled')
+    symbol='.'
+
 
     def __init__(self, x: int, y: int, frequency: int, direction: str):
         # only requires implementation once you reach RUN-MY-CIRCUIT
@@ -18,27 +32,63 @@ class Photon:
         frequency and direction. symbol is '.' and absorbed is False by
         default.
 
-        symbol:    str  - the symbol of this photon ('.')
+        symbol:    str  - the symbol of this photon ('.'), shared by every
+                          photon
         x:         int  - x position of this photon
         y:         int  - x position of this photon
         frequency: int  - the frequency (THz) of this photon
-        direction: str  - the direction in which this photon will travel 
-                          ('N', 'E', 'S' or 'W')
+        direction_code: int - the code of the direction in which this photon
+                          will travel, its index in DIRECTIONS. The direction
+                          property reads and writes it as 'N', 'E', 'S' or 'W'
         absorbed:  bool - whether or not this photon has been absorbed
+        looping:   bool - whether or not this photon is trapped going around
+                          the same path forever
+        mirror_states: set[tuple[int, int, int]] | None - the position and
+                          direction code this photon left each mirror it has
+                          been reflected off with, None until its first
+                          reflection
+        pooled:    bool - whether or not this photon belongs to a PhotonPool
+                          and is given back to it once absorbed
+
+        Parameters
+        ----------
+        x         - the x position to set this photon to
+        y         - the y position to set this photon to
+        frequency - the frequency to set this photon to
+        direction - the direction to set this photon to, a photon given
+                    any other direction than 'N', 'E', 'S' or 'W' has none
+                    and does not move
+        '''
+        self.x=x
+        self.y=y
+        self.frequency=frequency
+        self.direction_code=DIRECTION_CODES.get(direction,NO_DIRECTION)
+        self.absorbed=False
+        self.looping=False
+        self.mirror_states=None
+        self.pooled=False
+
+
+    def reuse(self, x: int, y: int, frequency: int, direction: str) -> None:
+        '''
+        Sets this photon back to the state of a new photon with the given
+        position, frequency and direction, so it can be emitted again. Used by
+        PhotonPool, pooled is left unchanged.
 
         Parameters
         ----------
         x         - the x position to set this photon to
         y         - the y position to set this photon to
         frequency - the frequency to set this photon to
-        direction - the direction to set this photon to
+        direction - the direction to set this photon to, as in __init__
         '''
-        self.symbol='.'
         self.x=x
         self.y=y
         self.frequency=frequency
-        self.direction=direction
+        self.direction_code=DIRECTION_CODES.get(direction,NO_DIRECTION)
         self.absorbed=False
+        self.looping=False
+        self.mirror_states=None
 
 
     def move(self, board_width: int, board_height: int) -> None:
@@ -58,22 +108,23 @@ class Photon:
         '''
         if self.is_absorbed():
             return
-        if self.direction=='N':
+        code=self.direction_code
+        if code==0:
             self.y-=1
             if self.y<0:
                 self.y+=1
                 self.got_absorbed()
-        if self.direction=='E':
+        elif code==1:
             self.x+=1
             if self.x==board_width:
                 self.x-=1
                 self.got_absorbed()
-        if self.direction=='W':
+        elif code==3:
             self.x-=1
             if self.x<0:
                 self.x+=1
                 self.got_absorbed()
-        if self.direction=='S':
+        elif code==2:
             self.y+=1
             if self.y==board_height:
                 self.y-=1
@@ -135,6 +186,38 @@ class Photon:
         return self.absorbed
 
 
+    def set_looping(self) -> None:
+        '''Updates the looping attribute to mark this photon as looping forever.'''
+        self.looping=True
+
+
+    def is_looping(self) -> bool:
+        '''Returns looping.'''
+        return self.looping
+
+
+    def visit_state(self) -> bool:
+        '''
+        Records this photon's current position and direction in
+        mirror_states. This is called after each reflection; since the path
+        of a photon only depends on its position and direction, leaving a
+        mirror the same way twice means the photon will go around the same
+        loop forever.
+
+        Returns
+        -------
+        True if this position and direction had already been recorded, else
+        False.
+        '''
+        state=(self.x,self.y,self.direction_code)
+        if self.mirror_states is None:
+            self.mirror_states=set()
+        if state in self.mirror_states:
+            return True
+        self.mirror_states.add(state)
+        return False
+
+
     def set_direction(self, direction: str) -> None:
         # only requires implementation once you reach RUN-MY-CIRCUIT
         '''
@@ -145,18 +228,27 @@ class Photon:
         ----------
         direction - the new direction to set for this photon
         '''
-        check='NEWS'
-        i=0
-        while i< len(check):
-            if direction==check[i]:
-                self.direction=direction
-            i+=1
+        if direction in DIRECTION_CODES and direction is not None:
+            self.direction_code=DIRECTION_CODES[direction]
 
 
     def get_direction(self) -> str:
         # only requires implementation once you reach RUN-MY-CIRCUIT
         '''Returns direction.'''
-        return self.direction
+        return DIRECTIONS[self.direction_code]
+
+
+    @property
+    def direction(self) -> str:
+        '''The direction of this photon as 'N', 'E', 'S', 'W' or None.'''
+        return DIRECTIONS[self.direction_code]
+
+
+    @direction.setter
+    def direction(self, direction: str) -> None:
+        # an invalid direction is ignored, the same as set_direction
+        if direction in DIRECTION_CODES:
+            self.direction_code=DIRECTION_CODES[direction]
 
         
     def get_frequency(self) -> int:
@@ -0,0 +1,72 @@
+from photon import Photon
+
+'''
+
+PhotonPool - Hands out photons for pulse trains and takes them back once they
+are absorbed, so a long run reuses the same photons instead of creating a new
+one for every pulse. The number of photons ever created is the most in flight
+at once, however many pulses are fired.
+
+'''
+
+
+class PhotonPool:
+
+
+    def __init__(self):
+        '''
+        Initialises an empty PhotonPool.
+
+        free:    list[Photon] - absorbed photons ready to be handed out again
+        created: int          - the number of photons this pool has created
+        '''
+        self.free=[]
+        self.created=0
+
+
+    def acquire(self, x: int, y: int, frequency: int, direction: str) -> Photon:
+        '''
+        Returns a photon with the given position, frequency and direction,
+        reusing a free photon if there is one.
+
+        Parameters
+        ----------
+        x         - the x position of the photon
+        y         - the y position of the photon
+        frequency - the frequency of the photon
+        direction - the direction of the photon
+
+        Returns
+        -------
+        A photon marked as pooled.
+        '''
+        if len(self.free)>0:
+            photon=self.free.pop()
+            photon.reuse(x,y,frequency,direction)
+            return photon
+        photon=Photon(x,y,frequency,direction)
+        photon.pooled=True
+        self.created+=1
+        return photon
+
+
+    def release(self, photon: Photon) -> None:
+        '''
+        Gives photon back to this pool. Nothing else should hold on to photon
+        once it has been released.
+
+        Parameters
+        ----------
+        photon - a photon returned by acquire
+        '''
+        self.free.append(photon)
+
+
+    def get_created(self) -> int:
+        '''Returns created.'''
+        return self.created
+
+
+    def get_free(self) -> int:
+        '''Returns the number of free photons.'''
+        return len(self.free)
@@ -11,6 +11,9 @@ activated. An activated receiver can keep absorbing photons.
 
 class Receiver:
 
+    __slots__=('symbol','id','x','y','total_energy','photons_absorbed','activated','activation_time')
+    component_type='receiver'
+
 
     def __init__(self, symbol: str, x: int, y: int):
         '''
@@ -18,8 +21,12 @@ class Receiver:
         component_type is 'receiver', total_energy is 0.0, photons_absorbed is 0, 
         activated is False and activation_time is 0 by default.
 
-        component_type:   str   - represents the type of component ('receiver')
-        symbol:           str   - the symbol of this receiver ('R0' to 'R9')
+        component_type:   str   - represents the type of component ('receiver'),
+                                  shared by every receiver
+        symbol:           str   - the symbol of this receiver, 'R' followed by
+                                  a number ('R0', 'R1', ..., 'R10', ...)
+        id:               int   - the number in this receiver's symbol, used
+                                  to order receivers (see symbol_to_id)
         x:                int   - x position of this receiver 
         y:                int   - y position of this receiver
         total_energy:     float - the total energy (eV) this receiver has absorbed 
@@ -34,17 +41,63 @@ class Receiver:
         symbol - the symbol to set this receiver to
         x      - the x position to set this receiver to
         y      - the y position to set this receiver to       
+
+        Raises
+        ------
+        ValueError if symbol is not a valid receiver symbol.
         '''
         self.symbol=symbol
+        self.id=Receiver.symbol_to_id(symbol)
         self.x=x
         self.y=y
-        self.component_type='receiver'
         self.total_energy=0.0
         self.photons_absorbed=0
         self.activated=False
         self.activation_time=0
 
 
+    def is_valid_symbol(symbol: str) -> bool:
+        '''
+        Returns whether or not symbol is a valid receiver symbol, which is 'R'
+        followed by a number with no leading zeros e.g. 'R0', 'R9' or 'R123'.
+
+        Parameters
+        ----------
+        symbol - the symbol to check
+        '''
+        if len(symbol)<2 or symbol[0]!='R':
+            return False
+        for digit in symbol[1:]:
+            if digit<'0' or digit>'9':
+                return False
+        return symbol=='R0' or symbol[1]!='0'
+
+
+    def symbol_to_id(symbol: str) -> int:
+        '''
+        Converts a receiver symbol into its id, the number after the 'R'.
+
+        >>> Receiver.symbol_to_id('R12')
+        12
+
+        Parameters
+        ----------
+        symbol - the receiver symbol to convert
+
+        Returns
+        -------
+        The id of the symbol.
+
+        Raises
+        ------
+        ValueError if symbol is not a valid receiver symbol (see
+        is_valid_symbol).
+        '''
+        if not Receiver.is_valid_symbol(symbol):
+            raise ValueError(f"receiver symbol must be 'R' followed by a number, not {symbol!r}")
+        return int(symbol[1:])
+
+
     def convert_frequency_to_energy(frequency: int) -> float:
         # this method has already been implemented for you
         '''
@@ -91,14 +144,37 @@ class Receiver:
         if photon.is_absorbed():
             return
         else:
-            self.total_energy+=Receiver.convert_frequency_to_energy(photon.get_frequency())
-            self.photons_absorbed+=1
-            if self.photons_absorbed ==1:
-                self.activated=True
-                self.activation_time=timestamp
+            self.absorb_frequency(photon.get_frequency(),timestamp)
             photon.got_absorbed()
 
 
+    def absorb_frequency(self, frequency: int, timestamp: int) -> None:
+        '''
+        Stores the energy of a photon with the given frequency absorbed at
+        timestamp (ns), updating total_energy and photons_absorbed. If this
+        is the first photon absorbed, activated and activation_time are also
+        updated.
+
+        Parameters
+        ----------
+        frequency - the frequency (THz) of the photon absorbed
+        timestamp - the time in nanoseconds when the photon was absorbed
+        '''
+        self.total_energy+=Receiver.convert_frequency_to_energy(frequency)
+        self.photons_absorbed+=1
+        if self.photons_absorbed ==1:
+            self.activated=True
+            self.activation_time=timestamp
+
+
+    def reset(self) -> None:
+        '''Clears everything this receiver has absorbed, as if it was new.'''
+        self.total_energy=0.0
+        self.photons_absorbed=0
+        self.activated=False
+        self.activation_time=0
+
+
 
     def is_activated(self) -> bool:
         # only requires implementation once you reach RUN-MY-CIRCUIT
@@ -131,8 +207,17 @@ class Receiver:
         'R0'
         >>> self.get_symbol()
         '0'
+        >>> self.symbol
+        'R12'
+        >>> self.get_symbol()
+        '12'
         '''
-        return self.symbol[1]
+        return self.symbol[1:]
+
+
+    def get_id(self) -> int:
+        '''Returns id.'''
+        return self.id
 
 
     def get_x(self) -> int:
@@ -146,7 +231,7 @@ class Receiver:
 
     def __lt__(self, other) -> bool:
         if isinstance(other, Receiver):
-            return self.get_symbol() < other.get_symbol()
+            return self.get_id() < other.get_id()
         return False
 
     
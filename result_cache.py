@@ -0,0 +1,232 @@
+import hashlib
+import json
+import sqlite3
+from laser_circuit import LaserCircuit
+from photon import Photon
+
+'''
+
+result_cache - Stores the results of running circuits in a local SQLite
+database, so a circuit that has already been run with the same pulse
+sequence is looked up instead of simulated again.
+
+Results are keyed by a canonical hash of the circuit (see circuit_key), which
+only depends on the size of the board, every component and every emitter's
+pulse settings, not on the order they were added in. Every engine gives the
+same results, so the engine used does not matter. The results stored are
+the clock when the circuit finished, the activation time, total energy
+and photons absorbed of every activated receiver, and where every looping
+photon is trapped. Looping photons are kept in the order run_circuit lists
+them: the first pulse of each emitter in emitter order, then every later
+pulse in the order it starts looping.
+
+The database is bounded by the total size of the results stored. Once it
+grows beyond max_bytes, the least recently used results are evicted.
+
+'''
+
+
+# changing what is hashed or stored must change this, so old results are
+# never looked up
+CACHE_VERSION=2
+
+# the default most bytes of results a ResultCache keeps
+MAX_CACHE_BYTES=64*1024*1024
+
+
+def circuit_key(circuit: LaserCircuit) -> str:
+    '''
+    Returns the canonical hash of circuit's board and pulse settings, as a
+    hex string. Components are hashed in a fixed order, so two circuits with
+    the same components have the same key however they were added.
+
+    Parameters
+    ----------
+    circuit - the circuit to hash
+    '''
+    lines=[f'VERSION {CACHE_VERSION}',f'SIZE {circuit.get_width()} {circuit.get_height()}']
+    for emitter in sorted(circuit.get_emitters(),key=lambda emitter:emitter.get_symbol()):
+        lines.append(f'EMITTER {emitter.get_symbol()} {emitter.get_x()} {emitter.get_y()} '
+                     f'{emitter.is_pulse_sequence_set()} {emitter.get_frequency()} {emitter.get_direction()} '
+                     f'{emitter.get_pulse_period()} {emitter.get_pulse_count()}')
+    for receiver in sorted(circuit.get_receivers(),key=lambda receiver:receiver.symbol):
+        lines.append(f'RECEIVER {receiver.symbol} {receiver.get_x()} {receiver.get_y()}')
+    for mirror in sorted(circuit.get_mirrors(),key=lambda mirror:(mirror.get_y(),mirror.get_x())):
+        lines.append(f'MIRROR {mirror.get_symbol()} {mirror.get_x()} {mirror.get_y()}')
+    return hashlib.sha256('\n'.join(lines).encode('utf-8')).hexdigest()
+
+
+def get_results(circuit: LaserCircuit) -> dict:
+    '''
+    Returns the results of a circuit that has finished running, as stored by
+    ResultCache.put. The looping photons are worked out from the
+    trajectories of the circuit, so they are the same whichever engine ran
+    it (or if it was solved without emitting any photons). They are in the
+    order run_circuit adds them to its photons: the first pulse of every
+    emitter is emitted into photons straight away, in emitter order, while
+    later pulses are pooled and only added once they start looping, by the
+    time they start looping, then the time they were fired, then emitter.
+
+    Parameters
+    ----------
+    circuit - the finished circuit
+
+    Returns
+    -------
+    A dict of the circuit's clock, a [symbol, activation time, total
+    energy, photons absorbed] list for each activated receiver and an
+    [x, y, direction] list for each looping photon.
+    '''
+    receivers=[]
+    for receiver in circuit.get_receivers():
+        if receiver.is_activated():
+            receivers.append([receiver.symbol,receiver.get_activation_time(),receiver.get_total_energy(),
+                              receiver.photons_absorbed])
+    # (whether the pulse is pooled, time it starts looping, time fired,
+    # emitter index, [x, y, direction]) of each looping pulse
+    pulses=[]
+    emitters=circuit.get_emitters()
+    i=0
+    while i<len(emitters):
+        emitter=emitters[i]
+        trajectory=circuit.get_trajectory(emitter.get_x(),emitter.get_y(),emitter.get_direction())
+        if trajectory[6]:
+            pulse=0
+            while pulse<emitter.get_pulse_count():
+                fired=pulse*emitter.get_pulse_period()
+                if pulse==0:
+                    pulses.append((False,0,fired,i,[trajectory[2],trajectory[3],trajectory[4]]))
+                else:
+                    pulses.append((True,fired+trajectory[1],fired,i,[trajectory[2],trajectory[3],trajectory[4]]))
+                pulse+=1
+        i+=1
+    pulses.sort(key=lambda pulse:pulse[:4])
+    looping=[pulse[4] for pulse in pulses]
+    return {'clock':circuit.clock,'receivers':receivers,'looping':looping}
+
+
+def set_results(circuit: LaserCircuit, results: dict) -> None:
+    '''
+    Sets the clock and receivers of circuit to results, as if it had been
+    run. The photons of circuit are replaced by the looping photons of
+    results, so print_looping_photons prints them.
+
+    Parameters
+    ----------
+    circuit - the circuit the results are for
+    results - the results returned by get_results
+    '''
+    for receiver in circuit.get_receivers():
+        receiver.reset()
+    circuit.activated_receivers=0
+    for symbol,activation_time,total_energy,photons_absorbed in results['receivers']:
+        receiver=circuit.receiver_symbols[symbol]
+        receiver.activated=True
+        receiver.activation_time=activation_time
+        receiver.total_energy=total_energy
+        receiver.photons_absorbed=photons_absorbed
+        circuit.activated_receivers+=1
+    circuit.photons=[]
+    for x,y,direction in results['looping']:
+        photon=Photon(x,y,0,direction)
+        photon.set_looping()
+        circuit.photons.append(photon)
+    circuit.clock=results['clock']
+
+
+class ResultCache:
+
+
+    def __init__(self, path: str, max_bytes: int = MAX_CACHE_BYTES):
+        '''
+        Initialises a ResultCache stored in the SQLite database at path,
+        creating it if it does not exist.
+
+        path:       str                - the path of the database
+        max_bytes:  int                - the most bytes of results to keep
+        connection: sqlite3.Connection - the open database
+
+        Parameters
+        ----------
+        path      - the path of the database
+        max_bytes - the most bytes of results to keep
+
+        Raises
+        ------
+        sqlite3.Error if the database could not be opened.
+        '''
+        self.path=path
+        self.max_bytes=max_bytes
+        self.connection=sqlite3.connect(path,timeout=30)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS results ('
+                                'key TEXT PRIMARY KEY, data TEXT NOT NULL, '
+                                'size INTEGER NOT NULL, last_used INTEGER NOT NULL)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+        self.connection.commit()
+
+
+    def next_use(self) -> int:
+        '''Returns a last_used value later than every stored result's.'''
+        row=self.connection.execute('SELECT MAX(last_used) FROM results').fetchone()
+        return (row[0] or 0)+1
+
+
+    def get(self, key: str) -> dict | None:
+        '''
+        Looks up the results stored for key, marking them as just used.
+
+        Parameters
+        ----------
+        key - the key returned by circuit_key
+
+        Returns
+        -------
+        The results as returned by get_results, or None if there are none.
+        '''
+        with self.connection:
+            row=self.connection.execute('SELECT data FROM results WHERE key=?',(key,)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute('UPDATE results SET last_used=? WHERE key=?',(self.next_use(),key))
+        return json.loads(row[0])
+
+
+    def put(self, key: str, results: dict) -> None:
+        '''
+        Stores results for key, then evicts the least recently used results
+        until the total size is at most max_bytes.
+
+        Parameters
+        ----------
+        key     - the key returned by circuit_key
+        results - the results returned by get_results
+        '''
+        data=json.dumps(results,separators=(',',':'))
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO results (key, data, size, last_used) VALUES (?, ?, ?, ?)',
+                                    (key,data,len(data),self.next_use()))
+            self.evict()
+
+
+    def evict(self) -> None:
+        '''Deletes the least recently used results until the total size is at most max_bytes.'''
+        total=self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total<=self.max_bytes:
+            return
+        evicted=[]
+        for key,size in self.connection.execute('SELECT key, size FROM results ORDER BY last_used'):
+            if total<=self.max_bytes:
+                break
+            evicted.append((key,))
+            total-=size
+        self.connection.executemany('DELETE FROM results WHERE key=?',evicted)
+
+
+    def get_size(self) -> int:
+        '''Returns the total size in bytes of the results stored.'''
+        return self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+
+
+    def close(self) -> None:
+        '''Closes the database.'''
+        self.connection.close()
@@ -4,6 +4,7 @@ from emitter import Emitter
 from receiver import Receiver
 from mirror import Mirror
 from laser_circuit import LaserCircuit
+from instrumentation import Collector
 '''
 run - Runs the entire program. It needs to take in the inputs and process them
 into setting up the circuit. The user can specify optional flags to perform
@@ -47,6 +48,265 @@ def is_add_my_mirrors_enabled(args: list[str]) -> bool:
     return False
 
 
+def is_event_driven_enabled(args: list[str]) -> bool:
+    '''
+    Returns whether or not '-EVENT-DRIVEN' is in args.
+    
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i=0
+    while i< len(args):
+        if args[i]=='-EVENT-DRIVEN':
+            return True
+        i+=1
+    return False
+
+
+def is_vectorized_enabled(args: list[str]) -> bool:
+    '''
+    Returns whether or not '-VECTORIZED' is in args.
+    
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i=0
+    while i< len(args):
+        if args[i]=='-VECTORIZED':
+            return True
+        i+=1
+    return False
+
+
+def is_solve_enabled(args: list[str]) -> bool:
+    '''
+    Returns whether or not '-SOLVE' is in args.
+    
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i=0
+    while i< len(args):
+        if args[i]=='-SOLVE':
+            return True
+        i+=1
+    return False
+
+
+def is_parallel_enabled(args: list[str]) -> bool:
+    '''
+    Returns whether or not '-PARALLEL' is in args.
+    
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i=0
+    while i< len(args):
+        if args[i]=='-PARALLEL':
+            return True
+        i+=1
+    return False
+
+
+def get_process_count(args: list[str]) -> int | None:
+    '''
+    Returns the number following '-PROCESSES' in args, which is the number of
+    worker processes used by -PARALLEL and -BATCH. Returns None, meaning one
+    per core, if it is not given or is not a positive integer.
+    
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i=0
+    while i< len(args)-1:
+        if args[i]=='-PROCESSES':
+            if args[i+1].isdigit() and int(args[i+1])>0:
+                return int(args[i+1])
+            print('Error: number of processes must be a positive integer')
+            break
+        i+=1
+    return None
+
+
+def is_instrument_enabled(args: list[str]) -> bool:
+    '''
+    Returns whether or not '-INSTRUMENT' is in args.
+    
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i=0
+    while i< len(args):
+        if args[i]=='-INSTRUMENT':
+            return True
+        i+=1
+    return False
+
+
+def get_batch_pattern(args: list[str]) -> str | None:
+    '''
+    Returns the argument following '-BATCH' in args, which is a directory or
+    glob pattern of pulse sequence files to run. Returns None if '-BATCH' is
+    not in args or nothing follows it.
+    
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i=0
+    while i< len(args)-1:
+        if args[i]=='-BATCH':
+            return args[i+1]
+        i+=1
+    return None
+
+
+def get_netlist_path(args: list[str]) -> str | None:
+    '''
+    Returns the argument following '-NETLIST' in args, which is the path of a
+    netlist file to load the circuit from instead of reading it from input.
+    Returns None if '-NETLIST' is not in args or nothing follows it.
+    
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i=0
+    while i< len(args)-1:
+        if args[i]=='-NETLIST':
+            return args[i+1]
+        i+=1
+    return None
+
+
+def get_checkpoint_path(args: list[str]) -> str | None:
+    '''
+    Returns the argument following '-CHECKPOINT' in args, which is the path
+    of the file run_circuit periodically saves the circuit to. Returns None
+    if '-CHECKPOINT' is not in args or nothing follows it.
+    
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i=0
+    while i< len(args)-1:
+        if args[i]=='-CHECKPOINT':
+            return args[i+1]
+        i+=1
+    return None
+
+
+def get_checkpoint_interval(args: list[str]) -> float:
+    '''
+    Returns the number following '-CHECKPOINT-INTERVAL' in args, which is the
+    number of seconds between checkpoints. Defaults to
+    checkpoint.CHECKPOINT_INTERVAL if it is not given, or if the number is
+    invalid.
+    
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    from checkpoint import CHECKPOINT_INTERVAL
+    i=0
+    while i< len(args)-1:
+        if args[i]=='-CHECKPOINT-INTERVAL':
+            if args[i+1].isdigit():
+                return float(args[i+1])
+            print('Error: checkpoint interval must be a non-negative integer')
+            break
+        i+=1
+    return CHECKPOINT_INTERVAL
+
+
+def get_trace_path(args: list[str]) -> str | None:
+    '''
+    Returns the argument following '-TRACE' in args, which is the path of the
+    file every event of the run is recorded to (see event_trace). Returns
+    None if '-TRACE' is not in args or nothing follows it.
+    
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i=0
+    while i< len(args)-1:
+        if args[i]=='-TRACE':
+            return args[i+1]
+        i+=1
+    return None
+
+
+def get_cache_path(args: list[str]) -> str | None:
+    '''
+    Returns the argument following '-CACHE' in args, which is the path of the
+    result cache (see result_cache) to look results up in before running the
+    circuit. Returns None if '-CACHE' is not in args or nothing follows it.
+    
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i=0
+    while i< len(args)-1:
+        if args[i]=='-CACHE':
+            return args[i+1]
+        i+=1
+    return None
+
+
+def get_resume_path(args: list[str]) -> str | None:
+    '''
+    Returns the argument following '-RESUME' in args, which is the path of a
+    checkpoint to resume running a circuit from. Returns None if '-RESUME'
+    is not in args or nothing follows it.
+    
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i=0
+    while i< len(args)-1:
+        if args[i]=='-RESUME':
+            return args[i+1]
+        i+=1
+    return None
+
+
+def get_frame_interval(args: list[str]) -> int | None:
+    '''
+    Returns how often run_circuit prints a frame. This is None if '-HEADLESS'
+    is in args, else the number following '-FRAME-INTERVAL' in args, where 0
+    means only the final frame. Defaults to 5 if neither is given, or if the
+    number is invalid.
+    
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    i=0
+    while i< len(args):
+        if args[i]=='-HEADLESS':
+            return None
+        i+=1
+    i=0
+    while i< len(args)-1:
+        if args[i]=='-FRAME-INTERVAL':
+            if args[i+1].isdigit():
+                return int(args[i+1])
+            print('Error: frame interval must be a non-negative integer')
+            break
+        i+=1
+    return 5
+
+
 def initialise_circuit() -> LaserCircuit:
     # only requires implementation once you reach GET-MY-INPUTS
     '''
@@ -72,7 +332,7 @@ def initialise_circuit() -> LaserCircuit:
     print(f'{width}x{height} board created.\n')
     print('Adding emitter(s)...')
     count=0
-    while count<10:
+    while True:
         x=input('> ')
         if x=='END EMITTERS':
             break
@@ -84,7 +344,7 @@ def initialise_circuit() -> LaserCircuit:
     print(f'{count} emitter(s) added.\n')
     print('Adding receiver(s)...')
     count=0
-    while count<10:
+    while True:
         x=input('> ')
         if x=='END RECEIVERS':
             break
@@ -103,7 +363,8 @@ def set_pulse_sequence(circuit: LaserCircuit, file_obj) -> None:
     The lines for the pulse sequence will come from the a file named
     /home/input/<file_name>.in. 
     You should be using the functions you have implemented in the input_parser module 
-    to handle validating lines from the file.
+    to handle validating lines from the file. A line may end with a period
+    and count to set a pulse train, e.g. 'A 100 S 5 10'.
 
     Parameter
     ---------
@@ -111,41 +372,33 @@ def set_pulse_sequence(circuit: LaserCircuit, file_obj) -> None:
     file_obj - A file like object returned by the open()
     '''
     print('Setting pulse sequence...')
-    name=[]
+    # emitters still waiting for a pulse sequence, in order, as dict keys so
+    # they can be removed without searching
+    name={}
     i=0
     count=0
     while i< len(circuit.get_emitters()):
-        name+=circuit.get_emitters()[i].get_symbol()
+        name[circuit.get_emitters()[i].get_symbol()]=None
         i+=1
     check=True
     while check:
         line=file_obj.readline()
         if line !='':
-            remain='-- ('
-            j=0
-            while j< len(name):
-                remain+=name[j]+', '
-                j+=1
-            print(remain.strip(', ')+')')   
+            print('-- ('+', '.join(name)+')')
             count+=1
             print(f'Line {count}: {line.strip()}')
             pulse=input_parser.parse_pulse_sequence(line)
             if pulse==None:
                 continue
-            symbol, frequency,direction=pulse
-            i=0
-            while i< len(circuit.get_emitters()):
-                if symbol==circuit.get_emitters()[i].get_symbol():
-                    if circuit.get_emitters()[i].is_pulse_sequence_set():
-                        print(f"Error: emitter '{symbol}' already has its pulse sequence set")
-                        break
-                    else:
-                        circuit.get_emitters()[i].set_pulse_sequence(frequency,direction)
-                        name.remove(symbol)
-                        break
-                i+=1
-                if i==len(circuit.get_emitters()):
-                    print(f"Error: emitter '{symbol}' does not exist")
+            symbol, frequency,direction,period,pulse_count=pulse
+            emitter=circuit.get_emitter(symbol)
+            if emitter is None:
+                print(f"Error: emitter '{symbol}' does not exist")
+            elif emitter.is_pulse_sequence_set():
+                print(f"Error: emitter '{symbol}' already has its pulse sequence set")
+            else:
+                emitter.set_pulse_sequence(frequency,direction,period,pulse_count)
+                name.pop(symbol)
         else:
             print('Pulse sequence set.')
             check=False
@@ -185,24 +438,213 @@ def main(args: list[str]) -> None:
     ----------
     args - the command line arguments of the program
     '''
-    run=initialise_circuit()
-    if is_add_my_mirrors_enabled(args):
-        print('<ADD-MY-MIRRORS FLAG DETECTED!>')
+    resume_path=get_resume_path(args)
+    if resume_path is not None:
+        resume_circuit(args,resume_path)
+        return
+    netlist_path=get_netlist_path(args)
+    has_pulses=False
+    if netlist_path is not None:
+        import netlist_loader
+        print('<NETLIST FLAG DETECTED!>')
         print()
-        add_mirrors(run)
+        try:
+            with open(netlist_path,'r') as f:
+                loaded=netlist_loader.load_netlist(f)
+        except OSError:
+            print(f'Error: -NETLIST flag detected but {netlist_path} could not be read')
+            return
+        if loaded is None:
+            return
+        run,has_pulses=loaded
         print()
+    else:
+        run=initialise_circuit()
+        if is_add_my_mirrors_enabled(args):
+            print('<ADD-MY-MIRRORS FLAG DETECTED!>')
+            print()
+            add_mirrors(run)
+            print()
     run.print_board()
     print()
+    pattern=get_batch_pattern(args)
+    if pattern is not None:
+        import batch_runner
+        print('<BATCH FLAG DETECTED!>')
+        print()
+        paths=batch_runner.find_pulse_files(pattern)
+        print(f'Running {len(paths)} pulse sequence file(s)...')
+        batch_runner.write_batch_results(batch_runner.run_batch(run,paths,get_process_count(args)))
+        print('Results written to /home/output/batch_results.out')
+        return
     if is_run_my_circuit_enabled(args):
         print('<RUN-MY-CIRCUIT FLAG DETECTED!>')
         print()
+        if not has_pulses:
+            try:
+                with open('/home/input/pulse_sequence.in','r') as f:
+                    set_pulse_sequence(run,f)
+                    print()
+            except FileNotFoundError:
+                print('Error: -RUN-MY-CIRCUIT flag detected but /home/input/pulse_sequence.in does not exist')
+                return
+        if is_instrument_enabled(args):
+            run.set_collector(Collector())
+        cache_path=get_cache_path(args)
+        if cache_path is not None:
+            run_with_cache(run,args,cache_path)
+        else:
+            run_with_flags(run,args)
+
+
+def run_with_flags(circuit: LaserCircuit, args: list[str]) -> None:
+    '''
+    Runs circuit from the start with the method chosen by the flags in args.
+    
+    Parameters
+    ----------
+    circuit - the circuit to run
+    args    - the command line arguments of the program
+    '''
+    if is_solve_enabled(args):
+        circuit.solve()
+        circuit.print_activation_times()
+        circuit.print_total_energy()
+    elif is_parallel_enabled(args):
+        import parallel_runner
+        parallel_runner.run_parallel(circuit,get_process_count(args))
+        print(f'{circuit.clock}ns: {circuit.activated_receivers}/{len(circuit.get_receivers())} receiver(s) activated.')
+        print()
+        circuit.print_activation_times()
+        circuit.print_total_energy()
+    else:
+        run_with_engine(circuit,args,False)
+
+
+def run_with_cache(circuit: LaserCircuit, args: list[str], path: str) -> None:
+    '''
+    Looks the results of circuit up in the result cache at path, printing
+    them instead of running circuit if they are found. Every output file a
+    run writes is written again, so none are left over from an earlier run.
+    Else, circuit is run as usual with run_with_flags and its results are
+    stored in the cache.
+    
+    Parameters
+    ----------
+    circuit - the circuit to run
+    args    - the command line arguments of the program
+    path    - the path of the result cache
+    '''
+    import sqlite3
+    import result_cache
+    try:
+        cache=result_cache.ResultCache(path)
+    except sqlite3.Error:
+        print(f'Error: -CACHE flag detected but {path} could not be opened')
+        run_with_flags(circuit,args)
+        return
+    try:
+        key=result_cache.circuit_key(circuit)
+        try:
+            results=cache.get(key)
+        except sqlite3.Error:
+            print(f'Error: -CACHE flag detected but {path} could not be read')
+            run_with_flags(circuit,args)
+            return
+        if results is not None:
+            print('<CACHE HIT!>')
+            print()
+            result_cache.set_results(circuit,results)
+            circuit.print_emit_photons()
+            print(f'{circuit.clock}ns: {circuit.activated_receivers}/{len(circuit.get_receivers())} receiver(s) activated.')
+            print()
+            circuit.print_activation_times()
+            circuit.print_total_energy()
+            circuit.print_looping_photons()
+        else:
+            run_with_flags(circuit,args)
+            try:
+                cache.put(key,result_cache.get_results(circuit))
+            except sqlite3.Error:
+                print(f'Error: results could not be stored in {path}')
+    finally:
+        cache.close()
+
+
+def get_checkpointer(args: list[str]):
+    '''
+    Returns a checkpoint.CheckpointWriter if '-CHECKPOINT' is in args, else
+    None.
+    
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    '''
+    path=get_checkpoint_path(args)
+    if path is None:
+        return None
+    from checkpoint import CheckpointWriter
+    return CheckpointWriter(path,get_checkpoint_interval(args))
+
+
+def run_with_engine(circuit: LaserCircuit, args: list[str], resume: bool) -> None:
+    '''
+    Runs circuit with the engine chosen by the flags in args.
+    
+    Parameters
+    ----------
+    circuit - the circuit to run
+    args    - the command line arguments of the program
+    resume  - whether circuit was restored from a checkpoint
+    '''
+    if is_vectorized_enabled(args) and not is_event_driven_enabled(args):
         try:
-            with open('/home/input/pulse_sequence.in','r') as f:
-                set_pulse_sequence(run,f)
-                print()
-                run.run_circuit()
-        except FileNotFoundError:
-            print('Error: -RUN-MY-CIRCUIT flag detected but /home/input/pulse_sequence.in does not exist')
+            import vectorized_engine
+        except ImportError:
+            print('Error: -VECTORIZED flag detected but NumPy is not installed')
+            return
+    trace_path=get_trace_path(args)
+    if trace_path is not None:
+        from event_trace import EventTrace
+        try:
+            circuit.set_tracer(EventTrace(trace_path))
+        except OSError:
+            print(f'Error: -TRACE flag detected but {trace_path} could not be written')
+            return
+    if is_event_driven_enabled(args):
+        circuit.run_circuit('event',resume=resume)
+    elif is_vectorized_enabled(args):
+        circuit.run_circuit('vectorized',get_frame_interval(args),resume=resume)
+    else:
+        circuit.run_circuit('tick',get_frame_interval(args),get_checkpointer(args),resume)
+
+
+def resume_circuit(args: list[str], path: str) -> None:
+    '''
+    Restores the circuit saved in the checkpoint at path and carries on
+    running it.
+    
+    Parameters
+    ----------
+    args - the command line arguments of the program
+    path - the path of the checkpoint
+    '''
+    import checkpoint
+    print('<RESUME FLAG DETECTED!>')
+    print()
+    try:
+        circuit=checkpoint.load(path)
+    except OSError:
+        print(f'Error: -RESUME flag detected but {path} could not be read')
+        return
+    except ValueError as error:
+        print(f'Error: {path}: {error}')
+        return
+    circuit.print_board()
+    print()
+    if is_instrument_enabled(args):
+        circuit.set_collector(Collector())
+    run_with_engine(circuit,args,True)
 
     
     
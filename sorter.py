@@ -1,16 +1,111 @@
+import collections
+import heapq
 from emitter import Emitter
 from receiver import Receiver
 
 '''
 sorter - A module that provides sorting functions for you to use.
+
+The activation time and total energy sorts give exactly the order the
+original exchange sorts gave, including how ties are ordered, but make
+O(n log n) comparisons instead of O(n^2). The top_* functions return only the first
+k receivers of the matching sort, in O(n log k) time plus the cost of
+ordering the receivers tied with the last one returned.
 '''
 
+def symbol_key(receiver: Receiver) -> int:
+    '''Returns the key receivers are sorted by symbol with.'''
+    return receiver.get_id()
+
+
+def activation_time_key(receiver: Receiver) -> int:
+    '''Returns the key receivers are sorted by activation time with, in ascending order.'''
+    return receiver.get_activation_time()
+
+
+def total_energy_key(receiver: Receiver) -> float:
+    '''Returns the key receivers are sorted by total energy with, in descending order.'''
+    return -receiver.get_total_energy()
+
+
+def exchange_order(items: list, key) -> list:
+    '''
+    Returns a new list of items in the order this exchange sort leaves them
+    in, without running it:
+
+        for i in range(len(items)):
+            for j in range(i, len(items)):
+                if key(items[i]) > key(items[j]):
+                    items[i], items[j] = items[j], items[i]
+
+    The keys end up in ascending order, but the exchange sort is not stable,
+    so equal keys are not always left in the order they were given in.
+
+    Only the items with a smaller key affect the order of the items tied on
+    a key, and only through how many of them lie between each tied item and
+    the next. While the smaller items are being placed at the front, each
+    pass that starts at a tied item moves it to the slot of the next smaller
+    item. So after the smaller items between the r-th and (r+1)-th tied
+    items are placed, the first r+1 tied items sit next to each other,
+    rotated by that number modulo r+1.
+
+    Parameters
+    ----------
+    items - the items to order
+    key   - returns the key of an item to compare
+
+    Returns
+    -------
+    A new list of the same items, in the order the exchange sort gives.
+    '''
+    keys=[key(item) for item in items]
+    # the positions of the items with each key, in the order they were given
+    groups={}
+    i=0
+    while i<len(items):
+        groups.setdefault(keys[i],[]).append(i)
+        i+=1
+    # counts the items with a smaller key than the group being ordered, by
+    # position, as a Fenwick tree
+    tree=[0]*(len(items)+1)
+    smaller=0
+    new_list=[]
+    for value in sorted(groups):
+        positions=groups[value]
+        if len(positions)==1:
+            new_list.append(items[positions[0]])
+        else:
+            # the number of smaller items before each tied item
+            counts=[]
+            for position in positions:
+                count=0
+                while position>0:
+                    count+=tree[position]
+                    position-=position&-position
+                counts.append(count)
+            order=collections.deque()
+            r=0
+            while r<len(positions):
+                order.append(positions[r])
+                following=counts[r+1] if r+1<len(positions) else smaller
+                order.rotate(-((following-counts[r])%(r+1)))
+                r+=1
+            for position in order:
+                new_list.append(items[position])
+        for position in positions:
+            position+=1
+            while position<=len(items):
+                tree[position]+=1
+                position+=position&-position
+        smaller+=len(positions)
+    return new_list
+
+
 def sort_receivers_by_symbol(receivers: list[Receiver]) -> list[Receiver]:
-    # this method has already been implemented for you
     '''
     This is a helper function which returns a new list of the same receivers
-    passed in, sorted by their symbol in ascending order. This is used to resolve
-    ties when sorting by other values.
+    passed in, sorted by their symbol in ascending order. Symbols are compared
+    by their number, so 'R10' comes after 'R9'.
 
     Parameters
     ----------
@@ -21,35 +116,29 @@ def sort_receivers_by_symbol(receivers: list[Receiver]) -> list[Receiver]:
     A new list containing the same receivers, sorted by their symbol in
     ascending order.
     '''
-    # copy the receivers objects into a new list so we don't modify the original
-    new_list = receivers.copy()
-
-    # perform a bubble sort
-    i = 0
-    # traverse through all receivers in the list
-    while i < len(new_list):
-        j = i
-        while j < len(new_list):
-            # compare the symbols of the two adjacent receivers
-            # swap them if the component at the front has a larger symbol
-            if new_list[i].get_symbol() > new_list[j].get_symbol():
-                # swap the positions of the receivers in the list
-                temp = new_list[i]
-                new_list[i] = new_list[j]
-                new_list[j] = temp
-            j += 1
-            # at this point, all elements from 0 to i is sorted
-        i += 1
+    return sorted(receivers,key=symbol_key)
 
-    return new_list
+
+def sort_receivers_for_ties(receivers: list[Receiver]) -> list[Receiver]:
+    '''
+    Returns a new list of the same receivers passed in, sorted by their symbol
+    compared as a string, so 'R10' comes before 'R2'. This is the order the
+    original sorts started from before sorting by activation time or total
+    energy, which decides how ties are ordered.
+
+    Parameters
+    ----------
+    receivers - a list of receivers
+    '''
+    return sorted(receivers,key=lambda receiver:receiver.symbol)
 
 
 def sort_receivers_by_activation_time(receivers: list[Receiver]) -> list[Receiver]:
-    # this method has already been implemented for you
     '''
     This function returns a new list of the same receivers passed in, sorted by
-    their activation time in ascending order. If there's any ties, they are
-    then sorted by symbol in asecnding order.
+    their activation time in ascending order. Ties are left in the order the
+    original exchange sort left them in (see exchange_order), starting from
+    sort_receivers_for_ties.
 
     Parameters
     ----------
@@ -58,33 +147,17 @@ def sort_receivers_by_activation_time(receivers: list[Receiver]) -> list[Receive
     Returns
     -------
     A new list containing the same receivers, sorted by their activation times
-    in ascending order, followed by a sorting of their symbol in ascending order.
-    '''
-    # sort our receivers by symbol to resolve ties
-    new_list = sort_receivers_by_symbol(receivers)    
-
-    i = 0
-    while i < len(new_list):
-        j = i
-        while j < len(new_list):
-            # compare the activation time of the two adjacent receivers
-            # swap them if the receiver at the front has a larger activation time
-            if new_list[i].get_activation_time() > new_list[j].get_activation_time():
-                temp = new_list[i]
-                new_list[i] = new_list[j]
-                new_list[j] = temp
-            j += 1
-        i += 1
-
-    return new_list
+    in ascending order.
+    '''
+    return exchange_order(sort_receivers_for_ties(receivers),activation_time_key)
 
 
 def sort_receivers_by_total_energy(receivers: list[Receiver]) -> list[Receiver]:
-    # this method has already been implemented for you
     '''
     This function returns a new list of the same receivers passed in, sorted by
-    their total energy in ascending order. If there's any ties, they are
-    then sorted by symbol in asecnding order.
+    their total energy in descending order. Ties are left in the order the
+    original exchange sort left them in (see exchange_order), starting from
+    sort_receivers_for_ties.
 
     Parameters
     ----------
@@ -93,22 +166,66 @@ def sort_receivers_by_total_energy(receivers: list[Receiver]) -> list[Receiver]:
     Returns
     -------
     A new list containing the same receivers, sorted by their total energy in
-    descending order, followed by a sorting of their symbol in ascending order.
-    '''
-    # sort our receivers by symbol to resolve ties
-    new_list = sort_receivers_by_symbol(receivers)
-
-    i = 0
-    while i < len(new_list):
-        j = i
-        while j < len(new_list):
-            # compare the total energy of the two adjacent receivers
-            # swap them if the receiver at the front has a smaller total energy
-            if new_list[i].get_total_energy() < new_list[j].get_total_energy():
-                temp = new_list[i]
-                new_list[i] = new_list[j]
-                new_list[j] = temp
-            j += 1
-        i += 1
+    descending order.
+    '''
+    return exchange_order(sort_receivers_for_ties(receivers),total_energy_key)
 
-    return new_list
+
+def top_receivers(receivers: list[Receiver], k: int, key) -> list[Receiver]:
+    '''
+    Returns the first k receivers of sorting receivers by key the same way as
+    sort_receivers_by_activation_time, without sorting the rest. The order
+    of the receivers with a key up to the k-th smallest only depends on
+    each other, so only they are ordered.
+
+    Parameters
+    ----------
+    receivers - a list of receivers
+    k         - the number of receivers to return
+    key       - returns the key of a receiver to sort by
+
+    Returns
+    -------
+    A new list of at most k receivers.
+    '''
+    if k<=0 or len(receivers)==0:
+        return []
+    last=heapq.nsmallest(k,map(key,receivers))[-1]
+    leading=[receiver for receiver in receivers if key(receiver)<=last]
+    return exchange_order(sort_receivers_for_ties(leading),key)[:k]
+
+
+def top_receivers_by_activation_time(receivers: list[Receiver], k: int) -> list[Receiver]:
+    '''
+    Returns the first k receivers of sort_receivers_by_activation_time without
+    sorting the rest.
+
+    Parameters
+    ----------
+    receivers - a list of receivers
+    k         - the number of receivers to return
+
+    Returns
+    -------
+    A new list of at most k receivers, in the same order as
+    sort_receivers_by_activation_time.
+    '''
+    return top_receivers(receivers,k,activation_time_key)
+
+
+def top_receivers_by_total_energy(receivers: list[Receiver], k: int) -> list[Receiver]:
+    '''
+    Returns the first k receivers of sort_receivers_by_total_energy without
+    sorting the rest.
+
+    Parameters
+    ----------
+    receivers - a list of receivers
+    k         - the number of receivers to return
+
+    Returns
+    -------
+    A new list of at most k receivers, in the same order as
+    sort_receivers_by_total_energy.
+    '''
+    return top_receivers(receivers,k,total_energy_key)
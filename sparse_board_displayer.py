@@ -0,0 +1,194 @@
+import sys
+from emitter import Emitter
+from receiver import Receiver
+from photon import Photon
+from mirror import Mirror
+
+'''
+SparseBoardDisplayer - A helper class used to display very large circuit
+boards. It has the same methods as BoardDisplayer, but only stores the cells
+that hold a component or photon, so its memory use does not depend on the
+size of the board.
+
+Printing the whole of a very large board is not useful, so print_board only
+prints the part of the board inside the viewport, which is materialised into
+dense rows when needed. Like BoardDisplayer, printed rows are cached and only
+rows that have changed are rebuilt, and components are drawn as the last
+character of their symbol, so 'R2' and 'R12' look the same.
+
+'''
+
+
+# the default size of the viewport, starting from the top left of the board
+VIEWPORT_WIDTH=120
+VIEWPORT_HEIGHT=60
+
+
+class SparseBoardDisplayer:
+
+
+    def __init__(self, width: int, height: int):
+        '''
+        Initialises a SparseBoardDisplayer instance given a width and height
+        which is the size of the circuit board. The viewport starts at the top
+        left of the board and is at most VIEWPORT_WIDTH x VIEWPORT_HEIGHT.
+
+        width:      int                       - the width of this board
+        height:     int                       - the height of this board
+        board:      dict[int, dict[int, str]] - the symbol of each occupied
+                                                cell, keyed by y then x
+        viewport:   tuple[int, int, int, int] - the (x, y, width, height) of
+                                                the part of the board printed
+        rows:       dict[int, str]            - each printed row of the
+                                                viewport including its border,
+                                                keyed by y
+        dirty_rows: set[int]                  - rows of the viewport changed
+                                                since rows was last rebuilt
+
+        Parameters
+        ----------
+        width  - the width to set this board to
+        height - the height to set this board to
+        '''
+        self.width=width
+        self.height=height
+        self.board=self.create_board()
+        self.viewport=(0,0,min(width,VIEWPORT_WIDTH),min(height,VIEWPORT_HEIGHT))
+        self.rows={}
+        self.dirty_rows=set(range(self.viewport[3]))
+
+
+    def create_board(self) -> dict[int, dict[int, str]]:
+        '''Returns an empty board, with no occupied cells.'''
+        return {}
+
+
+    def get_cell(self, x: int, y: int) -> str:
+        '''Returns the symbol on the board at (x, y).'''
+        row=self.board.get(y)
+        if row is None:
+            return ' '
+        return row.get(x,' ')
+
+
+    def set_cell(self, x: int, y: int, symbol: str) -> None:
+        '''
+        Sets the symbol on the board at (x, y), marking its row as dirty if it
+        is inside the viewport.
+
+        Parameters
+        ----------
+        x      - the x position of the cell
+        y      - the y position of the cell
+        symbol - the single character to store in the cell
+        '''
+        row=self.board.get(y)
+        if row is None:
+            row={}
+            self.board[y]=row
+        row[x]=symbol
+        viewport_x,viewport_y,viewport_width,viewport_height=self.viewport
+        if viewport_y<=y<viewport_y+viewport_height and viewport_x<=x<viewport_x+viewport_width:
+            self.dirty_rows.add(y)
+
+
+    def set_viewport(self, x: int, y: int, width: int, height: int) -> None:
+        '''
+        Sets the part of the board printed by print_board, clipped to the
+        bounds of the board.
+
+        Parameters
+        ----------
+        x      - the x position of the left column of the viewport
+        y      - the y position of the top row of the viewport
+        width  - the number of columns in the viewport
+        height - the number of rows in the viewport
+        '''
+        x=max(0,min(x,self.width))
+        y=max(0,min(y,self.height))
+        self.viewport=(x,y,max(0,min(width,self.width-x)),max(0,min(height,self.height-y)))
+        self.rows={}
+        self.dirty_rows=set(range(y,y+self.viewport[3]))
+
+
+    def materialise(self, x: int, y: int, width: int, height: int) -> list[list[str]]:
+        '''
+        Returns the given part of the board as a dense list of list of
+        strings, in the same layout as BoardDisplayer.board.
+
+        Parameters
+        ----------
+        x      - the x position of the left column to include
+        y      - the y position of the top row to include
+        width  - the number of columns to include
+        height - the number of rows to include
+
+        Returns
+        -------
+        A list of height rows, each a list of width symbols.
+        '''
+        board=[]
+        i=y
+        while i<y+height:
+            line=[' ']*width
+            row=self.board.get(i)
+            if row is not None:
+                for column,symbol in row.items():
+                    if x<=column<x+width:
+                        line[column-x]=symbol
+            board.append(line)
+            i+=1
+        return board
+
+
+    def get_photon_cells(self) -> list[tuple[int, int]]:
+        '''Returns the (x, y) position of every cell showing a photon's symbol.'''
+        cells=[]
+        for y,row in self.board.items():
+            for x,symbol in row.items():
+                if symbol==Photon.symbol:
+                    cells.append((x,y))
+        return cells
+
+
+    def add_component_to_board(self, component: Emitter | Receiver | Mirror) -> None:
+        '''
+        Adds the last character of the component's symbol on the board at its
+        assigned position.
+
+        Parameters
+        ----------
+        component: the component to add its symbol on the board
+        '''
+        self.set_cell(component.get_x(),component.get_y(),component.get_symbol()[-1])
+
+
+    def add_photon_to_board(self, photon: Photon) -> None:
+        '''
+        Adds the symbol of the photon on the board at its current position,
+        unless there already is a component on the board at its position.
+
+        Parameters
+        ----------
+        photon: the photon to add its symbol on the board
+        '''
+        if self.get_cell(photon.get_x(),photon.get_y())==' ':
+            self.set_cell(photon.get_x(),photon.get_y(),photon.get_symbol())
+
+
+    def print_board(self) -> None:
+        '''
+        Prints the part of the board inside the viewport with a border, in
+        the same format as BoardDisplayer.print_board.
+        '''
+        x,y,width,height=self.viewport
+        for i in self.dirty_rows:
+            self.rows[i]='|'+''.join(self.materialise(x,i,width,1)[0])+'|'
+        self.dirty_rows.clear()
+        lines=[]
+        i=y
+        while i<y+height:
+            lines.append(self.rows[i])
+            i+=1
+        border='+'+'-'*width+'+'
+        sys.stdout.write(border+'\n'+'\n'.join(lines)+('\n' if height>0 else '')+border+'\n')
@@ -6,9 +6,29 @@ correctly.
 '''
 
 
+import contextlib
+import os
+import tempfile
+import io
+import sorter
+import checkpoint
+import batch_runner
+import result_cache
 from laser_circuit import LaserCircuit
-from circuit_for_testing import get_my_lasercircuit
+from circuit_for_testing import get_my_lasercircuit, get_my_looping_lasercircuit, get_my_double_looping_lasercircuit
 from run import set_pulse_sequence
+from input_parser import parse_emitter, parse_receiver, parse_pulse_sequence
+from receiver import Receiver
+from photon import Photon
+from mirror import Mirror, REFLECTIONS
+from emitter import Emitter
+from board_displayer import BoardDisplayer
+from sparse_board_displayer import SparseBoardDisplayer
+from netlist_loader import load_netlist
+from circuit_generator import generate_netlist, generate_circuit
+from instrumentation import Collector
+from event_trace import EventTrace, TraceReplay, ABSORB
+from parallel_runner import get_shards, run_parallel
 
 
 def positive_test_1(my_circuit: LaserCircuit, pulse_file_path: str) -> None: 
@@ -168,6 +188,720 @@ def edge_test_2(my_circuit: LaserCircuit, pulse_file_path: str) -> None:
     
     file_obj.close()
 
+def event_engine_test(tick_circuit: LaserCircuit, event_circuit: LaserCircuit, pulse_file_path: str) -> None:
+    """Checks the event-driven engine gives the same results as ticking.
+
+    Parameters
+    ----------
+    tick_circuit    - the circuit instance to run with tick
+    event_circuit   - an identical circuit instance to run with run_events
+    pulse_file_path - path to the pulse sequence file
+    """
+    for my_circuit in [tick_circuit, event_circuit]:
+        file_obj = open(pulse_file_path)
+        set_pulse_sequence(my_circuit, file_obj)
+        file_obj.close()
+        my_circuit.emit_photons()
+    while not tick_circuit.is_finished():
+        tick_circuit.tick()
+    event_circuit.run_events()
+
+    assert event_circuit.clock == tick_circuit.clock, 'Circuits finished at different times'
+    for tick_receiver, event_receiver in zip(tick_circuit.receivers, event_circuit.receivers):
+        assert event_receiver.get_activation_time() == tick_receiver.get_activation_time(), 'Receiver has wrong activation time'
+        assert event_receiver.get_total_energy() == tick_receiver.get_total_energy(), 'Receiver has wrong total energy'
+        assert event_receiver.photons_absorbed == tick_receiver.photons_absorbed, 'Receiver absorbed wrong number of photons'
+
+
+def looping_test(my_circuit: LaserCircuit) -> None:
+    """Checks a photon trapped between four mirrors is marked as looping.
+
+    Parameters
+    ----------
+    my_circuit - the looping circuit instance for testing
+    """
+    my_circuit.emitters[0].set_pulse_sequence(100, 'E')
+    my_circuit.emitters[1].set_pulse_sequence(200, 'E')
+    my_circuit.emit_photons()
+    while not my_circuit.is_finished():
+        my_circuit.tick()
+
+    assert my_circuit.photons[0].is_looping(), 'Photon from A should be looping'
+    assert not my_circuit.photons[0].is_absorbed(), 'Photon from A should not be absorbed'
+    assert my_circuit.photons[1].is_absorbed(), 'Photon from B should be absorbed'
+    assert not my_circuit.photons[1].is_looping(), 'Photon from B should not be looping'
+    assert my_circuit.receivers[0].get_activation_time() == 9, 'R0 has wrong activation time'
+
+
+def counter_test(my_circuit: LaserCircuit) -> None:
+    """Checks the live photon and activated receiver counters after absorption, looping and reset.
+
+    Parameters
+    ----------
+    my_circuit - the looping circuit instance for testing
+    """
+    my_circuit.emitters[0].set_pulse_sequence(100, 'E', 3, 2)
+    my_circuit.emitters[1].set_pulse_sequence(200, 'E', 4, 2)
+    my_circuit.emit_photons()
+    assert my_circuit.live_photons == 2, 'Both first pulses should be live'
+    counts = {}
+    while not my_circuit.is_finished():
+        my_circuit.tick()
+        counts[my_circuit.clock] = (my_circuit.live_photons, my_circuit.activated_receivers)
+        activated = len([receiver for receiver in my_circuit.receivers if receiver.is_activated()])
+        assert my_circuit.activated_receivers == activated, f'Wrong activated receivers at {my_circuit.clock}ns'
+    assert counts[8] == (4, 0), 'Every pulse should be live before R0 absorbs one'
+    assert counts[9] == (3, 1), 'R0 absorbing a photon should activate it'
+    assert counts[13] == (2, 1), 'R0 absorbing another photon should not activate it again'
+    assert counts[16] == (1, 1), 'Looping photon from A should no longer be live'
+    assert counts[19] == (0, 1), 'Every photon should be absorbed or looping'
+
+    my_circuit.reset()
+    assert my_circuit.live_photons == 0, 'reset should clear the live photons'
+    assert my_circuit.activated_receivers == 0, 'reset should clear the activated receivers'
+    assert my_circuit.is_finished(), 'Circuit with nothing emitted should be finished'
+
+
+def active_photon_test(my_circuit: LaserCircuit) -> None:
+    """Checks active_photons only holds the photons in flight, in order, while photons keeps them for reporting.
+
+    Parameters
+    ----------
+    my_circuit - the looping circuit instance for testing
+    """
+    my_circuit.emitters[0].set_pulse_sequence(100, 'E', 3, 2)
+    my_circuit.emitters[1].set_pulse_sequence(200, 'E', 4, 2)
+    my_circuit.emit_photons()
+    first_a, first_b = my_circuit.photons
+    assert my_circuit.active_photons == [first_a, first_b], 'First pulses should be active'
+    while my_circuit.clock < 4:
+        my_circuit.tick()
+    second_a, second_b = my_circuit.active_photons[2:]
+    assert second_a.pooled and second_b.pooled, 'Later pulses should come from the pool'
+    assert my_circuit.active_photons == [first_a, first_b, second_a, second_b], 'Pulses should be added in the order they are fired'
+
+    while my_circuit.clock < 9:
+        my_circuit.tick()
+    assert first_b.is_absorbed(), 'First pulse of B should be absorbed'
+    assert my_circuit.active_photons == [first_a, second_a, second_b], 'Absorbed photon should be dropped keeping the order'
+    assert my_circuit.photons == [first_a, first_b], 'Absorbed photon should still be reported'
+
+    while my_circuit.clock < 13:
+        my_circuit.tick()
+    assert my_circuit.active_photons == [first_a, second_a], 'Absorbed pooled photon should be dropped'
+    assert my_circuit.photon_pool.get_free() == 1, 'Absorbed pooled photon should be given back to the pool'
+    assert second_b not in my_circuit.photons, 'Absorbed pooled photon should not be reported'
+
+    while my_circuit.clock < 16:
+        my_circuit.tick()
+    assert first_a.is_looping(), 'First pulse of A should be looping'
+    assert my_circuit.active_photons == [second_a], 'Looping photon should be dropped'
+    while not my_circuit.is_finished():
+        my_circuit.tick()
+    assert my_circuit.active_photons == [], 'No photon should be in flight'
+    assert my_circuit.photons == [first_a, first_b, second_a], 'Looping pooled photon should be reported'
+
+    my_circuit.reset()
+    assert my_circuit.active_photons == [], 'reset should clear the active photons'
+    assert my_circuit.photons == [], 'reset should clear the photons'
+
+
+def vectorized_engine_test() -> None:
+    """Checks the vectorized engine gives the same results as ticking, for a circuit with mirrors and looping ones."""
+    try:
+        import numpy
+    except ImportError:
+        return
+    pairs = [(generate_circuit(30, 20, 8, 6, 0.1, seed=4), generate_circuit(30, 20, 8, 6, 0.1, seed=4))]
+    looping_pair = (get_my_looping_lasercircuit(), get_my_looping_lasercircuit())
+    for my_circuit in looping_pair:
+        my_circuit.emitters[0].set_pulse_sequence(100, 'E')
+        my_circuit.emitters[1].set_pulse_sequence(200, 'E')
+    pairs.append(looping_pair)
+    # pulse trains from two emitters whose photons start looping at different
+    # times, so the looping photons are not listed in the order they are fired
+    train_pair = (get_my_double_looping_lasercircuit(), get_my_double_looping_lasercircuit())
+    for my_circuit in train_pair:
+        my_circuit.emitters[0].set_pulse_sequence(100, 'E', 2, 3)
+        my_circuit.emitters[1].set_pulse_sequence(200, 'E', 2, 3)
+    pairs.append(train_pair)
+    for tick_circuit, vectorized_circuit in pairs:
+        with contextlib.redirect_stdout(io.StringIO()):
+            tick_circuit.run_circuit('tick')
+            vectorized_circuit.run_circuit('vectorized')
+
+        assert vectorized_circuit.clock == tick_circuit.clock, 'Circuits finished at different times'
+        for tick_receiver, vectorized_receiver in zip(tick_circuit.receivers, vectorized_circuit.receivers):
+            assert vectorized_receiver.get_activation_time() == tick_receiver.get_activation_time(), f'{tick_receiver.symbol} has wrong activation time'
+            assert vectorized_receiver.get_total_energy() == tick_receiver.get_total_energy(), f'{tick_receiver.symbol} has wrong total energy'
+            assert vectorized_receiver.photons_absorbed == tick_receiver.photons_absorbed, f'{tick_receiver.symbol} absorbed wrong number of photons'
+        tick_looping = [(photon.x, photon.y, photon.direction) for photon in tick_circuit.photons if photon.is_looping()]
+        vectorized_looping = [(photon.x, photon.y, photon.direction) for photon in vectorized_circuit.photons if photon.is_looping()]
+        assert vectorized_looping == tick_looping, 'Looping photons are wrong'
+    assert len(tick_looping) == 6, 'Every pulse from A and B should be looping'
+
+
+def trajectory_cache_test() -> None:
+    """Checks adding a mirror on a cached trajectory clears the cache so solve follows the new path."""
+    my_circuit = LaserCircuit(12, 3)
+    my_circuit.add_emitter(Emitter('A', 0, 1))
+    for receiver in [Receiver('R0', 10, 1), Receiver('R1', 5, 0), Receiver('R2', 3, 2)]:
+        my_circuit.add_receiver(receiver)
+    my_circuit.emitters[0].set_pulse_sequence(100, 'E')
+    my_circuit.solve()
+    assert len(my_circuit.trajectories) == 1, 'Trajectory of A should be cached'
+    assert my_circuit.receivers[0].get_activation_time() == 10, 'R0 has wrong activation time'
+
+    assert my_circuit.add_mirror(Mirror('/', 5, 1)), 'Mirror should be added'
+    assert len(my_circuit.trajectories) == 0, 'Adding a mirror should clear the cached trajectories'
+    my_circuit.solve()
+    assert not my_circuit.receivers[0].is_activated(), 'R0 should no longer be reached'
+    assert my_circuit.receivers[1].get_activation_time() == 6, 'R1 has wrong activation time'
+
+    assert my_circuit.add_mirrors([Mirror('\\', 3, 1)]) == [True], 'Mirror should be added'
+    assert len(my_circuit.trajectories) == 0, 'Adding mirrors should clear the cached trajectories'
+    my_circuit.solve()
+    assert not my_circuit.receivers[1].is_activated(), 'R1 should no longer be reached'
+    assert my_circuit.receivers[2].get_activation_time() == 4, 'R2 has wrong activation time'
+
+
+def frame_interval_test() -> None:
+    """Checks headless runs print no boards and frame_interval 0 prints only the final frame, with the same results."""
+    outputs = {}
+    files = {}
+    circuits = {}
+    for frame_interval in (5, None, 0):
+        for name in ('activation_times.out', 'total_energy.out'):
+            with open(os.path.join('/home/output', name), 'w') as f:
+                f.write('stale\n')
+        my_circuit = generate_circuit(30, 20, 8, 6, 0.1, seed=4)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            my_circuit.run_circuit(frame_interval=frame_interval)
+        outputs[frame_interval] = output.getvalue()
+        files[frame_interval] = []
+        for name in ('activation_times.out', 'total_energy.out'):
+            with open(os.path.join('/home/output', name)) as f:
+                files[frame_interval].append(f.read())
+        circuits[frame_interval] = my_circuit
+
+    # each board has a top and bottom border
+    assert outputs[5].count('+---') > 2, 'Default run should print several frames'
+    assert outputs[None].count('+---') == 0, 'Headless run should print no boards'
+    assert outputs[0].count('+---') == 2, 'frame_interval 0 should print only the final frame'
+    assert f'{circuits[0].clock}ns: {circuits[0].activated_receivers}/' in outputs[0].split('+---')[0].splitlines()[-1], 'Only frame should be the final one'
+    for frame_interval in (None, 0):
+        my_circuit = circuits[frame_interval]
+        assert files[frame_interval] == files[5], 'Output files should be written the same as the default run'
+        assert 'stale' not in files[frame_interval][0], 'Output files should be rewritten'
+        assert my_circuit.clock == circuits[5].clock, 'Circuit finished at a different time'
+        for receiver, expected in zip(my_circuit.receivers, circuits[5].receivers):
+            assert receiver.get_activation_time() == expected.get_activation_time(), f'{receiver.symbol} has wrong activation time'
+            assert receiver.get_total_energy() == expected.get_total_energy(), f'{receiver.symbol} has wrong total energy'
+
+
+def photon_direction_test() -> None:
+    """Checks invalid photon directions are ignored instead of raising."""
+    photon = Photon(1, 1, 100, 'Q')
+    assert photon.get_direction() is None, 'Photon with an invalid direction should have none'
+    photon.move(5, 5)
+    assert (photon.x, photon.y) == (1, 1), 'Photon with no direction should not move'
+    photon = Photon(1, 1, 100, 'N')
+    photon.direction = 'Q'
+    assert photon.get_direction() == 'N', 'Setting an invalid direction should be ignored'
+    photon.set_direction('Q')
+    assert photon.get_direction() == 'N', 'set_direction should ignore an invalid direction'
+
+
+def mirror_reflection_test() -> None:
+    """Checks reflections looked up in REFLECTIONS match every mirror type and direction, including absorption."""
+    # the direction a photon leaves each mirror in, or None if it is absorbed
+    expected = {'/': {'N': 'E', 'E': 'N', 'S': 'W', 'W': 'S'},
+                '\\': {'N': 'W', 'E': 'S', 'S': 'E', 'W': 'N'},
+                '>': {'N': 'E', 'E': None, 'S': 'E', 'W': None},
+                '<': {'N': 'W', 'E': None, 'S': 'W', 'W': None},
+                '^': {'N': None, 'E': 'N', 'S': None, 'W': 'N'},
+                'v': {'N': None, 'E': 'S', 'S': None, 'W': 'S'}}
+    assert sorted(REFLECTIONS) == sorted(expected), 'Every mirror type should have an entry in REFLECTIONS'
+    for symbol in expected:
+        mirror = Mirror(symbol, 1, 1)
+        for direction, outgoing in expected[symbol].items():
+            photon = Photon(1, 1, 100, direction)
+            mirror.reflect_photon(photon)
+            if outgoing is None:
+                assert photon.is_absorbed(), f'{symbol} should absorb a photon travelling {direction}'
+                assert photon.get_direction() == direction, f'{symbol} should not turn a photon it absorbs'
+            else:
+                assert not photon.is_absorbed(), f'{symbol} should not absorb a photon travelling {direction}'
+                assert photon.get_direction() == outgoing, f'{symbol} should turn {direction} to {outgoing}'
+        photon = Photon(1, 1, 100, None)
+        mirror.reflect_photon(photon)
+        assert photon.get_direction() is None and not photon.is_absorbed(), f'{symbol} should leave a photon with no direction as it is'
+
+    # an absorbed photon is not reflected again
+    photon = Photon(1, 1, 100, 'E')
+    Mirror('>', 1, 1).reflect_photon(photon)
+    assert photon.is_absorbed(), '> should absorb a photon travelling E'
+    Mirror('/', 1, 1).reflect_photon(photon)
+    assert photon.get_direction() == 'E', 'Absorbed photon should not be reflected'
+
+    # the vectorized engine looks reflections up in an array built from the same table
+    try:
+        import vectorized_engine
+    except ImportError:
+        return
+    for symbol in REFLECTIONS:
+        assert tuple(vectorized_engine.REFLECTIONS[vectorized_engine.MIRROR_CODES[symbol]].tolist()) == REFLECTIONS[symbol], f'Vectorized reflections of {symbol} are wrong'
+
+
+def identifier_test() -> None:
+    """Checks emitters and receivers past 'J' and 'R9' are accepted and ordered."""
+    my_circuit = LaserCircuit(30, 30)
+    for user_input in ['AA 1 1', 'K 2 2', 'A 3 3', 'Z 4 4']:
+        assert my_circuit.add_emitter(parse_emitter(user_input)), 'Emitter should be added'
+    for user_input in ['R10 1 20', 'R2 2 20', 'R123 3 20']:
+        assert my_circuit.add_receiver(parse_receiver(user_input)), 'Receiver should be added'
+
+    emitter_symbols = [emitter.get_symbol() for emitter in my_circuit.emitters]
+    receiver_symbols = [receiver.symbol for receiver in my_circuit.receivers]
+    assert emitter_symbols == ['A', 'K', 'Z', 'AA'], 'Emitters are in the wrong order'
+    assert receiver_symbols == ['R2', 'R10', 'R123'], 'Receivers are in the wrong order'
+    assert my_circuit.receivers[2].get_symbol() == '123', 'Receiver R123 has wrong symbol'
+    assert parse_receiver('R01 1 1') is None, 'Receiver symbol with a leading zero should be rejected'
+    assert parse_emitter('A1 1 1') is None, 'Emitter symbol with a digit should be rejected'
+    try:
+        Receiver('RX', 1, 1)
+        assert False, 'Receiver with an invalid symbol should not be created'
+    except ValueError:
+        pass
+
+
+def batch_runner_test() -> None:
+    """Checks a reused batch worker circuit gives the same results as running each pulse file on a new circuit."""
+    paths = ['/home/input/pulse_sequence1.in', '/home/input/pulse_sequence2.in']
+    expected = {}
+    for path in paths:
+        my_circuit = get_my_lasercircuit()
+        with contextlib.redirect_stdout(io.StringIO()):
+            with open(path) as file_obj:
+                set_pulse_sequence(my_circuit, file_obj)
+            my_circuit.run_circuit()
+        output = ''
+        for receiver in sorter.sort_receivers_by_activation_time(my_circuit.get_receivers()):
+            if receiver.is_activated():
+                output += f'{receiver.symbol}: {receiver.get_activation_time()}ns, {receiver.get_total_energy():.2f}eV ({receiver.photons_absorbed})\n'
+        expected[path] = output
+    assert expected[paths[0]] != expected[paths[1]], 'Pulse files should give different results'
+
+    worker_circuit = get_my_lasercircuit()
+    batch_runner.init_worker(worker_circuit)
+    # running the first file again checks reset leaves nothing from the file before
+    for path in paths + paths[:1]:
+        assert batch_runner.run_pulse_file(path) == (path, expected[path]), f'{path} has wrong batch results'
+    assert len(worker_circuit.photons) == 0, 'Reset should clear the photons'
+    assert all(emitter.is_pulse_sequence_set() for emitter in worker_circuit.get_emitters()), 'Every emitter should have its pulse sequence set'
+
+
+def sorter_test() -> None:
+    """Checks ties are left in the order the original exchange sorts gave and top-k matches the full sort."""
+    receivers = []
+    for symbol, timestamp, frequency in [('R3', 2, 100), ('R10', 1, 300), ('R1', 2, 100), ('R0', 2, 200), ('R2', 1, 300)]:
+        receiver = Receiver(symbol, 0, 0)
+        receiver.absorb_frequency(frequency, timestamp)
+        receivers.append(receiver)
+
+    by_time = [receiver.symbol for receiver in sorter.sort_receivers_by_activation_time(receivers)]
+    by_energy = [receiver.symbol for receiver in sorter.sort_receivers_by_total_energy(receivers)]
+    assert by_time == ['R10', 'R2', 'R0', 'R1', 'R3'], 'Activation time ties should compare symbols as strings'
+    assert by_energy == ['R10', 'R2', 'R0', 'R1', 'R3'], 'Total energy ties should compare symbols as strings'
+    assert sorter.top_receivers_by_activation_time(receivers, 2) == sorter.sort_receivers_by_activation_time(receivers)[:2], 'Top 2 by activation time is wrong'
+    assert sorter.top_receivers_by_total_energy(receivers, 3) == sorter.sort_receivers_by_total_energy(receivers)[:3], 'Top 3 by total energy is wrong'
+
+    # the exchange sort moves R0 past R1 when it swaps R0 with R2
+    receivers = []
+    for symbol, timestamp, frequency in [('R0', 2, 100), ('R1', 2, 100), ('R2', 1, 300)]:
+        receiver = Receiver(symbol, 0, 0)
+        receiver.absorb_frequency(frequency, timestamp)
+        receivers.append(receiver)
+    by_time = [receiver.symbol for receiver in sorter.sort_receivers_by_activation_time(receivers)]
+    by_energy = [receiver.symbol for receiver in sorter.sort_receivers_by_total_energy(receivers)]
+    assert by_time == ['R2', 'R1', 'R0'], 'Activation time ties are in the wrong order'
+    assert by_energy == ['R2', 'R1', 'R0'], 'Total energy ties are in the wrong order'
+    assert [receiver.symbol for receiver in sorter.top_receivers_by_activation_time(receivers, 2)] == ['R2', 'R1'], 'Top 2 by activation time is wrong'
+
+
+def board_displayer_test() -> None:
+    """Checks only changed rows are rebuilt and frames still print correctly."""
+    displayer = BoardDisplayer(4, 2)
+    displayer.add_component_to_board(Emitter('A', 0, 0))
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        displayer.print_board()
+    assert output.getvalue() == '+----+\n|A   |\n|    |\n+----+\n', 'First frame is wrong'
+    assert len(displayer.dirty_rows) == 0, 'Dirty rows should be cleared after printing'
+
+    displayer.set_cell(2, 1, '.')
+    assert displayer.dirty_rows == {1}, 'Only row 1 should be dirty'
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        displayer.print_board()
+    assert output.getvalue() == '+----+\n|A   |\n|  . |\n+----+\n', 'Second frame is wrong'
+
+    # each cell is one character, so only the last character of a symbol is drawn
+    for displayer in (BoardDisplayer(5, 1), SparseBoardDisplayer(5, 1)):
+        for component in (Emitter('B', 0, 0), Emitter('AB', 1, 0), Receiver('R2', 2, 0), Receiver('R12', 3, 0), Receiver('R102', 4, 0)):
+            displayer.add_component_to_board(component)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            displayer.print_board()
+        assert output.getvalue() == '+-----+\n|BB222|\n+-----+\n', 'Long symbols should be drawn as their last character'
+
+
+def sparse_board_test() -> None:
+    """Checks a huge board is stored sparsely and prints only its viewport."""
+    my_circuit = LaserCircuit(100000, 100000)
+    assert isinstance(my_circuit.board_displayer, SparseBoardDisplayer), 'Huge board should be sparse'
+    assert my_circuit.add_emitter(Emitter('A', 1, 0)), 'Emitter should be added'
+    assert my_circuit.add_receiver(Receiver('R0', 99999, 99999)), 'Receiver should be added'
+
+    displayer = my_circuit.board_displayer
+    displayer.set_viewport(0, 0, 3, 1)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        displayer.print_board()
+    assert output.getvalue() == '+---+\n| A |\n+---+\n', 'Viewport is printed wrong'
+    assert displayer.materialise(99998, 99999, 2, 1) == [[' ', '0']], 'Materialised cells are wrong'
+
+
+def netlist_test() -> None:
+    """Checks a netlist builds the same circuit as typed input, skipping bad lines."""
+    netlist = io.StringIO('SIZE 18 6\nEMITTERS\nA 2 2\nB 8 1\nEND EMITTERS\n'
+                          'RECEIVERS\nR0 15 2\nR1 8 4\nR1 9 4\nEND RECEIVERS\n'
+                          'MIRRORS\n/ 2 4\n\\ 8 3\nEND MIRRORS\nPULSES\nA 100 S\nEND PULSES\n')
+    with contextlib.redirect_stdout(io.StringIO()):
+        my_circuit, has_pulses = load_netlist(netlist)
+    assert has_pulses, 'Netlist has a PULSES section'
+    assert len(my_circuit.get_emitters()) == 2, 'Netlist should add 2 emitters'
+    assert len(my_circuit.get_receivers()) == 2, 'Duplicate receiver R1 should be skipped'
+    assert len(my_circuit.get_mirrors()) == 2, 'Netlist should add 2 mirrors'
+    assert my_circuit.get_emitter('A').is_pulse_sequence_set(), 'A should have its pulse sequence set'
+    assert not my_circuit.get_emitter('B').is_pulse_sequence_set(), 'B should not have its pulse sequence set'
+
+    # pulses may come before their emitters, and each add error is followed
+    # by the line it came from
+    netlist = io.StringIO('SIZE 18 6\nPULSES\nB 200 E\nC 100 N\nEND PULSES\nEMITTERS\nA 2 2\nB 8 1\nEND EMITTERS\n'
+                          'RECEIVERS\nR0 15 2\nR0 9 4\nR1 2 2\nEND RECEIVERS\n')
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        my_circuit, has_pulses = load_netlist(netlist)
+    assert my_circuit.get_emitter('B').is_pulse_sequence_set(), 'PULSES before EMITTERS should still set B'
+    assert len(my_circuit.get_receivers()) == 1, 'R0 and R1 should be skipped'
+    assert output.getvalue().splitlines() == ["Error: symbol 'R0' is already taken",
+                                              'Error: line 12: skipped R0 9 4',
+                                              "Error: position (2, 2) is already taken by emitter 'A'",
+                                              'Error: line 13: skipped R1 2 2',
+                                              "Error: emitter 'C' does not exist",
+                                              'Error: line 4: skipped C 100 N',
+                                              '18x6 board loaded with 2 emitter(s), 1 receiver(s), 0 mirror(s) and 1 pulse sequence(s).'], 'Add errors should be printed with their line'
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert load_netlist(io.StringIO('EMITTERS\nEND EMITTERS\n')) is None, 'Netlist without SIZE should fail'
+        assert load_netlist(io.StringIO('SIZE 5 5\nMIRRORS\n')) is None, 'Unended section should fail'
+
+
+def bulk_insertion_test() -> None:
+    """Checks the batch add methods match adding each component one at a time."""
+    def components() -> tuple[list[Emitter], list[Receiver], list[Mirror]]:
+        emitters = [Emitter('C', 0, 0), Emitter('A', 1, 0), Emitter('B', 0, 0), Emitter('A', 2, 0)]
+        receivers = [Receiver('R10', 5, 5), Receiver('R2', 1, 0), Receiver('R1', 6, 5), Receiver('R10', 7, 5)]
+        mirrors = [Mirror('/', 3, 3), Mirror('\\', 5, 5), Mirror('>', 3, 3), Mirror('v', 9, 9)]
+        return emitters, receivers, mirrors
+
+    one_at_a_time = LaserCircuit(8, 8)
+    emitters, receivers, mirrors = components()
+    single_output = io.StringIO()
+    with contextlib.redirect_stdout(single_output):
+        single_added = [one_at_a_time.add_emitter(emitter) for emitter in emitters]
+        single_added += [one_at_a_time.add_receiver(receiver) for receiver in receivers]
+        single_added += [one_at_a_time.add_mirror(mirror) for mirror in mirrors]
+
+    batch = LaserCircuit(8, 8)
+    emitters, receivers, mirrors = components()
+    batch_output = io.StringIO()
+    with contextlib.redirect_stdout(batch_output):
+        batch_added = batch.add_emitters(emitters) + batch.add_receivers(receivers) + batch.add_mirrors(mirrors)
+
+    assert batch_added == single_added, 'Batch should add the same components'
+    assert batch_output.getvalue() == single_output.getvalue(), 'Batch should print the same errors'
+    assert [emitter.get_symbol() for emitter in batch.emitters] == ['A', 'C'], 'Emitters are in the wrong order'
+    assert [receiver.symbol for receiver in batch.receivers] == ['R1', 'R10'], 'Receivers are in the wrong order'
+    assert batch.row_index == one_at_a_time.row_index, 'Row index should match'
+    assert batch.column_index == one_at_a_time.column_index, 'Column index should match'
+
+
+def circuit_generator_test() -> None:
+    """Checks generated circuits are repeatable and have the requested components."""
+    assert generate_netlist(40, 20, 30, 5, 0.1, seed=7) == generate_netlist(40, 20, 30, 5, 0.1, seed=7), 'Same seed should give the same netlist'
+    assert generate_netlist(40, 20, 30, 5, 0.1, seed=7) != generate_netlist(40, 20, 30, 5, 0.1, seed=8), 'Different seeds should differ'
+    my_circuit = generate_circuit(40, 20, 30, 5, 0.1, seed=7)
+    assert len(my_circuit.get_emitters()) == 30, 'Circuit should have 30 emitters'
+    assert my_circuit.get_emitters()[-1].get_symbol() == 'AD', 'Emitter 29 should be AD'
+    assert len(my_circuit.get_receivers()) == 5, 'Circuit should have 5 receivers'
+    assert len(my_circuit.get_mirrors()) == 80, 'Circuit should have 80 mirrors'
+    assert all(emitter.is_pulse_sequence_set() for emitter in my_circuit.get_emitters()), 'Every emitter should have a pulse sequence'
+
+
+def instrumentation_test(my_circuit: LaserCircuit, pulse_file_path: str) -> None:
+    """Checks a Collector counts every tick, frame and absorption of a run."""
+    with open(pulse_file_path) as f, contextlib.redirect_stdout(io.StringIO()):
+        set_pulse_sequence(my_circuit, f)
+    collector = Collector()
+    my_circuit.set_collector(collector)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        my_circuit.run_circuit()
+
+    assert collector.counters['ticks'] == my_circuit.clock, 'Every tick should be recorded'
+    assert collector.counters['absorptions'] == len(my_circuit.get_photons()), 'Every photon should be absorbed'
+    assert collector.counters['frames'] == output.getvalue().count('receiver(s) activated.'), 'Every frame should be recorded'
+    assert sum(collector.histograms['tick_us']) == collector.counters['ticks'], 'Tick histogram should hold every tick'
+    assert 'Instrumentation:' in output.getvalue(), 'Statistics should be dumped at the end of the run'
+
+
+def pulse_train_test() -> None:
+    """Checks pulse trains are parsed, fired on time and reuse pooled photons."""
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        assert parse_pulse_sequence('A 100 E 3 4') == ('A', 100, 'E', 3, 4), 'Pulse train should be parsed'
+        assert parse_pulse_sequence('A 100 E') == ('A', 100, 'E', 0, 1), 'Single pulse should have a count of 1'
+        assert parse_pulse_sequence('A 100 E 0 4') is None, 'Period of 0 should be rejected'
+    assert 'Error: period must be greater than zero' in output.getvalue(), 'Wrong error for a period of 0'
+    for line in ('A 100 E 3', 'A 100 E 3 4 5'):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            assert parse_pulse_sequence(line) is None, f'{line!r} has the wrong number of tokens'
+        assert output.getvalue() == 'Error: <symbol> <frequency> <direction> [<period> <count>]\n', f'Wrong error for {line!r}'
+
+    def build() -> LaserCircuit:
+        circuit = LaserCircuit(12, 3)
+        circuit.add_emitter(Emitter('A', 0, 1))
+        circuit.add_emitter(Emitter('B', 11, 0))
+        circuit.add_receiver(Receiver('R0', 10, 1))
+        circuit.add_mirror(Mirror('/', 11, 1))
+        circuit.get_emitter('A').set_pulse_sequence(100, 'E', 3, 4)
+        circuit.get_emitter('B').set_pulse_sequence(200, 'S', 2, 3)
+        return circuit
+
+    my_circuit = build()
+    my_circuit.emit_photons()
+    while not my_circuit.is_finished():
+        my_circuit.tick()
+    receiver = my_circuit.receivers[0]
+    assert receiver.photons_absorbed == 7, 'R0 should absorb every pulse'
+    assert receiver.get_activation_time() == 2, 'R0 has wrong activation time'
+    assert my_circuit.clock == 19, 'Last pulse of A is fired at 9ns and takes 10ns'
+    assert my_circuit.photon_pool.get_created() < 5, 'Absorbed pulses should be reused'
+
+    solved = build()
+    solved.solve()
+    assert solved.receivers[0].get_total_energy() == receiver.get_total_energy(), 'solve should match tick'
+    assert solved.clock == my_circuit.clock, 'solve should finish at the same time as tick'
+
+
+def checkpoint_test() -> None:
+    """Checks a circuit restored from a checkpoint finishes like the original."""
+    def build() -> LaserCircuit:
+        circuit = LaserCircuit(12, 3)
+        circuit.add_emitter(Emitter('A', 0, 1))
+        circuit.add_emitter(Emitter('B', 11, 0))
+        circuit.add_receiver(Receiver('R0', 10, 1))
+        circuit.add_mirror(Mirror('/', 11, 1))
+        circuit.get_emitter('A').set_pulse_sequence(100, 'E', 3, 4)
+        circuit.get_emitter('B').set_pulse_sequence(200, 'S', 2, 3)
+        circuit.emit_photons()
+        return circuit
+
+    my_circuit = build()
+    while not my_circuit.is_finished():
+        my_circuit.tick()
+
+    stopped = build()
+    while stopped.clock < 7:
+        stopped.tick()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'circuit.ckpt')
+        writer = checkpoint.CheckpointWriter(path, 0)
+        writer.after_tick(stopped)
+        writer.close()
+        assert writer.written == 1, 'Checkpoint should be written'
+        restored = checkpoint.load(path)
+    assert restored.clock == 7, 'Restored circuit has wrong clock'
+    assert writer.layout == checkpoint.pack_layout(stopped), 'Layout should be packed once by the first checkpoint'
+    assert len(stopped.get_photons()) == 2 and len(restored.get_photons()) == 1, 'Absorbed photon from B should not be saved'
+    assert restored.board_displayer.get_photon_cells() == stopped.board_displayer.get_photon_cells(), 'Restored board has wrong photon paths'
+    while not restored.is_finished():
+        restored.tick()
+    receiver = my_circuit.receivers[0]
+    assert restored.clock == my_circuit.clock, 'Restored circuit should finish at the same time'
+    assert restored.receivers[0].photons_absorbed == receiver.photons_absorbed, 'Restored circuit absorbed wrong number of photons'
+    assert restored.receivers[0].get_total_energy() == receiver.get_total_energy(), 'Restored circuit has wrong total energy'
+    assert restored.receivers[0].get_activation_time() == receiver.get_activation_time(), 'Restored circuit has wrong activation time'
+
+    # looping photons are saved without their mirror states and keep their order
+    looping_circuit = get_my_double_looping_lasercircuit()
+    stopped = get_my_double_looping_lasercircuit()
+    for circuit in (looping_circuit, stopped):
+        circuit.emitters[0].set_pulse_sequence(100, 'E', 2, 3)
+        circuit.emitters[1].set_pulse_sequence(200, 'E', 2, 3)
+        circuit.emit_photons()
+    while not looping_circuit.is_finished():
+        looping_circuit.tick()
+    while stopped.clock < 20:
+        stopped.tick()
+    restored = checkpoint.loads(checkpoint.dumps(stopped))
+    assert restored.board_displayer.get_photon_cells() == stopped.board_displayer.get_photon_cells(), 'Restored board has wrong photon paths'
+    while not restored.is_finished():
+        restored.tick()
+    expected = [(photon.x, photon.y, photon.get_direction()) for photon in looping_circuit.get_photons() if photon.is_looping()]
+    looping = [(photon.x, photon.y, photon.get_direction()) for photon in restored.get_photons() if photon.is_looping()]
+    assert looping == expected, 'Restored circuit has wrong looping photons'
+
+    try:
+        checkpoint.loads(b'LCKP')
+        assert False, 'Incomplete checkpoint should be rejected'
+    except ValueError:
+        pass
+
+
+def event_trace_test() -> None:
+    """Checks a replayed trace rebuilds the board and receivers of the run."""
+    my_circuit = LaserCircuit(12, 3)
+    my_circuit.add_emitter(Emitter('A', 0, 1))
+    my_circuit.add_emitter(Emitter('B', 11, 0))
+    my_circuit.add_receiver(Receiver('R0', 10, 1))
+    my_circuit.add_mirror(Mirror('/', 11, 1))
+    my_circuit.get_emitter('A').set_pulse_sequence(100, 'E', 3, 4)
+    my_circuit.get_emitter('B').set_pulse_sequence(200, 'S', 2, 3)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'circuit.trace')
+        my_circuit.set_tracer(EventTrace(path))
+        my_circuit.emit_photons()
+        activation_board = None
+        while not my_circuit.is_finished():
+            my_circuit.tick()
+            if my_circuit.clock == 2:
+                activation_board = my_circuit.board_displayer.get_photon_cells()
+        my_circuit.tracer.close()
+        replay = TraceReplay(path)
+        events = list(replay.events())
+        early = replay.replay(2)
+        replayed = replay.replay()
+    assert len(events) == my_circuit.tracer.records, 'Every record should be replayed'
+    assert [event[5] for event in events].count(ABSORB) == 7, 'Every pulse should be absorbed by R0'
+    assert early.receivers[0].get_activation_time() == 2, 'R0 should be activated at 2ns'
+    assert early.board_displayer.get_photon_cells() == activation_board, 'Replayed board at 2ns is wrong'
+    receiver = my_circuit.receivers[0]
+    assert replayed.receivers[0].get_total_energy() == receiver.get_total_energy(), 'Replayed total energy is wrong'
+    assert replayed.receivers[0].photons_absorbed == receiver.photons_absorbed, 'Replayed absorptions are wrong'
+    assert replayed.board_displayer.get_photon_cells() == my_circuit.board_displayer.get_photon_cells(), 'Replayed board is wrong'
+
+
+def parallel_test() -> None:
+    """Checks a parallel run gives exactly the same results as solve."""
+    solved = generate_circuit(30, 20, 8, 6, 0.1, seed=4)
+    parallel = generate_circuit(30, 20, 8, 6, 0.1, seed=4)
+    for my_circuit in (solved, parallel):
+        for emitter in my_circuit.get_emitters()[:4]:
+            emitter.pulse_period = 5
+            emitter.pulse_count = 10
+    shards = get_shards(parallel, 7)
+    assert len(shards) == 7, 'Photons should be split into 7 shards'
+    assert sum(end - first for shard in shards for index, first, end in shard) == 44, 'Every photon should be in a shard'
+    solved.solve()
+    run_parallel(parallel, 3)
+    assert parallel.clock == solved.clock, 'Parallel run should finish at the same time as solve'
+    assert parallel.activated_receivers == solved.activated_receivers, 'Parallel run activated wrong number of receivers'
+    i = 0
+    while i < len(solved.receivers):
+        expected = solved.receivers[i]
+        receiver = parallel.receivers[i]
+        assert receiver.get_total_energy() == expected.get_total_energy(), f'{receiver.symbol} has wrong total energy'
+        assert receiver.photons_absorbed == expected.photons_absorbed, f'{receiver.symbol} absorbed wrong number of photons'
+        assert receiver.get_activation_time() == expected.get_activation_time(), f'{receiver.symbol} has wrong activation time'
+        i += 1
+
+
+def result_cache_test() -> None:
+    """Checks results are keyed canonically, stored exactly and evicted LRU."""
+    netlist = generate_netlist(30, 20, 8, 6, 0.1, seed=4)
+    lines = netlist.splitlines()
+    start = lines.index('MIRRORS') + 1
+    end = lines.index('END MIRRORS')
+    # the same circuit with its mirrors added in the opposite order
+    reordered = '\n'.join(lines[:start] + lines[start:end][::-1] + lines[end:])
+    with contextlib.redirect_stdout(io.StringIO()):
+        my_circuit, has_pulses = load_netlist(io.StringIO(netlist))
+        same_circuit, has_pulses = load_netlist(io.StringIO(reordered))
+    key = result_cache.circuit_key(my_circuit)
+    assert result_cache.circuit_key(same_circuit) == key, 'Order components are added in should not change the key'
+    same_circuit.get_emitters()[0].pulse_count = 2
+    same_circuit.get_emitters()[0].pulse_period = 3
+    assert result_cache.circuit_key(same_circuit) != key, 'Pulse settings should change the key'
+
+    my_circuit.solve()
+    results = result_cache.get_results(my_circuit)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = result_cache.ResultCache(os.path.join(directory, 'results.sqlite'))
+        assert cache.get(key) is None, 'Empty cache should miss'
+        cache.put(key, results)
+        cached = cache.get(key)
+        cache.max_bytes = 2 * cache.get_size()
+        cache.put('second', results)
+        cache.get(key)
+        cache.put('third', results)
+        assert cache.get('second') is None, 'Least recently used results should be evicted'
+        assert cache.get(key) is not None, 'Recently used results should be kept'
+        cache.close()
+    with contextlib.redirect_stdout(io.StringIO()):
+        restored, has_pulses = load_netlist(io.StringIO(netlist))
+    result_cache.set_results(restored, cached)
+    assert restored.clock == my_circuit.clock, 'Cached clock is wrong'
+    assert restored.activated_receivers == my_circuit.activated_receivers, 'Cached activated receivers is wrong'
+    i = 0
+    while i < len(my_circuit.receivers):
+        expected = my_circuit.receivers[i]
+        receiver = restored.receivers[i]
+        assert receiver.get_total_energy() == expected.get_total_energy(), f'{receiver.symbol} has wrong cached total energy'
+        assert receiver.photons_absorbed == expected.photons_absorbed, f'{receiver.symbol} has wrong cached photons absorbed'
+        assert receiver.get_activation_time() == expected.get_activation_time(), f'{receiver.symbol} has wrong cached activation time'
+        i += 1
+
+    looping_circuit = get_my_looping_lasercircuit()
+    looping_circuit.emitters[0].set_pulse_sequence(100, 'E')
+    looping_circuit.emitters[1].set_pulse_sequence(200, 'E')
+    looping_circuit.solve()
+    looping_results = result_cache.get_results(looping_circuit)
+    assert looping_results['looping'] == [[5, 1, 'S']], 'Solved circuit should store the photon looping from A'
+    restored = get_my_looping_lasercircuit()
+    result_cache.set_results(restored, looping_results)
+    looping = [(photon.x, photon.y, photon.get_direction()) for photon in restored.photons if photon.is_looping()]
+    assert looping == [(5, 1, 'S')], 'Cached looping photons are wrong'
+
+    # pooled pulses are listed by when they start looping, which is not the
+    # order they are fired in when the loops take different times
+    tick_circuit = get_my_double_looping_lasercircuit()
+    solved = get_my_double_looping_lasercircuit()
+    for my_circuit in (tick_circuit, solved):
+        my_circuit.emitters[0].set_pulse_sequence(100, 'E', 2, 3)
+        my_circuit.emitters[1].set_pulse_sequence(200, 'E', 2, 3)
+    with contextlib.redirect_stdout(io.StringIO()):
+        tick_circuit.run_circuit('tick', None)
+    solved.solve()
+    restored = get_my_double_looping_lasercircuit()
+    result_cache.set_results(restored, result_cache.get_results(solved))
+    expected = [(photon.x, photon.y, photon.get_direction()) for photon in tick_circuit.photons if photon.is_looping()]
+    looping = [(photon.x, photon.y, photon.get_direction()) for photon in restored.photons if photon.is_looping()]
+    assert expected == [(5, 1, 'S'), (18, 1, 'S'), (5, 1, 'S'), (5, 1, 'S'), (18, 1, 'S'), (18, 1, 'S')], 'Tick looping photons are wrong'
+    assert looping == expected, 'Cached looping pulse trains should be in the order tick lists them'
+
+
 if __name__ == '__main__':
     # Run each function for testing
     positive_test_1(get_my_lasercircuit(), '/home/input/pulse_sequence1.in')
@@ -176,6 +910,26 @@ if __name__ == '__main__':
     negative_test_2(get_my_lasercircuit(), '/home/input/pulse_sequence4.in')
     edge_test_1(get_my_lasercircuit(), '/home/input/pulse_sequence5.in')
     edge_test_2(get_my_lasercircuit(), '/home/input/pulse_sequence6.in')
-
-                   
-
+    event_engine_test(get_my_lasercircuit(), get_my_lasercircuit(), '/home/input/pulse_sequence1.in')
+    looping_test(get_my_looping_lasercircuit())
+    counter_test(get_my_looping_lasercircuit())
+    active_photon_test(get_my_looping_lasercircuit())
+    vectorized_engine_test()
+    trajectory_cache_test()
+    frame_interval_test()
+    photon_direction_test()
+    mirror_reflection_test()
+    identifier_test()
+    batch_runner_test()
+    sorter_test()
+    board_displayer_test()
+    sparse_board_test()
+    netlist_test()
+    bulk_insertion_test()
+    circuit_generator_test()
+    instrumentation_test(get_my_lasercircuit(), '/home/input/pulse_sequence1.in')
+    pulse_train_test()
+    checkpoint_test()
+    event_trace_test()
+    parallel_test()
+    result_cache_test()
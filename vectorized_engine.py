@@ -0,0 +1,287 @@
+import time
+import numpy as np
+from photon import NO_DIRECTION, DIRECTION_CODES
+from mirror import REFLECTIONS as MIRROR_REFLECTIONS, ABSORBED
+
+'''
+
+VectorizedEngine - Runs a LaserCircuit with every photon stored in NumPy
+arrays (x, y, direction and absorbed flags) instead of one Photon object each.
+Each tick moves all photons still in flight at once, and mirrors and receivers
+are found by looking each photon's new position up in a grid of component
+codes. This needs NumPy, so LaserCircuit only imports this module when the
+'vectorized' engine is asked for. Pulses fired by pulse trains are added as
+new rows, with room for every pulse set aside up front.
+
+'''
+
+
+# indexed by Photon direction codes, a photon with NO_DIRECTION never moves
+STEP_X=np.array([0,1,0,-1,0])
+STEP_Y=np.array([-1,0,1,0,0])
+
+# codes stored in the component grid, each type of mirror gets its own code
+# from FIRST_MIRROR onwards
+EMPTY=0
+EMITTER=1
+RECEIVER=2
+FIRST_MIRROR=3
+MIRROR_CODES={}
+for mirror_symbol in MIRROR_REFLECTIONS:
+    MIRROR_CODES[mirror_symbol]=FIRST_MIRROR+len(MIRROR_CODES)
+
+# REFLECTIONS[mirror code][direction code] is mirror.REFLECTIONS as an array,
+# so reflections for many photons can be looked up at once
+REFLECTIONS=np.full((FIRST_MIRROR+len(MIRROR_CODES),NO_DIRECTION+1),NO_DIRECTION,dtype=np.int8)
+for mirror_symbol in MIRROR_REFLECTIONS:
+    REFLECTIONS[MIRROR_CODES[mirror_symbol]]=MIRROR_REFLECTIONS[mirror_symbol]
+
+
+class VectorizedEngine:
+
+
+    def __init__(self, circuit):
+        '''
+        Initialises a VectorizedEngine for circuit, copying the state of its
+        photons into arrays and building the component grids. The circuit's
+        photons should already have been emitted.
+
+        circuit:        LaserCircuit - the circuit being run
+        photons:        list[Photon] - the photon each of the first rows of
+                                       the arrays was copied from, being the
+                                       circuit's photons followed by any
+                                       pooled photons in flight
+        count:          int          - the number of rows in use, rows after
+                                       photons are pulses fired since
+        x:              ndarray      - x position of each photon
+        y:              ndarray      - y position of each photon
+        direction:      ndarray      - direction code of each photon
+        frequency:      ndarray      - frequency of each photon
+        absorbed:       ndarray      - whether each photon has been absorbed
+        looping:        ndarray      - whether each photon is looping forever
+        loop_time:      ndarray      - the clock time at which each photon is
+                                       marked as looping, else -1
+        active:         ndarray      - indexes of the photons still in flight
+        grid:           ndarray      - the component code at each cell, with
+                                       the same priority as
+                                       get_collided_component
+        receiver_grid:  ndarray      - index into the circuit's receivers of
+                                       the receiver at each cell, else -1
+        trail:          ndarray      - cells photons have passed through
+        painted:        ndarray      - cells of trail already drawn on the
+                                       circuit's board
+
+        Parameters
+        ----------
+        circuit - the LaserCircuit to run
+        '''
+        self.circuit=circuit
+        width=circuit.get_width()
+        height=circuit.get_height()
+        photons=circuit.get_photons()+[photon for photon in circuit.active_photons if photon.pooled]
+        self.photons=photons
+        self.count=len(photons)
+        capacity=self.count+circuit.pending_pulses
+        self.x=np.zeros(capacity,dtype=np.int64)
+        self.y=np.zeros(capacity,dtype=np.int64)
+        self.direction=np.zeros(capacity,dtype=np.int8)
+        self.frequency=np.zeros(capacity,dtype=np.int64)
+        self.absorbed=np.zeros(capacity,dtype=bool)
+        self.looping=np.zeros(capacity,dtype=bool)
+        self.x[:self.count]=[photon.get_x() for photon in photons]
+        self.y[:self.count]=[photon.get_y() for photon in photons]
+        self.direction[:self.count]=[photon.direction_code for photon in photons]
+        self.frequency[:self.count]=[photon.get_frequency() for photon in photons]
+        self.absorbed[:self.count]=[photon.is_absorbed() for photon in photons]
+        self.looping[:self.count]=[photon.is_looping() for photon in photons]
+        self.active=np.flatnonzero(~self.absorbed[:self.count]&~self.looping[:self.count])
+
+        # looping is detected from each photon's cached trajectory up front,
+        # since a set of visited states per photon cannot be kept in arrays
+        self.loop_time=np.full(capacity,-1,dtype=np.int64)
+        for index in self.active.tolist():
+            photon=photons[index]
+            trajectory=circuit.get_trajectory(photon.get_x(),photon.get_y(),photon.get_direction())
+            if trajectory[6]:
+                self.loop_time[index]=circuit.clock+trajectory[1]
+
+        self.grid=np.zeros((height,width),dtype=np.int8)
+        self.receiver_grid=np.full((height,width),-1,dtype=np.int64)
+        for mirror in circuit.get_mirrors():
+            self.grid[mirror.get_y(),mirror.get_x()]=MIRROR_CODES[mirror.get_symbol()]
+        receivers=circuit.get_receivers()
+        i=0
+        while i<len(receivers):
+            self.grid[receivers[i].get_y(),receivers[i].get_x()]=RECEIVER
+            self.receiver_grid[receivers[i].get_y(),receivers[i].get_x()]=i
+            i+=1
+        for emitter in circuit.get_emitters():
+            self.grid[emitter.get_y(),emitter.get_x()]=EMITTER
+
+        self.trail=np.zeros((height,width),dtype=bool)
+        self.painted=np.zeros((height,width),dtype=bool)
+
+
+    def is_finished(self) -> bool:
+        '''
+        Returns whether or not every photon has been absorbed or is looping,
+        and every pulse has been fired.
+        '''
+        return len(self.active)==0 and self.circuit.pending_pulses==0
+
+
+    def tick(self) -> None:
+        '''
+        Runs a single nanosecond of the circuit for every photon in flight,
+        matching LaserCircuit.tick. Photons leaving the board are absorbed in
+        place, then photons landing on a receiver are absorbed by it and
+        photons landing on a mirror are reflected using REFLECTIONS. Photons
+        reaching their loop_time are marked as looping. Statistics are
+        reported to the circuit's collector the same way as LaserCircuit.tick.
+        '''
+        circuit=self.circuit
+        circuit.clock+=1
+        if self.is_finished():
+            return
+        if circuit.collector.enabled:
+            start=time.perf_counter()
+        active=self.active
+        if len(active)==0:
+            # waiting for the next pulse
+            self.emit_pulses()
+            circuit.live_photons=len(self.active)
+            if circuit.collector.enabled:
+                circuit.collector.record_tick(time.perf_counter()-start,0,{'emitter':0,'receiver':0,'mirror':0},0)
+            return
+        direction=self.direction[active]
+        new_x=self.x[active]+STEP_X[direction]
+        new_y=self.y[active]+STEP_Y[direction]
+        inside=(new_x>=0)&(new_x<circuit.get_width())&(new_y>=0)&(new_y<circuit.get_height())
+        self.absorbed[active[~inside]]=True
+
+        moved=active[inside]
+        new_x=new_x[inside]
+        new_y=new_y[inside]
+        self.x[moved]=new_x
+        self.y[moved]=new_y
+        self.trail[new_y,new_x]=True
+        codes=self.grid[new_y,new_x]
+
+        # receivers are handled one photon at a time, in photon order, so
+        # energies are summed in the same order as LaserCircuit.tick
+        hit=codes==RECEIVER
+        if hit.any():
+            receivers=circuit.get_receivers()
+            for frequency,receiver_index in zip(self.frequency[moved[hit]].tolist(),self.receiver_grid[new_y[hit],new_x[hit]].tolist()):
+                if not receivers[receiver_index].is_activated():
+                    circuit.activated_receivers+=1
+                receivers[receiver_index].absorb_frequency(frequency,circuit.clock)
+            self.absorbed[moved[hit]]=True
+
+        reflected=codes>=FIRST_MIRROR
+        if reflected.any():
+            indexes=moved[reflected]
+            outgoing=REFLECTIONS[codes[reflected],self.direction[indexes]]
+            lost=outgoing==ABSORBED
+            self.absorbed[indexes[lost]]=True
+            self.direction[indexes[~lost]]=outgoing[~lost]
+
+        self.looping[active[self.loop_time[active]==circuit.clock]]=True
+        self.active=active[~self.absorbed[active]&~self.looping[active]]
+        if circuit.pending_pulses>0:
+            self.emit_pulses()
+        circuit.live_photons=len(self.active)
+        if circuit.collector.enabled:
+            collisions={'emitter':int((codes==EMITTER).sum()),'receiver':int(hit.sum()),'mirror':int(reflected.sum())}
+            absorbed=int(self.absorbed[active].sum())
+            circuit.collector.record_tick(time.perf_counter()-start,len(active),collisions,absorbed)
+
+
+    def emit_pulses(self) -> None:
+        '''
+        Adds a row for each pulse due at the circuit's clock time, in the
+        same order as LaserCircuit.emit_pulses, and adds them to active.
+        '''
+        circuit=self.circuit
+        rows=[]
+        for emitter in circuit.get_pulsing_emitters():
+            row=self.count
+            self.x[row]=emitter.get_x()
+            self.y[row]=emitter.get_y()
+            self.direction[row]=DIRECTION_CODES[emitter.get_direction()]
+            self.frequency[row]=emitter.get_frequency()
+            trajectory=circuit.get_trajectory(emitter.get_x(),emitter.get_y(),emitter.get_direction())
+            if trajectory[6]:
+                self.loop_time[row]=circuit.clock+trajectory[1]
+            rows.append(row)
+            self.count+=1
+            circuit.pending_pulses-=1
+        if len(rows)>0:
+            self.active=np.concatenate((self.active,np.array(rows,dtype=self.active.dtype)))
+
+
+    def paint_board(self) -> None:
+        '''
+        Draws every cell photons have passed through since the last call onto
+        the circuit's board.
+        '''
+        board_displayer=self.circuit.board_displayer
+        cells=np.argwhere(self.trail&~self.painted)
+        for y,x in cells.tolist():
+            if board_displayer.get_cell(x,y)==' ':
+                board_displayer.set_cell(x,y,'.')
+        self.painted|=self.trail
+
+
+    def write_back(self) -> None:
+        '''
+        Copies the position, direction, absorbed and looping flags of every
+        photon from the arrays back into the circuit's Photon objects. Pulses
+        fired since the engine was created have no Photon object, so one is
+        taken from the circuit's photon_pool for each that is looping or
+        still in flight. As in LaserCircuit.tick, absorbed pooled photons are
+        given back to the pool, looping ones are added to the circuit's
+        photons in the order they started looping (rows started on the same
+        tick in row order), and active_photons is set to the photons still in
+        flight.
+        '''
+        circuit=self.circuit
+        listed=len(circuit.get_photons())
+        x=self.x[:self.count].tolist()
+        y=self.y[:self.count].tolist()
+        direction=self.direction[:self.count].tolist()
+        frequency=self.frequency[:self.count].tolist()
+        absorbed=self.absorbed[:self.count].tolist()
+        looping=self.looping[:self.count].tolist()
+        loop_time=self.loop_time[:self.count].tolist()
+        active=self.active.tolist()
+        in_flight=set(active)
+        photons={}
+        # rows of pooled photons that started looping since they were listed
+        newly_looping=[]
+        i=0
+        while i<self.count:
+            if i<len(self.photons):
+                photon=self.photons[i]
+            elif looping[i] or i in in_flight:
+                photon=circuit.photon_pool.acquire(x[i],y[i],frequency[i],None)
+            else:
+                i+=1
+                continue
+            photons[i]=photon
+            photon.x=x[i]
+            photon.y=y[i]
+            photon.direction_code=direction[i]
+            if absorbed[i]:
+                photon.got_absorbed()
+            if looping[i]:
+                photon.set_looping()
+            if photon.pooled and absorbed[i]:
+                circuit.photon_pool.release(photon)
+            elif photon.pooled and looping[i] and i>=listed:
+                newly_looping.append(i)
+            i+=1
+        newly_looping.sort(key=lambda row:(loop_time[row],row))
+        for row in newly_looping:
+            circuit.photons.append(photons[row])
+        circuit.active_photons=[photons[index] for index in active]